@@ -0,0 +1,91 @@
+"""Synthetic inputs shaped like production data, shared by the benchmarks.
+
+Everything is seeded so two runs measure the same work.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import random
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+SCADA_COLUMNS = [
+    "DateTime",
+    "diff_pressure_inH20",
+    "static_pressure_psia",
+    "temperature_degF",
+    "volume_mcf",
+    "flow_rate_mcf_day",
+    "energy_mmbtu",
+    "flow_time_pct",
+    "alarms",
+]
+
+WORDS = (
+    "pressure flow casing tubing choke valve separator compressor alarm shut-in "
+    "restart operator rate gas oil water stage frac pump temperature reading "
+    "the a of on at was after before crew noted replaced checked normal high low"
+).split()
+
+
+def scada_csv(rows: int, start: datetime, seed: Optional[int] = 0) -> bytes:
+    """A SCADA export with one reading per minute, as ``/ingest/scada`` takes."""
+    rng = random.Random(seed)
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(SCADA_COLUMNS)
+    for i in range(rows):
+        ts = start + timedelta(minutes=i)
+        writer.writerow(
+            [
+                ts.strftime("%m/%d/%Y %H:%M") + "-01:00",
+                round(rng.uniform(10, 60), 2),
+                round(rng.uniform(300, 900), 2),
+                round(rng.uniform(40, 110), 2),
+                round(rng.uniform(0, 5), 3),
+                round(rng.uniform(100, 900), 1),
+                round(rng.uniform(0, 6), 3),
+                100.0,
+                rng.choice(["", "", "", "HIGH_PRESSURE"]),
+            ]
+        )
+    return out.getvalue().encode()
+
+
+def report_lines(lines: int, seed: int = 0) -> List[str]:
+    """Lines of a field report: prose, readings and punctuation."""
+    rng = random.Random(seed)
+    out = []
+    for i in range(lines):
+        words = rng.choices(WORDS, k=rng.randint(6, 16))
+        if i % 3 == 0:
+            words.append(f"{rng.uniform(0, 1000):.1f} psi,")
+        out.append(" ".join(words).capitalize() + ".")
+    return out
+
+
+def report_text(pages: int, lines_per_page: int = 45, seed: int = 0) -> str:
+    return "\n".join(report_lines(pages * lines_per_page, seed))
+
+
+def report_pdf(pages: int, lines_per_page: int = 45, seed: int = 0) -> bytes:
+    """A text PDF of ``pages`` pages; needs PyMuPDF."""
+    import fitz
+
+    lines = report_lines(pages * lines_per_page, seed)
+    doc = fitz.open()
+    for p in range(pages):
+        page = doc.new_page()
+        chunk = lines[p * lines_per_page : (p + 1) * lines_per_page]
+        page.insert_text((36, 36), "\n".join(chunk), fontsize=8)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def vector(dim: int, seed: int = 0, scale: float = 0.1) -> List[float]:
+    """An embedding-like vector; most values sit around ``scale``."""
+    rng = random.Random(seed)
+    return [rng.gauss(0, scale) for _ in range(dim)]
@@ -0,0 +1,105 @@
+"""Run the hot-path micro-benchmarks and gate on a stored baseline.
+
+    python -m benchmarks.micro save                   # record the baseline
+    python -m benchmarks.micro check --threshold 15   # fail on a >15% slowdown
+    python -m benchmarks.micro check -- -k prune      # extra args go to pytest
+
+Results are pytest-benchmark JSON. ``save`` writes ``--baseline``, and
+``check`` compares each benchmark's median with it. The run fails when any
+benchmark is slower by more than ``--threshold`` percent; benchmarks that
+did not run (deselected, or skipped for a missing dependency) are listed but
+do not fail it. Baselines depend on the machine, so record one per CI runner or
+laptop and compare like with like.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from typing import Dict, List, Optional
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(HERE, "baseline.json")
+
+
+def run(output: str, pytest_args: List[str]) -> int:
+    return pytest.main(
+        [
+            HERE,
+            "-q",
+            "--benchmark-only",
+            f"--benchmark-json={output}",
+            "--benchmark-columns=min,median,max,rounds",
+            *pytest_args,
+        ]
+    )
+
+
+def medians(path: str) -> Dict[str, float]:
+    with open(path) as f:
+        data = json.load(f)
+    return {b["fullname"]: b["stats"]["median"] for b in data["benchmarks"]}
+
+
+def compare(
+    current: Dict[str, float], baseline: Dict[str, float], threshold: float
+) -> bool:
+    ok = True
+    for name, old in sorted(baseline.items()):
+        new = current.get(name)
+        if new is None:
+            # Deselected with -k, or skipped for a missing dependency.
+            print(f"  {name}: not run")
+            continue
+        change = (new - old) / old * 100
+        flag = ""
+        if change > threshold:
+            flag, ok = "  REGRESSION", False
+        print(
+            f"  {name}: {old * 1e3:.3f}ms -> {new * 1e3:.3f}ms "
+            f"({change:+.1f}%){flag}"
+        )
+    for name in sorted(set(current) - set(baseline)):
+        print(f"  {name}: new, no baseline")
+    return ok
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["save", "check"])
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=float(os.getenv("BENCHMARK_THRESHOLD", "15")),
+        help="allowed slowdown of a median, in percent",
+    )
+    parser.add_argument("pytest_args", nargs="*")
+    args = parser.parse_args(argv)
+
+    if args.command == "save":
+        status = run(args.baseline, args.pytest_args)
+        if status == 0:
+            print(f"Baseline written to {args.baseline}")
+        sys.exit(status)
+
+    if not os.path.exists(args.baseline):
+        sys.exit(f"No baseline at {args.baseline}; run 'save' first")
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "current.json")
+        status = run(output, args.pytest_args)
+        if status != 0:
+            sys.exit(status)
+        current = medians(output)
+    print(f"Compared with {args.baseline} (threshold {args.threshold:g}%):")
+    if not compare(current, medians(args.baseline), args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def pytest_configure(config):
+    if not config.getoption("benchmark_only", default=False):
+        return
+    try:
+        from loguru import logger
+    except ImportError:
+        return
+    # Measure the functions, not the terminal: several log on every call.
+    logger.remove()
+
+
+def pytest_collection_modifyitems(config, items):
+    # These are slow by design; only run them when benchmarks are asked for
+    # (``python -m benchmarks.micro`` or ``pytest --benchmark-only``).
+    if config.getoption("benchmark_only", default=False):
+        return
+    skip = pytest.mark.skip(reason="micro-benchmark; run python -m benchmarks.micro")
+    for item in items:
+        if str(item.fspath).startswith(HERE):
+            item.add_marker(skip)
+
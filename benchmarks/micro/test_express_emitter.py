@@ -0,0 +1,29 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from benchmarks.inputs import report_pdf, report_text
+from express_emitter.utils import extract_content, preprocess_text
+
+PAGES = 500
+
+
+@pytest.fixture(scope="module")
+def report():
+    return report_text(PAGES)
+
+
+def test_preprocess_text_500_pages(benchmark, report):
+    assert benchmark(preprocess_text, report)
+
+
+def test_extract_content_txt_500_pages(benchmark, report):
+    data = report.encode()
+    assert benchmark(extract_content, data, ".txt")
+
+
+def test_extract_content_pdf_500_pages(benchmark):
+    pytest.importorskip("fitz")
+    data = report_pdf(PAGES)
+    text = benchmark.pedantic(extract_content, args=(data, ".pdf"), rounds=3)
+    assert "pressure" in text.lower()
@@ -0,0 +1,27 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("numpy")
+pytest.importorskip("sklearn")
+pytest.importorskip("loguru")
+
+from benchmarks.inputs import report_text, vector
+from interpret_service.pruning import prune_embedding
+
+THRESHOLD = 0.1
+
+
+@pytest.mark.parametrize("dim", [384, 1536])
+def test_prune_embedding(benchmark, dim):
+    values = vector(dim)
+    pruned, details = benchmark(prune_embedding, values, THRESHOLD)
+    assert details["original_size"] == dim
+
+
+def test_prune_content_500_pages(benchmark):
+    pytest.importorskip("openai")
+    pytest.importorskip("spacy")
+    from interpret_service.utils import prune_content
+
+    text = report_text(500)
+    assert benchmark(prune_content, text)
@@ -0,0 +1,45 @@
+import io
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pd = pytest.importorskip("pandas")
+
+from benchmarks.inputs import scada_csv
+from now_ingestor.scada_utils import parse_scada_timestamp, row_to_memory
+
+SCADA_ROWS = 100_000
+
+
+@pytest.fixture(scope="module")
+def scada_export():
+    return scada_csv(SCADA_ROWS, datetime(2025, 1, 1))
+
+
+@pytest.fixture(scope="module")
+def scada_row(scada_export):
+    return pd.read_csv(io.BytesIO(scada_export), nrows=1).iloc[0]
+
+
+def test_parse_scada_timestamp(benchmark):
+    assert benchmark(parse_scada_timestamp, "05/07/2024 13:45-01:00")
+
+
+def test_row_to_memory_series(benchmark, scada_row):
+    assert benchmark(row_to_memory, scada_row)["source"] == "scada"
+
+
+def test_row_to_memory_dict(benchmark, scada_row):
+    row = scada_row.to_dict()
+    assert benchmark(row_to_memory, row)["source"] == "scada"
+
+
+def test_scada_export_100k_rows(benchmark, scada_export):
+    # The whole of /ingest/scada short of publishing.
+    def ingest(data: bytes):
+        df = pd.read_csv(io.BytesIO(data))
+        return [row_to_memory(row) for _, row in df.iterrows()]
+
+    memories = benchmark.pedantic(ingest, args=(scada_export,), rounds=3)
+    assert len(memories) == SCADA_ROWS
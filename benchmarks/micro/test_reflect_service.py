@@ -0,0 +1,25 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("numpy")
+
+from benchmarks.inputs import vector
+from reflect_service.validation import validate_embedding
+
+
+def run_sync(coro):
+    """Result of a coroutine that never suspends, without an event loop."""
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        return done.value
+    coro.close()
+    raise RuntimeError("coroutine suspended; run it on an event loop")
+
+
+@pytest.mark.parametrize("dim", [384, 1536])
+@pytest.mark.parametrize("scale", [0.01, 0.1], ids=["valid", "rejected"])
+def test_validate_embedding(benchmark, dim, scale):
+    values = vector(dim, scale=scale)
+    anchored, status, _ = benchmark(lambda: run_sync(validate_embedding(values)))
+    assert len(anchored) == dim
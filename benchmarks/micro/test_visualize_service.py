@@ -0,0 +1,36 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+np = pytest.importorskip("numpy")
+pytest.importorskip("sklearn")
+pytest.importorskip("plotly")
+pytest.importorskip("loguru")
+
+from benchmarks.inputs import vector
+from visualize_service.visualization import dimensionality_reduction
+
+
+def embeddings(rows: int, dim: int):
+    return np.array([vector(dim, seed=i) for i in range(rows)])
+
+
+@pytest.mark.parametrize("dim", [384, 1536])
+def test_pca_single_embedding(benchmark, dim):
+    # What generate_visualization does per message: one embedding plus a
+    # jittered copy.
+    array = embeddings(2, dim)
+    assert benchmark(dimensionality_reduction, array, "pca", 2).shape == (2, 2)
+
+
+@pytest.mark.parametrize("dim", [384, 1536])
+def test_pca_500_embeddings(benchmark, dim):
+    array = embeddings(500, dim)
+    assert benchmark(dimensionality_reduction, array, "pca", 3).shape == (500, 3)
+
+
+def test_tsne_500_embeddings(benchmark):
+    array = embeddings(500, 384)
+    reduced = benchmark.pedantic(
+        dimensionality_reduction, args=(array, "tsne", 2), rounds=3
+    )
+    assert reduced.shape == (500, 2)
@@ -0,0 +1,486 @@
+"""End-to-end load and soak run of the NOW → … → EMBED pipeline.
+
+Starts every pipeline service as a local ``uvicorn`` process against the
+stand-ins in :mod:`benchmarks.standins`, with the fake encoder
+(``MODEL_BACKEND=fake``), a blank spaCy pipeline and Qdrant in ``:memory:``
+mode, so a run needs no network or model downloads. It then posts synthetic
+NowSignals at ``--rate`` per second for ``--duration`` seconds, plus
+``--scada-files`` SCADA CSV uploads of ``--scada-rows`` rows each.
+
+Every channel is observed from the harness. Each memory is followed by its
+uuid from the moment it was sent (or first seen, for SCADA rows) to
+``embed_channel``. The JSON report (``--output``) has, per stage and end to
+end, throughput and p50/p99 latency, plus memories that never arrived and
+peak RSS per service. ``--baseline`` compares against an earlier report and
+``--max-regression`` fails the run on a slowdown::
+
+    python -m benchmarks.soak --rate 50 --duration 120 --output soak.json
+    python -m benchmarks.soak --baseline soak.json --max-regression 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from benchmarks.inputs import WORDS, scada_csv
+from benchmarks.standins import PostgresStandIn, RedisStandIn, free_port
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# (service, package) in pipeline order.
+SERVICES = [
+    ("now", "now_ingestor"),
+    ("express", "express_emitter"),
+    ("interpret", "interpret_service"),
+    ("reflect", "reflect_service"),
+    ("visualize", "visualize_service"),
+    ("embed", "embed_memory_service"),
+]
+# Channel each stage publishes to, in pipeline order.
+STAGE_CHANNELS = [
+    ("now", "now_channel"),
+    ("express", "express_channel"),
+    ("interpret", "interpret_channel"),
+    ("reflect", "reflect_channel"),
+    ("visualize", "visualize_channel"),
+    ("embed", "embed_channel"),
+]
+FINAL_CHANNEL = STAGE_CHANNELS[-1][1]
+
+
+# -- services --------------------------------------------------------------------
+
+
+class Service:
+    def __init__(self, name: str, package: str, env: Dict[str, str], workdir: str):
+        self.name = name
+        self.package = package
+        self.port = free_port()
+        self.log_path = os.path.join(workdir, f"{name}.log")
+        cwd = os.path.join(workdir, name)
+        os.makedirs(cwd, exist_ok=True)
+        service_env = {
+            **os.environ,
+            **env,
+            # Package imports for relative imports, the service directory for
+            # the sibling imports services use inside their containers.
+            "PYTHONPATH": os.pathsep.join([ROOT, os.path.join(ROOT, package)]),
+        }
+        self.proc = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", f"{package}.main:app",
+                "--host", "127.0.0.1", "--port", str(self.port),
+                "--log-level", "warning",
+            ],
+            cwd=cwd,
+            env=service_env,
+            stdout=open(self.log_path, "w"),
+            stderr=subprocess.STDOUT,
+        )
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def wait_ready(self, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"{self.name} exited; see {self.log_path}")
+            try:
+                urllib.request.urlopen(f"{self.url}/ready", timeout=1)
+                return
+            except urllib.error.HTTPError as e:
+                if e.code == 404:  # serving, and has no model to wait for
+                    return
+            except OSError:
+                pass
+            time.sleep(0.25)
+        raise RuntimeError(
+            f"{self.name} not ready after {timeout}s; see {self.log_path}"
+        )
+
+    def rss_mb(self) -> Optional[float]:
+        try:
+            with open(f"/proc/{self.proc.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            return None
+        return None
+
+    def stop(self) -> None:
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+# -- observation -----------------------------------------------------------------
+
+
+class Tracker:
+    """Records when each uuid first appears on each pipeline channel."""
+
+    def __init__(self, host: str, port: int) -> None:
+        import redis
+
+        self.client = redis.Redis(host=host, port=port, decode_responses=True)
+        self.sent: Dict[str, float] = {}
+        self.seen: Dict[str, Dict[str, float]] = {}
+        self.counts: Dict[str, int] = {channel: 0 for _, channel in STAGE_CHANNELS}
+        self.last_final = time.monotonic()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._pubsub = self.client.pubsub()
+        self._pubsub.subscribe(*self.counts)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> "Tracker":
+        self._thread.start()
+        return self
+
+    def mark_sent(self, memory_id: str) -> None:
+        with self._lock:
+            self.sent[memory_id] = time.monotonic()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            message = self._pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=0.1
+            )
+            if not message:
+                continue
+            now = time.monotonic()
+            channel = message["channel"]
+            try:
+                memory_id = json.loads(message["data"]).get("uuid")
+            except (ValueError, AttributeError):
+                memory_id = None
+            with self._lock:
+                self.counts[channel] += 1
+                if memory_id:
+                    self.seen.setdefault(memory_id, {}).setdefault(channel, now)
+                if channel == FINAL_CHANNEL:
+                    self.last_final = now
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=2)
+        self._pubsub.close()
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100 * len(ordered))) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def _latency(values: List[float]) -> Dict[str, Optional[float]]:
+    ms = [v * 1000 for v in values]
+    p50, p99 = percentile(ms, 50), percentile(ms, 99)
+    return {
+        "p50": round(p50, 2) if p50 is not None else None,
+        "p99": round(p99, 2) if p99 is not None else None,
+    }
+
+
+# -- load --------------------------------------------------------------------------
+
+
+def _post(url: str, body: bytes, content_type: str) -> None:
+    request = urllib.request.Request(
+        url, data=body, headers={"Content-Type": content_type}, method="POST"
+    )
+    with urllib.request.urlopen(request, timeout=30) as response:
+        response.read()
+
+
+def _multipart(field: str, filename: str, content: bytes) -> tuple:
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        "Content-Type: text/csv\r\n\r\n"
+    ).encode() + content + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def drive(args, now_url: str, tracker: Tracker) -> Dict[str, int]:
+    """Send NowSignals at ``args.rate``/s and the SCADA uploads."""
+    stats = {"signals_sent": 0, "scada_rows_sent": 0, "http_errors": 0}
+    lock = threading.Lock()
+
+    def send_signal() -> None:
+        memory_id = str(uuid.uuid4())
+        signal = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "source": "soak",
+            "content": " ".join(random.choices(WORDS, k=args.words)),
+            "uuid": memory_id,
+        }
+        tracker.mark_sent(memory_id)
+        try:
+            _post(f"{now_url}/ingest", json.dumps(signal).encode(), "application/json")
+            key = "signals_sent"
+        except OSError:
+            key = "http_errors"
+        with lock:
+            stats[key] += 1
+
+    def send_scada(index: int) -> None:
+        start = datetime(2025, 1, 1) + timedelta(days=index)
+        body, content_type = _multipart(
+            "file", f"soak_{index}.csv", scada_csv(args.scada_rows, start, seed=None)
+        )
+        try:
+            _post(f"{now_url}/ingest/scada", body, content_type)
+            key, n = "scada_rows_sent", args.scada_rows
+        except OSError:
+            key, n = "http_errors", 1
+        with lock:
+            stats[key] += n
+
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        total = int(args.rate * args.duration)
+        scada_every = total // args.scada_files if args.scada_files else 0
+        started = time.monotonic()
+        for i in range(total):
+            due = started + i / args.rate
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send_signal)
+            if scada_every and i % scada_every == 0:
+                pool.submit(send_scada, i // scada_every)
+        if args.scada_files and not total:
+            for index in range(args.scada_files):
+                pool.submit(send_scada, index)
+    return stats
+
+
+# -- report ------------------------------------------------------------------------
+
+
+def build_report(args, tracker: Tracker, stats, rss, window: float, infra) -> Dict:
+    stages = {}
+    previous = None
+    for stage, channel in STAGE_CHANNELS:
+        durations = []
+        for memory_id, seen in tracker.seen.items():
+            if channel not in seen:
+                continue
+            if previous is None:
+                began = tracker.sent.get(memory_id)
+            else:
+                began = seen.get(previous)
+            if began is not None:
+                durations.append(seen[channel] - began)
+        stages[stage] = {
+            "messages": tracker.counts[channel],
+            "throughput_per_s": round(tracker.counts[channel] / window, 2),
+            "latency_ms": _latency(durations),
+        }
+        previous = channel
+
+    end_to_end, dropped, last_stage = [], 0, {}
+    for memory_id, seen in tracker.seen.items():
+        began = tracker.sent.get(memory_id, min(seen.values()))
+        if FINAL_CHANNEL in seen:
+            end_to_end.append(seen[FINAL_CHANNEL] - began)
+            continue
+        dropped += 1
+        reached = [s for s, c in STAGE_CHANNELS if c in seen]
+        key = f"after_{reached[-1]}" if reached else "before_now"
+        last_stage[key] = last_stage.get(key, 0) + 1
+    never_seen = len(set(tracker.sent) - set(tracker.seen))
+    if never_seen:
+        last_stage["before_now"] = last_stage.get("before_now", 0) + never_seen
+        dropped += never_seen
+
+    return {
+        "version": _git_version(),
+        "finished_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "rate": args.rate,
+            "duration": args.duration,
+            "scada_files": args.scada_files,
+            "scada_rows": args.scada_rows,
+            "fake_model_latency_ms": args.fake_model_latency_ms,
+        },
+        "infrastructure": infra,
+        "load": stats,
+        "stages": stages,
+        "end_to_end": {
+            "completed": len(end_to_end),
+            "throughput_per_s": round(len(end_to_end) / window, 2),
+            "latency_ms": _latency(end_to_end),
+        },
+        "dropped": {"total": dropped, "by_last_stage": last_stage},
+        "rss_mb": rss,
+    }
+
+
+def _git_version() -> str:
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(report: Dict, baseline: Dict, max_regression: Optional[float]) -> bool:
+    """Print deltas against ``baseline``; False if a gate is exceeded."""
+    ok = True
+    checks = [
+        ("end_to_end.throughput_per_s", True),
+        ("end_to_end.latency_ms.p50", False),
+        ("end_to_end.latency_ms.p99", False),
+    ]
+    for stage, _ in STAGE_CHANNELS:
+        checks.append((f"stages.{stage}.latency_ms.p99", False))
+
+    def lookup(data, path):
+        for key in path.split("."):
+            data = (data or {}).get(key)
+        return data
+
+    print(f"Compared with {baseline.get('version', '?')}:")
+    for path, higher_is_better in checks:
+        new, old = lookup(report, path), lookup(baseline, path)
+        if new is None or not old:
+            continue
+        change = (new - old) / old * 100
+        worse = -change if higher_is_better else change
+        flag = ""
+        if max_regression is not None and worse > max_regression:
+            flag, ok = "  REGRESSION", False
+        print(f"  {path:40} {old:>10} -> {new:>10} ({change:+.1f}%){flag}")
+    new_drops = report["dropped"]["total"]
+    old_drops = baseline.get("dropped", {}).get("total", 0)
+    print(f"  {'dropped.total':40} {old_drops:>10} -> {new_drops:>10}")
+    return ok
+
+
+# -- main --------------------------------------------------------------------------
+
+
+def run(args) -> Dict:
+    workdir = tempfile.mkdtemp(prefix="genio-soak-")
+    redis_standin = RedisStandIn(args.redis_url).start()
+    pg_standin = PostgresStandIn(args.use_existing_postgres).start()
+    services: List[Service] = []
+    try:
+        env = {
+            **redis_standin.env(),
+            **pg_standin.env(),
+            "QDRANT_LOCATION": ":memory:",
+            "MODEL_BACKEND": "fake",
+            "FAKE_MODEL_LATENCY_MS": str(args.fake_model_latency_ms),
+            "SPACY_MODEL": "blank:en",
+        }
+        for name, package in SERVICES:
+            services.append(Service(name, package, env, workdir))
+        for service in services:
+            service.wait_ready(args.startup_timeout)
+        print(f"Services up; logs in {workdir}", file=sys.stderr)
+
+        tracker = Tracker(redis_standin.host, redis_standin.port).start()
+        rss: Dict[str, Dict[str, float]] = {s.name: {"max": 0.0} for s in services}
+        sampling = threading.Event()
+
+        def sample_rss() -> None:
+            while not sampling.wait(1.0):
+                for service in services:
+                    value = service.rss_mb()
+                    if value is not None:
+                        entry = rss[service.name]
+                        entry["max"] = round(max(entry["max"], value), 1)
+                        entry["last"] = round(value, 1)
+
+        threading.Thread(target=sample_rss, daemon=True).start()
+        started = time.monotonic()
+        stats = drive(args, services[0].url, tracker)
+
+        # Let the pipeline drain: stop once nothing new reached the end for a
+        # few seconds, or when the drain budget runs out.
+        drain_deadline = time.monotonic() + args.drain
+        while time.monotonic() < drain_deadline:
+            if time.monotonic() - tracker.last_final > args.idle:
+                break
+            time.sleep(0.5)
+        window = max(tracker.last_final - started, 1e-9)
+        sampling.set()
+        tracker.stop()
+
+        infra = {"redis": redis_standin.kind, "postgres": pg_standin.kind}
+        return build_report(args, tracker, stats, rss, window, infra)
+    finally:
+        for service in services:
+            service.stop()
+        pg_standin.stop()
+        redis_standin.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=float, default=20, help="NowSignals per second")
+    parser.add_argument("--duration", type=float, default=60, help="seconds of load")
+    parser.add_argument("--words", type=int, default=40, help="words per signal")
+    parser.add_argument("--scada-files", type=int, default=1)
+    parser.add_argument("--scada-rows", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--fake-model-latency-ms", type=float, default=0)
+    parser.add_argument("--drain", type=float, default=60, help="max seconds to drain")
+    parser.add_argument("--idle", type=float, default=5, help="quiet seconds = drained")
+    parser.add_argument("--startup-timeout", type=float, default=120)
+    parser.add_argument("--redis-url", help="use this Redis instead of a stand-in")
+    parser.add_argument("--use-existing-postgres", action="store_true")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="compare with an earlier report")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        help="fail when a compared metric is this many percent worse",
+    )
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if not compare(report, baseline, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Local stand-ins for the infrastructure the services expect.
+
+* Redis: a throwaway ``redis-server`` on a free port, or fakeredis' TCP
+  server when no binary is installed, or an existing ``--redis-url``.
+* Postgres: a temporary cluster created with ``initdb``/``pg_ctl`` in a temp
+  directory, or an existing server described by the usual ``PG*`` variables.
+* Qdrant: nothing to start; services get ``QDRANT_LOCATION=:memory:``.
+"""
+
+from __future__ import annotations
+
+import glob
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as s:
+            if s.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.1)
+    raise RuntimeError(f"nothing listening on port {port} after {timeout}s")
+
+
+class RedisStandIn:
+    def __init__(self, url: Optional[str] = None) -> None:
+        self.url = url
+        self.host, self.port = "127.0.0.1", 0
+        self.kind = "external"
+        self._proc: Optional[subprocess.Popen] = None
+        self._server = None
+
+    def start(self) -> "RedisStandIn":
+        if self.url:
+            parsed = urlparse(self.url)
+            self.host, self.port = parsed.hostname, parsed.port or 6379
+            return self
+
+        self.port = free_port()
+        binary = shutil.which("redis-server")
+        if binary:
+            self.kind = "redis-server"
+            self._proc = subprocess.Popen(
+                [binary, "--port", str(self.port), "--save", "", "--appendonly", "no"],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+        else:
+            try:
+                from fakeredis import TcpFakeServer
+            except ImportError:
+                raise RuntimeError(
+                    "Redis stand-in needs redis-server on PATH, fakeredis>=2.26 "
+                    "or --redis-url"
+                )
+            self.kind = "fakeredis"
+            self._server = TcpFakeServer((self.host, self.port))
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        wait_for_port(self.port)
+        return self
+
+    def env(self) -> Dict[str, str]:
+        return {"REDIS_HOST": self.host, "REDIS_PORT": str(self.port)}
+
+    def stop(self) -> None:
+        if self._proc:
+            self._proc.terminate()
+            self._proc.wait(timeout=10)
+        if self._server:
+            self._server.shutdown()
+
+
+def _pg_binary(name: str) -> Optional[str]:
+    found = shutil.which(name)
+    if found:
+        return found
+    candidates = sorted(glob.glob(f"/usr/lib/postgresql/*/bin/{name}"))
+    return candidates[-1] if candidates else None
+
+
+class PostgresStandIn:
+    def __init__(self, use_existing: bool = False) -> None:
+        self.use_existing = use_existing
+        self.kind = "external"
+        self.port = 0
+        self._dir: Optional[str] = None
+
+    def start(self) -> "PostgresStandIn":
+        if self.use_existing:
+            return self
+        initdb, pg_ctl = _pg_binary("initdb"), _pg_binary("pg_ctl")
+        if not (initdb and pg_ctl):
+            raise RuntimeError(
+                "Postgres stand-in needs initdb/pg_ctl, or --use-existing-postgres "
+                "with PGHOST/PGPORT/PGUSER/PGPASSWORD/PGDATABASE set"
+            )
+        self.kind = "temporary"
+        self._dir = tempfile.mkdtemp(prefix="genio-pg-")
+        self.port = free_port()
+        data = os.path.join(self._dir, "data")
+        subprocess.run(
+            [initdb, "-D", data, "-U", "genio", "--auth=trust", "-E", "UTF8"],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        options = (
+            f"-p {self.port} -k {self._dir} -c listen_addresses=127.0.0.1 "
+            "-c fsync=off -c synchronous_commit=off -c max_connections=200"
+        )
+        subprocess.run(
+            [pg_ctl, "-D", data, "-o", options, "-l", os.path.join(self._dir, "log"),
+             "-w", "start"],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        return self
+
+    def env(self) -> Dict[str, str]:
+        if self.use_existing:
+            return {
+                k: os.environ[k]
+                for k in ("PGHOST", "PGPORT", "PGUSER", "PGPASSWORD", "PGDATABASE")
+                if k in os.environ
+            }
+        return {
+            "PGHOST": "127.0.0.1",
+            "PGPORT": str(self.port),
+            "PGUSER": "genio",
+            "PGPASSWORD": "genio",
+            "PGDATABASE": "postgres",
+        }
+
+    def stop(self) -> None:
+        if self._dir is None:
+            return
+        subprocess.run(
+            [_pg_binary("pg_ctl"), "-D", os.path.join(self._dir, "data"), "-m", "fast",
+             "-w", "stop"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        shutil.rmtree(self._dir, ignore_errors=True)
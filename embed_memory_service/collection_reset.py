@@ -1,9 +1,11 @@
+import os
+
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import VectorParams, Distance
+from shared.qdrant_profiles import create_collection, profile_for
+
+COLLECTION_NAME = os.getenv("QDRANT_COLLECTION", "genio_embeddings")
 
 client = QdrantClient(url="http://localhost:6333")
-client.recreate_collection(
-    collection_name="genio_embeddings",
-    vectors_config=VectorParams(size=384, distance=Distance.COSINE)
-)
-print("Qdrant collection explicitly reset with dimension 384.")
+profile = profile_for(COLLECTION_NAME)
+create_collection(client, COLLECTION_NAME, 384, profile=profile, recreate=True)
+print(f"Qdrant collection explicitly reset with dimension 384 (profile={profile.name}).")
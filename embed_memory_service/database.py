@@ -2,9 +2,11 @@ import os
 import json
 import asyncio
 import asyncpg
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import PointStruct, VectorParams, Distance
+from qdrant_client.http.models import PointStruct
+from shared.qdrant_profiles import client_from_env, create_collection
+from shared.pg_partitions import EMBEDDINGS, ensure_partitions_async
 import logging
 import uuid
 
@@ -12,8 +14,6 @@ logger = logging.getLogger("genio.embed.database")
 
 
 DATABASE_URL = f"postgresql://{os.getenv('PGUSER')}:{os.getenv('PGPASSWORD')}@{os.getenv('PGHOST')}:{os.getenv('PGPORT')}/{os.getenv('PGDATABASE')}"
-QDRANT_HOST = os.getenv("QDRANT_HOST", "qdrant")
-QDRANT_PORT = int(os.getenv("QDRANT_PORT", 6333))
 COLLECTION_NAME = os.getenv("QDRANT_COLLECTION", "genio_embeddings")
 TARGET_EMBEDDING_DIM = 384
 
@@ -26,68 +26,79 @@ class Database:
     async def connect(self) -> None:
         self.pg_pool = await asyncpg.create_pool(DATABASE_URL)
         async with self.pg_pool.acquire() as conn:
-            await conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS embeddings (
-                    id SERIAL PRIMARY KEY,
-                    uuid TEXT NOT NULL,
-                    timestamp TIMESTAMPTZ NOT NULL,
-                    metadata JSONB
-                )
-                """
-            )
-        self.qdrant = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+            await ensure_partitions_async(conn, EMBEDDINGS)
+        self.qdrant = client_from_env()
         logger.info("Database connections established")
 
+    async def maintain_partitions(self) -> None:
+        """Create upcoming partitions and drop expired ones."""
+        assert self.pg_pool is not None
+        async with self.pg_pool.acquire() as conn:
+            await ensure_partitions_async(conn, EMBEDDINGS)
+
     async def ensure_collection(self, size: int) -> None:
         if self.collection_initialized:
             return
         assert self.qdrant is not None
         collections = [c.name for c in self.qdrant.get_collections().collections]
         if COLLECTION_NAME not in collections:
-            self.qdrant.recreate_collection(
-                collection_name=COLLECTION_NAME,
-                vectors_config=VectorParams(size=size, distance=Distance.COSINE),
-            )
+            create_collection(self.qdrant, COLLECTION_NAME, size)
         self.collection_initialized = True
 
 
     async def store_embedding(
         self, uuid_str: str, vector: List[float], metadata: Dict[str, Any], timestamp
     ) -> int:
+        ids = await self.store_embeddings([(uuid_str, vector, metadata, timestamp)])
+        return ids[0]
+
+    async def store_embeddings(
+        self, items: List[Tuple[str, List[float], Dict[str, Any], Any]]
+    ) -> List[int]:
+        """Store ``(uuid, vector, metadata, timestamp)`` items with one INSERT
+        and one Qdrant upsert; returns the metadata ids in input order."""
         assert self.pg_pool is not None
         assert self.qdrant is not None
 
-        # Explicit padding to fixed dimension
-        if len(vector) < TARGET_EMBEDDING_DIM:
-            vector += [0.0] * (TARGET_EMBEDDING_DIM - len(vector))
-        elif len(vector) > TARGET_EMBEDDING_DIM:
-            vector = vector[:TARGET_EMBEDDING_DIM]
-
         await self.ensure_collection(TARGET_EMBEDDING_DIM)
 
         async with self.pg_pool.acquire() as conn:
-            row = await conn.fetchrow(
-                "INSERT INTO embeddings(uuid, timestamp, metadata) VALUES($1,$2,$3) RETURNING id",
-                uuid_str,
-                timestamp,
-                json.dumps(metadata),
+            # RETURNING order is unspecified, so match rows back by uuid. Ids
+            # come from a sequence in insertion order, so a uuid repeated in
+            # the batch takes its ids in ascending order.
+            rows = await conn.fetch(
+                "INSERT INTO embeddings(uuid, timestamp, metadata) "
+                "SELECT u, t, m FROM unnest("
+                "$1::text[], $2::timestamptz[], $3::jsonb[]"
+                ") WITH ORDINALITY AS input(u, t, m, n) ORDER BY n "
+                "RETURNING id, uuid",
+                [item[0] for item in items],
+                [item[3] for item in items],
+                [json.dumps(item[2]) for item in items],
             )
-        metadata_id = row["id"]
+        ids_by_uuid: Dict[str, List[int]] = {}
+        for row in sorted(rows, key=lambda row: row["id"], reverse=True):
+            ids_by_uuid.setdefault(row["uuid"], []).append(row["id"])
+        metadata_ids = [ids_by_uuid[item[0]].pop() for item in items]
 
-        # Validate UUID explicitly
-        try:
-            valid_uuid = str(uuid.UUID(uuid_str))
-        except ValueError:
-            valid_uuid = str(uuid.uuid4())
+        points = []
+        for (uuid_str, vector, metadata, _), metadata_id in zip(items, metadata_ids):
+            # Explicit padding to fixed dimension
+            if len(vector) < TARGET_EMBEDDING_DIM:
+                vector = vector + [0.0] * (TARGET_EMBEDDING_DIM - len(vector))
+            elif len(vector) > TARGET_EMBEDDING_DIM:
+                vector = vector[:TARGET_EMBEDDING_DIM]
 
-        payload = {"metadata_id": metadata_id, **metadata}
+            # Validate UUID explicitly
+            try:
+                valid_uuid = str(uuid.UUID(uuid_str))
+            except ValueError:
+                valid_uuid = str(uuid.uuid4())
 
-        def upsert():
-            self.qdrant.upsert(
-                collection_name=COLLECTION_NAME,
-                points=[PointStruct(id=valid_uuid, vector=vector, payload=payload)],
-            )
+            payload = {"metadata_id": metadata_id, **metadata}
+            points.append(PointStruct(id=valid_uuid, vector=vector, payload=payload))
 
-        await asyncio.to_thread(upsert)
-        return metadata_id
+        await asyncio.to_thread(
+            self.qdrant.upsert, collection_name=COLLECTION_NAME, points=points
+        )
+        return metadata_ids
@@ -3,7 +3,11 @@ from datetime import datetime
 from loguru import logger
 from database import Database
 from schemas import EmbedRequest
-import redis.asyncio as redis
+from shared import profiling
+from shared import tracing
+from shared.metrics import StageMetrics
+from shared.worker_pool import WorkerPool
+from shared.redis_utils import alisten, apublish, close_async_redis, get_async_redis
 from prometheus_fastapi_instrumentator import Instrumentator
 from prometheus_client import Histogram, Counter
 import asyncio
@@ -15,23 +19,21 @@ app = FastAPI(title="Genio Embed Memory Service")
 
 # Instrument middleware immediately after FastAPI app creation
 Instrumentator().instrument(app).expose(app)
+profiling.mount(app)
 
 db = Database()
 
 # Redis configuration
-REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
-REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 VISUALIZE_CHANNEL = os.getenv("VISUALIZE_CHANNEL", "visualize_channel")
 EMBED_CHANNEL = os.getenv("EMBED_CHANNEL", "embed_channel")
+PARTITION_MAINTENANCE_SECONDS = int(os.getenv("PARTITION_MAINTENANCE_SECONDS", "3600"))
 
-redis_pool = redis.ConnectionPool.from_url(
-    f"redis://{REDIS_HOST}:{REDIS_PORT}/0", decode_responses=True
-)
-redis_client = redis.Redis(connection_pool=redis_pool)
+redis_client = get_async_redis()
 
 # Prometheus metrics
 embed_latency = Histogram("embed_latency_seconds", "Time spent embedding and storing")
 embed_errors = Counter("embed_errors_total", "Total errors in Embed Memory service")
+stage_metrics = StageMetrics("embed")
 
 shutdown_event = asyncio.Event()
 
@@ -39,13 +41,17 @@ shutdown_event = asyncio.Event()
 @app.on_event("startup")
 async def startup():
     await db.connect()
+    workers.start()
     asyncio.create_task(redis_listener())
+    asyncio.create_task(partition_maintenance())
+    stage_metrics.start_loop_monitor()
 
 
 @app.on_event("shutdown")
 async def shutdown():
     shutdown_event.set()
-    await redis_client.close()
+    await workers.drain()
+    await close_async_redis()
 
 
 @app.get("/health")
@@ -79,19 +85,33 @@ async def healthcheck():
     return {"status": "embed_memory_service active"}
 
 
-async def redis_listener():
-    pubsub = redis_client.pubsub()
-    await pubsub.subscribe(VISUALIZE_CHANNEL)
-    logger.info(f"[EMBED] Subscribed to '{VISUALIZE_CHANNEL}'")
-
+async def partition_maintenance():
     while not shutdown_event.is_set():
-        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1)
+        try:
+            await asyncio.wait_for(
+                shutdown_event.wait(), timeout=PARTITION_MAINTENANCE_SECONDS
+            )
+        except asyncio.TimeoutError:
+            pass
+        if shutdown_event.is_set():
+            break
+        try:
+            await db.maintain_partitions()
+        except Exception as e:
+            logger.error("[EMBED] Partition maintenance failed", error=str(e))
+
+
+async def redis_listener():
+    logger.info(f"[EMBED] Subscribing to '{VISUALIZE_CHANNEL}'")
+    async for message in alisten(VISUALIZE_CHANNEL, shutdown_event):
         if message:
+            stage_metrics.messages_in.inc()
             try:
                 data = json.loads(message["data"])
-                asyncio.create_task(handle_embedding(data))
+                await workers.submit(data)
             except Exception as e:
                 embed_errors.inc()
+                stage_metrics.dropped("invalid")
                 logger.error("[EMBED] Error processing message", error=str(e))
 
 
@@ -100,9 +120,11 @@ async def handle_embedding(data):
     anchored_embedding = data.get("anchored_embedding")
     metadata = data.get("metadata", {})
     timestamp = datetime.utcnow()
+    trace = tracing.received(data, "embed")
 
     if not anchored_embedding:
         embed_errors.inc()
+        stage_metrics.dropped("invalid")
         logger.error("[EMBED] Missing anchored_embedding", uuid=uuid)
         return
 
@@ -111,14 +133,18 @@ async def handle_embedding(data):
             metadata_id = await db.store_embedding(
                 uuid, anchored_embedding, metadata, timestamp
             )
-        await redis_client.publish(
-            EMBED_CHANNEL, json.dumps({"uuid": uuid, "metadata_id": metadata_id})
-        )
+        tracing.finish(trace)
+        await apublish(EMBED_CHANNEL, {"uuid": uuid, "metadata_id": metadata_id})
+        stage_metrics.messages_out.inc()
         logger.info("[EMBED] Stored and published", uuid=uuid, metadata_id=metadata_id)
     except Exception as e:
         embed_errors.inc()
+        stage_metrics.dropped("error")
         logger.error("[EMBED] Error storing embedding", uuid=uuid, error=str(e))
 
 
+workers = WorkerPool(handle_embedding, stage_metrics)
+
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000)
@@ -0,0 +1,251 @@
+"""Drop repeated texts before they reach the encoder.
+
+Every text gets two signatures:
+
+* An exact key, the SHA-1 of its lower-cased words.
+* A MinHash of its words and word pairs. Two MinHashes agree in about the
+  same fraction of positions as the texts share words and word pairs
+  (their Jaccard similarity). A one-word edit to a 20-word note scores
+  about 0.85, and unrelated notes score under 0.2.
+
+Both are kept in Redis for ``DEDUP_WINDOW_SECONDS``:
+
+* ``dedup:exact:<sha1>`` -> uuid of the first memory with that text.
+* ``dedup:band:<i>:<hash>`` -> sorted set of uuids scored by the time they
+  were added. The MinHash is cut into ``BANDS`` bands of ``ROWS`` values, and
+  texts that agree on a whole band land in the same set. At similarity 0.7
+  two texts share a band 99% of the time, and below 0.3 they rarely do, so
+  the sets stay small. Members older than the window are ignored on lookup
+  and trimmed on write, so a busy band does not keep stale uuids alive.
+* ``dedup:sig:<uuid>`` -> the MinHash, to confirm candidates from the bands
+  against ``DEDUP_MIN_SIMILARITY``.
+
+:meth:`Deduplicator.check` only reads: two pipelined round trips for the
+lookups and the candidate signatures. :meth:`Deduplicator.record` writes the
+new texts in a third, once the caller has actually published them, so a
+batch that fails to encode is not matched against later. Texts shorter than
+``DEDUP_MIN_TOKENS`` words are only matched exactly, since a few words say
+little about similarity. MinHashes are pure Python, so ``check`` computes
+them in a worker thread rather than on the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "1").lower() in ("1", "true")
+DEDUP_WINDOW_SECONDS = int(os.getenv("DEDUP_WINDOW_SECONDS", "86400"))
+DEDUP_MIN_SIMILARITY = float(os.getenv("DEDUP_MIN_SIMILARITY", "0.7"))
+DEDUP_MIN_TOKENS = int(os.getenv("DEDUP_MIN_TOKENS", "8"))
+DEDUP_PREFIX = "dedup"
+
+BANDS = 16
+ROWS = 4
+PERMUTATIONS = BANDS * ROWS
+_PRIME = (1 << 61) - 1
+# Fixed seed: signatures must match across processes and restarts.
+_rng = random.Random(20240507)
+_A = [_rng.randrange(1, _PRIME) for _ in range(PERMUTATIONS)]
+_B = [_rng.randrange(0, _PRIME) for _ in range(PERMUTATIONS)]
+
+_WORD = re.compile(r"\w+")
+
+
+def tokens(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def exact_key(words: Sequence[str]) -> str:
+    return hashlib.sha1(" ".join(words).encode()).hexdigest()
+
+
+def _hash(value: str) -> int:
+    digest = hashlib.blake2b(value.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def minhash(words: Sequence[str]) -> List[int]:
+    """MinHash of the words and adjacent word pairs in ``words``."""
+    shingles = set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+    hashes = [_hash(shingle) for shingle in shingles] or [0]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in zip(_A, _B)]
+
+
+def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of two MinHashes."""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def bands(signature: Sequence[int]) -> List[str]:
+    keys = []
+    for i in range(BANDS):
+        rows = signature[i * ROWS : (i + 1) * ROWS]
+        keys.append(f"{i}:{_hash(','.join(map(str, rows))):016x}")
+    return keys
+
+
+def encode_signature(signature: Sequence[int]) -> str:
+    return "".join(f"{value:016x}" for value in signature)
+
+
+def decode_signature(value: str) -> List[int]:
+    return [int(value[i : i + 16], 16) for i in range(0, len(value), 16)]
+
+
+@dataclass
+class Duplicate:
+    original: str
+    similarity: float  # 1.0 for an exact match
+    exact: bool
+
+
+@dataclass
+class _Text:
+    uuid: str
+    exact: str
+    signature: Optional[List[int]]
+
+    @property
+    def bands(self) -> List[str]:
+        return bands(self.signature) if self.signature is not None else []
+
+
+@dataclass
+class Checked:
+    """Result of :meth:`Deduplicator.check`, to be passed to ``record``."""
+
+    texts: List[_Text]
+    matches: List[Optional[Duplicate]]
+
+
+class Deduplicator:
+    def __init__(
+        self,
+        client,
+        window: int = DEDUP_WINDOW_SECONDS,
+        min_similarity: float = DEDUP_MIN_SIMILARITY,
+        min_tokens: int = DEDUP_MIN_TOKENS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.client = client
+        self.window = window
+        self.min_similarity = min_similarity
+        self.min_tokens = min_tokens
+        self.clock = clock
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((DEDUP_PREFIX, *parts))
+
+    def _text(self, uuid: str, text: str) -> _Text:
+        words = tokens(text)
+        signature = minhash(words) if len(words) >= self.min_tokens else None
+        return _Text(uuid, exact_key(words), signature)
+
+    def _texts(self, items: Sequence[Tuple[str, str]]) -> List[_Text]:
+        return [self._text(uuid, text) for uuid, text in items]
+
+    async def check(self, items: Sequence[Tuple[str, str]]) -> Checked:
+        """For each ``(uuid, text)``, the earlier memory it duplicates, if any.
+
+        Duplicates within ``items`` collapse into the first occurrence.
+        Nothing is written; pass the result to :meth:`record` once the new
+        texts have been published.
+        """
+        texts = await asyncio.to_thread(self._texts, items)
+        since = self.clock() - self.window
+
+        pipe = self.client.pipeline(transaction=False)
+        for text in texts:
+            pipe.get(self._key("exact", text.exact))
+            for band in text.bands:
+                pipe.zrangebyscore(self._key("band", band), since, "+inf")
+        replies = iter(await pipe.execute())
+
+        stored_exact: List[Optional[str]] = []
+        candidates: List[Set[str]] = []
+        for text in texts:
+            stored_exact.append(next(replies))
+            found: Set[str] = set()
+            for _ in text.bands:
+                found.update(next(replies) or ())
+            candidates.append(found)
+
+        wanted = sorted(set().union(*candidates))
+        signatures: Dict[str, List[int]] = {}
+        if wanted:
+            pipe = self.client.pipeline(transaction=False)
+            for uuid in wanted:
+                pipe.get(self._key("sig", uuid))
+            for uuid, value in zip(wanted, await pipe.execute()):
+                if value:
+                    signatures[uuid] = decode_signature(value)
+
+        seen_exact: Dict[str, str] = {}
+        seen_bands: Dict[str, Set[str]] = {}
+        matches: List[Optional[Duplicate]] = []
+        for text, exact, found in zip(texts, stored_exact, candidates):
+            original = exact or seen_exact.get(text.exact)
+            if original:
+                match = Duplicate(original, 1.0, exact=True)
+            elif text.signature is not None:
+                for band in text.bands:
+                    found |= seen_bands.get(band, set())
+                match = self._nearest(text.signature, found, signatures)
+            else:
+                match = None
+            matches.append(match)
+
+            if match is None:
+                seen_exact[text.exact] = text.uuid
+                if text.signature is not None:
+                    signatures[text.uuid] = text.signature
+                    for band in text.bands:
+                        seen_bands.setdefault(band, set()).add(text.uuid)
+        return Checked(texts, matches)
+
+    async def record(self, checked: Checked) -> None:
+        """Remember the texts ``check`` found new, for later batches."""
+        now = self.clock()
+        pipe = self.client.pipeline(transaction=False)
+        for text, match in zip(checked.texts, checked.matches):
+            if match is not None:
+                continue
+            pipe.set(self._key("exact", text.exact), text.uuid, ex=self.window)
+            if text.signature is None:
+                continue
+            pipe.set(
+                self._key("sig", text.uuid),
+                encode_signature(text.signature),
+                ex=self.window,
+            )
+            for band in text.bands:
+                key = self._key("band", band)
+                pipe.zadd(key, {text.uuid: now})
+                pipe.zremrangebyscore(key, "-inf", now - self.window)
+                # Only reached once every member has aged out.
+                pipe.expire(key, self.window)
+        await pipe.execute()
+
+    def _nearest(
+        self,
+        signature: List[int],
+        candidates: Set[str],
+        signatures: Dict[str, List[int]],
+    ) -> Optional[Duplicate]:
+        best = None
+        for uuid in sorted(candidates):
+            if uuid not in signatures:
+                continue  # expired since it was added to the band
+            score = similarity(signature, signatures[uuid])
+            if score >= self.min_similarity and (
+                best is None or score > best.similarity
+            ):
+                best = Duplicate(uuid, score, exact=False)
+        return best
@@ -1,60 +1,90 @@
 import os
-import re
 import json
 import asyncio
 from datetime import datetime
 from typing import List, Any, Dict
+from uuid import uuid4
 
 import httpx
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form
 from psycopg2.pool import SimpleConnectionPool
 from pydantic import BaseModel
-from sentence_transformers import SentenceTransformer
 from prometheus_fastapi_instrumentator import Instrumentator
-from prometheus_client import Histogram
+from prometheus_client import Counter, Histogram
 from loguru import logger
-import redis.asyncio as redis
 
+from shared import profiling
 from shared.config import (
-    REDIS_HOST,
-    REDIS_PORT,
     PGHOST,
     PGPORT,
     PGUSER,
     PGPASSWORD,
     PGDATABASE,
 )
-
+from shared.pg_partitions import (
+    EXPRESS_DUPLICATES,
+    EXPRESS_FILES,
+    ensure_partitions,
+)
+from shared.fake_model import load_encoder
+from shared import model_lifecycle
+from shared.model_lifecycle import ModelHandle, ModelNotReady
+from shared import tracing
+from shared.metrics import StageMetrics
+from shared.redis_utils import alisten, apublish_many, get_async_redis
+
+from .dedup import DEDUP_ENABLED, Deduplicator
 from .models import FileRecord
-from .utils import ALLOWED_EXTENSIONS, determine_source, extract_content
+from .utils import (
+    ALLOWED_EXTENSIONS,
+    determine_source,
+    extract_content,
+    preprocess_text,
+)
 
 # FastAPI app initialization
 app = FastAPI(title="Genio EXPRESS Semantic Encoding Service")
 
 # Middleware instrumentation immediately after app creation
 Instrumentator().instrument(app).expose(app)
+profiling.mount(app)
 
 # Redis connection setup
-redis_pool = redis.ConnectionPool.from_url(
-    f"redis://{REDIS_HOST}:{REDIS_PORT}/0", decode_responses=True
-)
-redis_client = redis.Redis(connection_pool=redis_pool)
+redis_client = get_async_redis()
+deduplicator = Deduplicator(redis_client)
 
 # Prometheus metrics
 embedding_latency = Histogram(
     "embedding_generation_seconds", "Time spent generating embeddings"
 )
 
+duplicates_total = Counter(
+    "express_duplicates_total",
+    "Texts collapsed into an earlier memory instead of being encoded",
+    ["kind"],
+)
+
+stage_metrics = StageMetrics("express")
+
 # Environment configurations
 MODEL_NAME = os.getenv("MODEL_NAME", "all-MiniLM-L6-v2")
 NOW_CHANNEL = os.getenv("NOW_CHANNEL", "now_channel")
 EXPRESS_CHANNEL = os.getenv("EXPRESS_CHANNEL", "express_channel")
+DUPLICATE_CHANNEL = os.getenv("DUPLICATE_CHANNEL", "duplicate_channel")
 BATCH_SIZE = int(os.getenv("BATCH_SIZE", "32"))
+WARMUP_BATCH_SIZE = int(os.getenv("WARMUP_BATCH_SIZE", str(BATCH_SIZE)))
+PARTITION_MAINTENANCE_SECONDS = int(os.getenv("PARTITION_MAINTENANCE_SECONDS", "3600"))
 
 # PostgreSQL connection pool placeholder
 DB_POOL: SimpleConnectionPool | None = None
 
-model = SentenceTransformer(MODEL_NAME)
+# Loaded in the background at startup; /ready reports when it is warm.
+model = ModelHandle(
+    MODEL_NAME,
+    lambda: load_encoder(MODEL_NAME),
+    warmup=lambda encoder: encoder.encode(["warm up"] * WARMUP_BATCH_SIZE),
+)
+model_lifecycle.mount(app, model)
 
 
 # Database helpers ----------------------------------------------------------
@@ -81,23 +111,35 @@ def init_db() -> None:
     conn = pool.getconn()
     try:
         with conn.cursor() as cur:
-            cur.execute(
-                """
-                CREATE TABLE IF NOT EXISTS express_files (
-                    id SERIAL PRIMARY KEY,
-                    filename TEXT,
-                    source TEXT,
-                    content TEXT,
-                    timestamp TIMESTAMPTZ,
-                    meta JSONB
-                )
-                """
-            )
+            # Trigram operator classes back substring/fuzzy literal search.
+            cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
             conn.commit()
+        ensure_partitions(conn, EXPRESS_FILES)
+        ensure_partitions(conn, EXPRESS_DUPLICATES)
     finally:
         pool.putconn(conn)
 
 
+def maintain_partitions() -> None:
+    """Create upcoming partitions and drop expired ones."""
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        ensure_partitions(conn, EXPRESS_FILES)
+        ensure_partitions(conn, EXPRESS_DUPLICATES)
+    finally:
+        pool.putconn(conn)
+
+
+async def partition_maintenance():
+    while True:
+        await asyncio.sleep(PARTITION_MAINTENANCE_SECONDS)
+        try:
+            await asyncio.to_thread(maintain_partitions)
+        except Exception as e:
+            logger.error("[EXPRESS] Partition maintenance failed", error=str(e))
+
+
 # Request and Response Schemas
 class EncodeRequest(BaseModel):
     uuid: str
@@ -111,39 +153,35 @@ class EncodeResponse(BaseModel):
     model: str
 
 
-# Text preprocessing utility
-def preprocess_text(text: str) -> str:
-    text = re.sub(r"[^\w\s]", "", text)
-    return " ".join(text.split())
-
-
 # Batch embedding function
 async def encode_batch(texts: List[str]) -> List[List[float]]:
+    encoder = await model.wait()
     loop = asyncio.get_event_loop()
-    embeddings = await loop.run_in_executor(None, model.encode, texts)
+    embeddings = await loop.run_in_executor(None, encoder.encode, texts)
     return [emb.tolist() for emb in embeddings]
 
 
 # Redis listener for batching embeddings
 async def handle_now_channel():
-    pubsub = redis_client.pubsub()
-    await pubsub.subscribe(NOW_CHANNEL)
     buffer = []
     buffer_timer = datetime.utcnow()
     flush_interval = 1  # seconds
-    logger.info(f"[EXPRESS] Subscribed to Redis channel '{NOW_CHANNEL}'")
+    logger.info(f"[EXPRESS] Subscribing to Redis channel '{NOW_CHANNEL}'")
 
-    while True:
-        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.5)
+    async for message in alisten(NOW_CHANNEL, timeout=0.5):
         now = datetime.utcnow()
 
         if message:
+            stage_metrics.messages_in.inc()
             try:
                 data = json.loads(message["data"])
                 uuid = data.get("uuid", datetime.utcnow().isoformat())
                 content = data["content"]
-                buffer.append((uuid, content))
+                trace = tracing.received(data, "express")
+                buffer.append((uuid, content, trace))
+                stage_metrics.queue_depth.set(len(buffer))
             except Exception as e:
+                stage_metrics.dropped("invalid")
                 logger.error(f"[EXPRESS] Message handling error: {e}")
 
         # Check if buffer should be flushed by size or time
@@ -151,35 +189,151 @@ async def handle_now_channel():
             len(buffer) >= BATCH_SIZE
             or (now - buffer_timer).total_seconds() >= flush_interval
         ):
-            await process_batch(buffer)
+            await flush(buffer)
             buffer.clear()
+            stage_metrics.queue_depth.set(0)
             buffer_timer = now
 
 
+async def flush(buffer):
+    """Encode and publish the new texts in ``buffer``; report the repeats.
+
+    Texts are only remembered for duplicate matching once their batch has
+    been published, so a failed batch does not swallow later copies.
+    """
+    batch, duplicates, checked = await drop_duplicates(buffer)
+    try:
+        if batch:
+            await process_batch(batch)
+    except Exception as e:
+        stage_metrics.dropped("error", len(batch))
+        logger.error(f"[EXPRESS] Failed to encode batch: {e}")
+        lost = {item[0] for item in batch}
+        duplicates = [(item, m) for item, m in duplicates if m.original not in lost]
+        checked = None
+    if checked is not None:
+        try:
+            await deduplicator.record(checked)
+        except Exception as e:
+            logger.warning(f"[EXPRESS] Failed to record texts for dedup: {e}")
+    if duplicates:
+        await report_duplicates(duplicates)
+
+
+async def drop_duplicates(batch):
+    """Split ``batch`` into new texts and repeats of a recent memory.
+
+    Returns the new items, ``(item, Duplicate)`` pairs for the repeats and
+    the check to :meth:`Deduplicator.record` once the new items are out.
+    """
+    if not DEDUP_ENABLED:
+        return batch, [], None
+    try:
+        checked = await deduplicator.check(
+            [(uuid, content) for uuid, content, _ in batch]
+        )
+    except Exception as e:
+        # Encoding a duplicate is cheaper than losing a memory.
+        logger.warning(f"[EXPRESS] Duplicate check failed, encoding all: {e}")
+        return batch, [], None
+
+    fresh, duplicates = [], []
+    for item, match in zip(batch, checked.matches):
+        if match is None:
+            fresh.append(item)
+            continue
+        duplicates.append((item, match))
+        duplicates_total.labels("exact" if match.exact else "near").inc()
+        logger.info(
+            "[EXPRESS] Collapsed duplicate",
+            uuid=item[0],
+            duplicate_of=match.original,
+            similarity=round(match.similarity, 2),
+        )
+    if duplicates:
+        stage_metrics.dropped("duplicate", len(duplicates))
+    return fresh, duplicates, checked
+
+
+def store_duplicates(rows) -> None:
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        with conn.cursor() as cur:
+            cur.executemany(
+                "INSERT INTO express_duplicates "
+                "(uuid, original, similarity, exact, timestamp) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                rows,
+            )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn)
+
+
+async def report_duplicates(duplicates):
+    """Keep each collapse in Postgres and announce it on DUPLICATE_CHANNEL."""
+    timestamp = datetime.utcnow()
+    rows = [
+        (item[0], match.original, match.similarity, match.exact, timestamp)
+        for item, match in duplicates
+    ]
+    try:
+        await asyncio.to_thread(store_duplicates, rows)
+    except Exception as e:
+        logger.error(f"[EXPRESS] Failed to store duplicates: {e}")
+
+    messages = []
+    for (uuid, _, trace), match in duplicates:
+        payload = {
+            "uuid": uuid,
+            "duplicate_of": match.original,
+            "similarity": match.similarity,
+            "exact": match.exact,
+            "timestamp": timestamp.isoformat(),
+        }
+        messages.append((DUPLICATE_CHANNEL, tracing.forward(trace, payload)))
+    try:
+        await apublish_many(messages)
+    except Exception as e:
+        logger.error(f"[EXPRESS] Failed to publish duplicates: {e}")
+
+
 async def process_batch(batch):
-    uuids, contents = zip(*batch)
+    uuids, contents, traces = zip(*batch)
     cleaned_texts = [preprocess_text(text) for text in contents]
 
     with embedding_latency.time():
         embeddings = await encode_batch(cleaned_texts)
 
     timestamp = datetime.utcnow().isoformat()
-    for uuid, embedding, content in zip(uuids, embeddings, contents):
+    messages = []
+    for uuid, embedding, content, trace in zip(uuids, embeddings, contents, traces):
         payload = {
             "uuid": uuid,
             "embedding": embedding,
             "timestamp": timestamp,
             "content": content,
         }
-        await redis_client.publish(EXPRESS_CHANNEL, json.dumps(payload))
-        logger.info("[EXPRESS] Published embedding", uuid=uuid)
+        messages.append((EXPRESS_CHANNEL, tracing.forward(trace, payload)))
+    # The whole batch goes out in one round trip.
+    await apublish_many(messages)
+    stage_metrics.batch_size.observe(len(messages))
+    stage_metrics.messages_out.inc(len(messages))
+    logger.info("[EXPRESS] Published embeddings", uuids=list(uuids))
 
 
 # Startup event: only tasks needing asynchronous context here
 @app.on_event("startup")
 async def startup_event():
+    model.start()
     asyncio.create_task(handle_now_channel())
+    stage_metrics.start_loop_monitor()
     init_db()
+    asyncio.create_task(partition_maintenance())
 
 
 # HTTP API endpoint for single embedding generation
@@ -189,10 +343,15 @@ async def encode(req: EncodeRequest):
         logger.warning("[EXPRESS] Empty text received", uuid=req.uuid)
         raise HTTPException(status_code=400, detail="Input text is empty")
 
+    try:
+        encoder = model.get_nowait()
+    except ModelNotReady as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
     cleaned = preprocess_text(req.text)
     with embedding_latency.time():
         loop = asyncio.get_event_loop()
-        embedding = await loop.run_in_executor(None, model.encode, cleaned)
+        embedding = await loop.run_in_executor(None, encoder.encode, cleaned)
 
     logger.info("[EXPRESS] Encoded via API", uuid=req.uuid)
 
@@ -204,6 +363,38 @@ async def encode(req: EncodeRequest):
     )
 
 
+def find_duplicate(uuid: str):
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT original, similarity, exact, timestamp "
+                "FROM express_duplicates WHERE uuid = %s "
+                "ORDER BY timestamp DESC LIMIT 1",
+                (uuid,),
+            )
+            return cur.fetchone()
+    finally:
+        pool.putconn(conn)
+
+
+@app.get("/duplicates/{uuid}")
+async def duplicate_of(uuid: str):
+    """The memory a collapsed duplicate points to."""
+    row = await asyncio.to_thread(find_duplicate, uuid)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Not a known duplicate")
+    original, similarity, exact, timestamp = row
+    return {
+        "uuid": uuid,
+        "duplicate_of": original,
+        "similarity": similarity,
+        "exact": exact,
+        "timestamp": timestamp.isoformat(),
+    }
+
+
 # ---------------------------------------------------------------------------
 # File upload endpoint
 # ---------------------------------------------------------------------------
@@ -233,7 +424,20 @@ async def upload(
     source = determine_source(ext)
     timestamp = datetime.utcnow()
 
+    # Uploads go through the same duplicate check as the NOW channel.
+    upload_id = str(uuid4())
+    _, duplicates, checked = await drop_duplicates([(upload_id, content, None)])
+    if duplicates:
+        await report_duplicates(duplicates)
+        return {
+            "filename": file.filename,
+            "source": source,
+            "timestamp": timestamp.isoformat(),
+            "duplicate_of": duplicates[0][1].original,
+        }
+
     meta = {
+        "well_id": well_id,
         "field": field,
         "district": district,
         "operator": operator,
@@ -285,6 +489,11 @@ async def upload(
     except Exception as e:  # noqa: BLE001
         logger.error(f"Forwarding to interpret-service failed: {e}")
         raise HTTPException(status_code=502, detail="Interpret service error")
+    if checked is not None:
+        try:
+            await deduplicator.record(checked)
+        except Exception as e:
+            logger.warning(f"[EXPRESS] Failed to record upload for dedup: {e}")
 
     return {
         "filename": record.filename,
@@ -297,7 +506,6 @@ async def upload(
 @app.get("/health")
 async def detailed_healthcheck():
     redis_status = "ok"
-    model_status = "ok"
     db_status = "ok"
 
     try:
@@ -305,11 +513,6 @@ async def detailed_healthcheck():
     except Exception as e:
         redis_status = f"error: {str(e)}"
 
-    try:
-        _ = model.encode("test")
-    except Exception as e:
-        model_status = f"error: {str(e)}"
-
     try:
         pool = get_pool()
         conn = pool.getconn()
@@ -321,7 +524,7 @@ async def detailed_healthcheck():
     return {
         "status": "active",
         "redis": redis_status,
-        "model": model_status,
+        "model": model_lifecycle.health_status(model),
         "database": db_status,
         "timestamp": datetime.utcnow().isoformat(),
     }
@@ -0,0 +1,166 @@
+import asyncio
+import os
+import sys
+import threading
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+from express_emitter.dedup import (
+    BANDS,
+    Deduplicator,
+    bands,
+    decode_signature,
+    encode_signature,
+    exact_key,
+    minhash,
+    similarity,
+    tokens,
+)
+
+NOTE = (
+    "Pumper found the separator dump valve sticking again this morning and "
+    "cycled it twice before the level came back down to normal"
+)
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis") -> None:
+        self.redis = redis
+        self.queued = []
+
+    def __getattr__(self, command):
+        return lambda *args, **kwargs: self.queued.append((command, args))
+
+    async def execute(self):
+        return [getattr(self.redis, f"_{c}")(*args) for c, args in self.queued]
+
+
+class FakeRedis:
+    """The few commands the deduplicator uses, kept in dicts."""
+
+    def __init__(self) -> None:
+        self.strings = {}
+        self.zsets = {}
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    def _get(self, key):
+        return self.strings.get(key)
+
+    def _set(self, key, value):
+        self.strings[key] = value
+
+    def _zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    def _zrangebyscore(self, key, low, high):
+        low, high = float(low), float(high)
+        members = self.zsets.get(key, {})
+        return [m for m, score in members.items() if low <= score <= high]
+
+    def _zremrangebyscore(self, key, low, high):
+        for member in self._zrangebyscore(key, low, high):
+            del self.zsets[key][member]
+
+    def _expire(self, key, seconds):
+        return True
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def check_and_record(dedup, items):
+    checked = await dedup.check(items)
+    await dedup.record(checked)
+    return checked.matches
+
+
+def run(dedup, items):
+    return asyncio.run(check_and_record(dedup, items))
+
+
+def test_signatures() -> None:
+    words = tokens(NOTE)
+    assert exact_key(words) == exact_key(tokens(NOTE.upper() + "!"))
+    signature = minhash(words)
+    edited = minhash(tokens(NOTE.replace("twice", "three times")))
+    unrelated = minhash(tokens("Replaced the chart recorder battery at the meter"))
+    assert similarity(signature, edited) > 0.7
+    assert similarity(signature, unrelated) < 0.3
+    assert len(bands(signature)) == BANDS
+    assert decode_signature(encode_signature(signature)) == signature
+
+
+def test_exact_and_near_duplicates_collapse() -> None:
+    dedup = Deduplicator(FakeRedis())
+    first = run(dedup, [("a", NOTE), ("b", NOTE + ".")])
+    assert first[0] is None
+    assert first[1].original == "a" and first[1].exact
+
+    later = run(dedup, [("c", NOTE.replace("twice", "two times")), ("d", "ok")])
+    assert later[0].original == "a" and not later[0].exact
+    assert later[1] is None
+
+
+def test_near_duplicates_within_a_batch() -> None:
+    dedup = Deduplicator(FakeRedis())
+    edited = NOTE.replace("morning", "afternoon")
+    matches = run(dedup, [("a", NOTE), ("b", edited)])
+    assert matches[0] is None
+    assert matches[1].original == "a"
+
+
+def test_similarity_threshold() -> None:
+    dedup = Deduplicator(FakeRedis(), min_similarity=1.0)
+    run(dedup, [("a", NOTE)])
+    edited = NOTE.replace("morning", "afternoon")
+    assert run(dedup, [("b", edited)]) == [None]
+
+
+def test_texts_are_only_remembered_once_recorded() -> None:
+    redis = FakeRedis()
+    dedup = Deduplicator(redis)
+    checked = asyncio.run(dedup.check([("a", NOTE)]))
+    assert redis.strings == {} and redis.zsets == {}
+    # The batch failed to publish, so a retry of the same text is still new.
+    assert run(dedup, [("b", NOTE)]) == [None]
+    assert run(dedup, [("c", NOTE)])[0].original == "b"
+    assert checked.matches == [None]
+
+
+def test_band_members_expire_one_by_one() -> None:
+    clock = Clock()
+    redis = FakeRedis()
+    # Only identical signatures match, so edits are recorded as new texts
+    # that land in most of the original's bands.
+    dedup = Deduplicator(redis, window=100, min_similarity=1.0, clock=clock)
+    run(dedup, [("a", NOTE)])
+    clock.now += 60
+    run(dedup, [("b", NOTE.replace("morning", "afternoon"))])
+    clock.now += 60
+    redis.strings.pop(f"dedup:exact:{exact_key(tokens(NOTE))}")  # expired
+    # "a" left the window although "b" kept writing to its bands.
+    assert run(dedup, [("c", NOTE)]) == [None]
+    members = set().union(*(set(z) for z in redis.zsets.values()))
+    assert "a" not in members and {"b", "c"} <= members
+
+
+def test_signatures_are_computed_off_the_event_loop(monkeypatch) -> None:
+    from express_emitter import dedup as module
+
+    threads = []
+
+    def spy(words):
+        threads.append(threading.current_thread())
+        return minhash(words)
+
+    monkeypatch.setattr(module, "minhash", spy)
+    run(Deduplicator(FakeRedis()), [("a", NOTE)])
+    assert threads and threading.main_thread() not in threads
@@ -1,10 +1,17 @@
 from __future__ import annotations
 
+import re
 from typing import Any
 
 ALLOWED_EXTENSIONS = {".txt", ".csv", ".pdf"}
 
 
+def preprocess_text(text: str) -> str:
+    """Strip punctuation and collapse whitespace before encoding."""
+    text = re.sub(r"[^\w\s]", "", text)
+    return " ".join(text.split())
+
+
 def determine_source(extension: str) -> str:
     """Map file extension to source type."""
     ext = extension.lower()
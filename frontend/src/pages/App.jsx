@@ -5,30 +5,61 @@ import LiveFeedDock from '../components/LiveFeedDock';
 import SearchFilterPanel from '../components/SearchFilterPanel';
 import { filterMemories } from '../utils/filterMemories';
 
+const REPLAY_URL = 'http://localhost:8007/memory/replay';
+const MAX_TIMELINE_ITEMS = 500;
+
+const toTimelineItem = (item, index) => ({
+  id: item.uuid || index,
+  timestamp: item.timestamp,
+  content: item.tokens ? item.tokens.join(' ') : '(no content)',
+  weight: item.weight || 1.0,
+  tags: item.tags || [],
+});
+
 export default function App() {
   const [timelineData, setTimelineData] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [feedMessages, setFeedMessages] = useState([]);
   const [filters, setFilters] = useState({ keyword: '', startDate: '', endDate: '' });
 
   const fetchTimeline = async () => {
     try {
-      const res = await fetch('http://localhost:8007/memory/replay');
+      const res = await fetch(REPLAY_URL);
       const data = await res.json();
-      const mapped = data.map((item, index) => ({
-        id: item.uuid || index,
-        timestamp: item.timestamp,
-        content: item.tokens ? item.tokens.join(' ') : '(no content)',
-        weight: item.weight || 1.0,
-        tags: item.tags || [],
-      }));
-      setTimelineData(mapped);
+      setTimelineData(data.map(toTimelineItem));
+      setNextCursor(res.headers.get('X-Next-Cursor'));
     } catch (err) {
       console.error('Error fetching timeline:', err);
     }
   };
 
+  const loadOlder = async () => {
+    if (!nextCursor) return;
+    try {
+      const res = await fetch(`${REPLAY_URL}?cursor=${encodeURIComponent(nextCursor)}`);
+      const data = await res.json();
+      setTimelineData((items) => [
+        ...items,
+        ...data.map((item, i) => toTimelineItem(item, `${nextCursor}-${i}`)),
+      ]);
+      setNextCursor(res.headers.get('X-Next-Cursor'));
+    } catch (err) {
+      console.error('Error loading older memories:', err);
+    }
+  };
+
   useEffect(() => {
     fetchTimeline();
+    // New replays are pushed as they arrive; no polling needed.
+    const ws = new WebSocket('ws://localhost:8007/ws');
+    ws.onmessage = (event) => {
+      // Frames carry one entry, or an array of entries when batching is on.
+      const data = JSON.parse(event.data);
+      const entries = (Array.isArray(data) ? data : [data]).reverse();
+      const items = entries.map((entry, i) => toTimelineItem(entry, `${Date.now()}-${i}`));
+      setTimelineData((current) => [...items, ...current].slice(0, MAX_TIMELINE_ITEMS));
+    };
+    return () => ws.close();
   }, []);
 
   const filteredTimeline = useMemo(
@@ -60,6 +91,14 @@ export default function App() {
       </aside>
       <main className="flex-1 p-4 overflow-y-auto space-y-4">
         <MemoryTimeline data={filteredTimeline} />
+        {nextCursor && (
+          <button
+            onClick={loadOlder}
+            className="w-full py-2 text-sm text-gray-300 border border-gray-700 rounded hover:bg-gray-800"
+          >
+            Load older memories
+          </button>
+        )}
       </main>
       <div className="md:w-1/5 border-l border-gray-700 p-4 flex flex-col">
         <LiveFeedDock messages={feedMessages} memories={timelineData} />
@@ -1,10 +1,14 @@
 from fastapi import FastAPI, HTTPException
-from shared.redis_utils import subscribe, publish
+from shared import model_lifecycle, profiling
+from shared.model_lifecycle import ModelNotReady
+from shared.redis_utils import health as redis_health, listen, publish_many
 from shared.logger import logger
-from shared.qdrant_client import insert_embedding_with_stage
+from shared import tracing
+from shared.metrics import StageMetrics
+from shared.qdrant_client import queue_embedding_with_stage, writer as qdrant_writer
+import asyncio
 import threading
 import json
-import spacy
 import os
 from datetime import datetime
 from schemas import (
@@ -14,7 +18,7 @@ from schemas import (
     InterpretResponse,
 )
 from pruning import prune_embedding
-from .utils import summarize, extract_tags, prune_content, get_embedding
+from .utils import NLP, summarize, extract_tags, prune_content, get_embedding
 from loguru import logger
 from prometheus_fastapi_instrumentator import Instrumentator
 from prometheus_client import Histogram, Counter
@@ -25,19 +29,15 @@ app = FastAPI(title="Genio INTERPRET Service")
 
 # Middleware and Prometheus instrumentation must be here
 Instrumentator().instrument(app).expose(app)
+profiling.mount(app)
+model_lifecycle.mount(app, NLP)
 
 # Prometheus metrics
 pruning_latency = Histogram("pruning_latency_seconds", "Time spent pruning embeddings")
 interpret_errors = Counter(
     "interpret_errors_total", "Total errors in Interpret service"
 )
-
-# Load spaCy model safely
-try:
-    nlp = spacy.load("en_core_web_sm")
-except Exception as e:
-    logger.error(f"Failed to load spaCy model: {e}")
-    exit(1)
+stage_metrics = StageMetrics("interpret")
 
 # Settings
 THRESHOLD = float(os.getenv("PRUNE_THRESHOLD", "0.1"))
@@ -49,24 +49,24 @@ shutdown_flag = threading.Event()
 
 
 def listener():
-    pubsub = subscribe(EXPRESS_CHANNEL)
-    logger.info(f"[INTERPRET] Subscribed to '{EXPRESS_CHANNEL}'")
-
-    while not shutdown_flag.is_set():
-        message = pubsub.get_message(timeout=1)
-        if message and message["type"] == "message":
+    logger.info(f"[INTERPRET] Subscribing to '{EXPRESS_CHANNEL}'")
+    for message in listen(EXPRESS_CHANNEL, shutdown_flag):
+        if message:
+            stage_metrics.messages_in.inc()
             try:
                 data = json.loads(message["data"])
                 content = data.get("content")
                 embedding = data.get("embedding")
                 uuid = data.get("uuid", datetime.utcnow().isoformat())
+                trace = tracing.received(data, "interpret")
 
                 if not embedding:
                     interpret_errors.inc()
+                    stage_metrics.dropped("invalid")
                     logger.error(f"[INTERPRET] Missing embedding for uuid={uuid}")
                     continue
 
-                doc = nlp(content)
+                doc = NLP.get()(content)
                 tokens = [token.text for token in doc if not token.is_stop]
                 logger.info(f"[INTERPRET] Parsed Tokens: {tokens}")
 
@@ -78,20 +78,17 @@ def listener():
                     f"[INTERPRET] Pruned embedding uuid={uuid}, details={details}"
                 )
 
-                downstream_message = {
-                    "uuid": uuid,
-                    "tokens": tokens,
-                    "pruned_embedding": pruned_embedding,
-                    "pruning_details": details,
-                    "timestamp": datetime.utcnow().isoformat(),
-                }
-
-                publish(INTERPRET_CHANNEL, downstream_message)
-                logger.info(
-                    f"[INTERPRET] Published data uuid={uuid} to '{INTERPRET_CHANNEL}'"
+                downstream_message = tracing.forward(
+                    trace,
+                    {
+                        "uuid": uuid,
+                        "tokens": tokens,
+                        "pruned_embedding": pruned_embedding,
+                        "pruning_details": details,
+                        "timestamp": datetime.utcnow().isoformat(),
+                    },
                 )
 
-                # ✅ NEW: publish to memory_replay_channel
                 replay_message = {
                     "uuid": uuid,
                     "timestamp": downstream_message["timestamp"],
@@ -99,13 +96,22 @@ def listener():
                     "weight": 1.0,
                     "tags": ["interpreted"]
                 }
-                publish("memory_replay_channel", replay_message)
+                # Both messages go out in one round trip.
+                publish_many(
+                    [
+                        (INTERPRET_CHANNEL, downstream_message),
+                        ("memory_replay_channel", replay_message),
+                    ]
+                )
+                stage_metrics.messages_out.inc()
                 logger.info(
-                    f"[INTERPRET] Published replay to 'memory_replay_channel': {replay_message}"
+                    f"[INTERPRET] Published data uuid={uuid} to '{INTERPRET_CHANNEL}'"
+                    " and 'memory_replay_channel'"
                 )
 
             except Exception as e:
                 interpret_errors.inc()
+                stage_metrics.dropped("error")
                 logger.error(f"[INTERPRET] Error processing message: {e}")
 
 
@@ -119,17 +125,24 @@ signal.signal(signal.SIGTERM, handle_shutdown)
 threading.Thread(target=listener, daemon=True).start()
 
 
+@app.on_event("startup")
+async def startup_event():
+    NLP.start()
+    await qdrant_writer.start()
+    stage_metrics.start_loop_monitor()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await qdrant_writer.close()
+
+
 @app.get("/health")
 def detailed_healthcheck():
-    spacy_status = "ok"
-    try:
-        _ = nlp("test")
-    except Exception as e:
-        spacy_status = f"error: {str(e)}"
-
     return {
         "status": "active",
-        "spacy": spacy_status,
+        "spacy": model_lifecycle.health_status(NLP),
+        "redis": redis_health(),
         "timestamp": datetime.utcnow().isoformat(),
     }
 
@@ -142,9 +155,15 @@ def healthcheck():
 @app.post("/interpret", response_model=InterpretResponse)
 async def interpret(req: InterpretRequest):
     """Process well document content and store embedding."""
+    try:
+        NLP.get_nowait()
+    except ModelNotReady as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
     try:
         summary = summarize(req.content)
-        tags = extract_tags(req.content)
+        # spaCy parsing is CPU-bound; keep it off the event loop.
+        tags = await asyncio.to_thread(extract_tags, req.content)
         pruned = prune_content(req.content)
         embedding = get_embedding(pruned)
     except Exception as exc:  # noqa: BLE001
@@ -165,7 +184,7 @@ async def interpret(req: InterpretRequest):
     }
 
     try:
-        insert_embedding_with_stage("well_docs", embedding, metadata)
+        queue_embedding_with_stage("well_docs", embedding, metadata)
     except Exception as exc:  # noqa: BLE001
         interpret_errors.inc()
         raise HTTPException(status_code=500, detail=f"Qdrant error: {exc}")
@@ -5,8 +5,21 @@ import os
 import openai
 import spacy
 
-# Load spaCy model only once
-NLP = spacy.load("en_core_web_sm")
+from shared.model_lifecycle import ModelHandle
+
+SPACY_MODEL = os.getenv("SPACY_MODEL", "en_core_web_sm")
+
+
+def load_nlp(name: str = SPACY_MODEL):
+    """Load a spaCy pipeline; ``blank:<lang>`` gives a tokenizer-only one
+    that needs no model download (offline and load-test runs)."""
+    if name.startswith("blank:"):
+        return spacy.blank(name.split(":", 1)[1])
+    return spacy.load(name)
+
+
+# Loaded once, in the background once the service starts (or on first use)
+NLP = ModelHandle("spacy", load_nlp, warmup=lambda nlp: nlp("Warm up the pipeline."))
 
 openai.api_key = os.getenv("OPENAI_API_KEY", "")
 
@@ -26,7 +39,7 @@ def summarize(text: str) -> str:
 
 def extract_tags(text: str) -> List[str]:
     """Extract key noun phrases from text."""
-    doc = NLP(text)
+    doc = NLP.get()(text)
     return list({chunk.text.lower() for chunk in doc.noun_chunks})
 
 
@@ -0,0 +1,167 @@
+# broadcast.py
+"""Fan replayed memories out to WebSocket clients without letting one slow
+client hold up the rest.
+
+Each entry is serialized once. Publishing only enqueues that string on every
+client's bounded queue (no awaits), and each client drains its own queue from
+its own sender task. When a client falls ``WS_QUEUE_SIZE`` messages behind,
+``WS_SLOW_POLICY`` decides what happens:
+
+* ``drop`` discards its oldest queued message, so it always sees the newest,
+* ``disconnect`` closes it; the dashboard reconnects and refetches the list.
+
+With ``WS_BATCH_MAX`` > 1 a sender coalesces whatever is queued (up to that
+many messages) into one JSON-array frame.
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, Optional, Set, Union
+
+from fastapi import WebSocket, WebSocketDisconnect
+from prometheus_client import Counter, Gauge, Histogram
+
+from shared.logger import logger
+
+WS_QUEUE_SIZE = int(os.getenv("WS_QUEUE_SIZE", "256"))
+WS_SLOW_POLICY = os.getenv("WS_SLOW_POLICY", "drop")
+WS_BATCH_MAX = int(os.getenv("WS_BATCH_MAX", "1"))
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "5"))
+
+ws_connections = Gauge("viewer_ws_connections", "Open WebSocket connections")
+ws_messages_sent = Counter(
+    "viewer_ws_messages_sent_total", "Messages delivered to WebSocket clients"
+)
+ws_messages_dropped = Counter(
+    "viewer_ws_messages_dropped_total", "Messages dropped for slow WebSocket clients"
+)
+ws_disconnects = Counter(
+    "viewer_ws_disconnects_total", "WebSocket clients disconnected", ["reason"]
+)
+ws_send_latency = Histogram(
+    "viewer_ws_send_seconds", "Time to write one frame to a WebSocket client"
+)
+ws_frame_size = Histogram(
+    "viewer_ws_frame_messages",
+    "Messages coalesced into one WebSocket frame",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250),
+)
+
+
+class Client:
+    def __init__(self, websocket: WebSocket, queue_size: int) -> None:
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.sender: Optional[asyncio.Task] = None
+
+
+class Broadcaster:
+    def __init__(
+        self,
+        queue_size: int = WS_QUEUE_SIZE,
+        policy: str = WS_SLOW_POLICY,
+        batch_max: int = WS_BATCH_MAX,
+        send_timeout: float = WS_SEND_TIMEOUT,
+    ) -> None:
+        if policy not in ("drop", "disconnect"):
+            raise ValueError(f"Unknown WS_SLOW_POLICY: {policy}")
+        self.queue_size = queue_size
+        self.policy = policy
+        self.batch_max = max(batch_max, 1)
+        self.send_timeout = send_timeout
+        self.clients: Set[Client] = set()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    # -- publishing ------------------------------------------------------------
+
+    def publish(self, message: str) -> None:
+        """Queue an already serialized message for every client; loop only."""
+        for client in list(self.clients):
+            if client.queue.full():
+                if self.policy == "disconnect":
+                    self._evict(client, "slow")
+                    continue
+                client.queue.get_nowait()
+                ws_messages_dropped.inc()
+            client.queue.put_nowait(message)
+
+    def publish_threadsafe(self, entry: Union[str, Dict[str, Any]]) -> None:
+        """Publish from another thread; dicts are serialized in that thread."""
+        if self.loop is None or not self.clients:
+            return
+        message = entry if isinstance(entry, str) else json.dumps(entry, default=str)
+        self.loop.call_soon_threadsafe(self.publish, message)
+
+    # -- connections -----------------------------------------------------------
+
+    async def serve(self, websocket: WebSocket) -> None:
+        await websocket.accept()
+        client = Client(websocket, self.queue_size)
+        client.sender = asyncio.create_task(self._send_loop(client))
+        self.clients.add(client)
+        ws_connections.set(len(self.clients))
+        try:
+            while True:
+                await websocket.receive_text()  # Keep connection alive
+        except WebSocketDisconnect:
+            pass
+        finally:
+            self._remove(client, "closed")
+
+    def _remove(self, client: Client, reason: str) -> None:
+        if client in self.clients:
+            self.clients.discard(client)
+            ws_connections.set(len(self.clients))
+            ws_disconnects.labels(reason=reason).inc()
+        if client.sender and client.sender is not asyncio.current_task():
+            client.sender.cancel()
+
+    def _evict(self, client: Client, reason: str) -> None:
+        self._remove(client, reason)
+        asyncio.create_task(self._close(client.websocket))
+
+    @staticmethod
+    async def _close(websocket: WebSocket) -> None:
+        try:
+            await websocket.close(code=1013)  # try again later
+        except Exception:
+            pass
+
+    async def _send_loop(self, client: Client) -> None:
+        queue = client.queue
+        while True:
+            messages = [await queue.get()]
+            while len(messages) < self.batch_max and not queue.empty():
+                messages.append(queue.get_nowait())
+            if self.batch_max > 1:
+                frame = "[" + ",".join(messages) + "]"
+            else:
+                frame = messages[0]
+
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(
+                    client.websocket.send_text(frame), self.send_timeout
+                )
+            except asyncio.TimeoutError:
+                logger.warning("[VIEWER] Disconnecting stalled WebSocket client")
+                self._evict(client, "timeout")
+                return
+            except Exception:
+                self._remove(client, "error")
+                return
+            ws_send_latency.observe(time.perf_counter() - started)
+            ws_frame_size.observe(len(messages))
+            ws_messages_sent.inc(len(messages))
+
+
+broadcaster = Broadcaster()
+
+
+async def websocket_endpoint(websocket: WebSocket):
+    await broadcaster.serve(websocket)
@@ -0,0 +1,205 @@
+# history.py
+"""Durable replay history in a local SQLite database (WAL mode).
+
+Every captured entry is appended to ``entries`` and folded into a per-bucket
+summary (count, truth count, time span, token frequencies) in the same
+transaction, so summaries never need a scan. Pages are read newest first
+with a keyset cursor on ``(ts, id)``: going back a week costs the same
+index seek as the first page, and nothing but the page is held in memory.
+"""
+
+import base64
+import json
+import os
+import sqlite3
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+HISTORY_DB = os.getenv("HISTORY_DB", "/app/data/replay_history.db")
+HISTORY_BUCKET_SECONDS = int(os.getenv("HISTORY_BUCKET_SECONDS", "3600"))
+SUMMARY_TOP_TOKENS = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_ts_id ON entries (ts, id);
+CREATE TABLE IF NOT EXISTS buckets (
+    bucket INTEGER PRIMARY KEY,
+    count INTEGER NOT NULL,
+    truths INTEGER NOT NULL,
+    first_ts REAL NOT NULL,
+    last_ts REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bucket_tokens (
+    bucket INTEGER NOT NULL,
+    token TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (bucket, token)
+) WITHOUT ROWID;
+"""
+
+
+def to_epoch(value) -> float:
+    """Epoch seconds for an ISO timestamp; naive values are UTC."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return 0.0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def encode_cursor(ts: float, row_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{ts!r}:{row_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        ts, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return float(ts), int(row_id)
+    except Exception:
+        raise ValueError("invalid cursor")
+
+
+class HistoryStore:
+    def __init__(
+        self, path: str = HISTORY_DB, bucket_seconds: int = HISTORY_BUCKET_SECONDS
+    ) -> None:
+        self.path = path
+        self.bucket_seconds = bucket_seconds
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets readers run beside the writer.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def append(self, entry: Dict[str, Any]) -> Tuple[int, float]:
+        """Store ``entry``; returns its ``(id, ts)``."""
+        ts = to_epoch(entry.get("timestamp"))
+        bucket = int(ts // self.bucket_seconds)
+        truth = 1 if entry.get("truth") is True else 0
+        tokens = Counter(str(t) for t in entry.get("tokens") or [])
+        body = json.dumps(entry, separators=(",", ":"), default=str)
+
+        conn = self._connection()
+        with self._write_lock:
+            conn.execute("BEGIN")
+            try:
+                row_id = conn.execute(
+                    "INSERT INTO entries (ts, body) VALUES (?, ?)", (ts, body)
+                ).lastrowid
+                conn.execute(
+                    "INSERT INTO buckets (bucket, count, truths, first_ts, last_ts) "
+                    "VALUES (?, 1, ?, ?, ?) ON CONFLICT (bucket) DO UPDATE SET "
+                    "count = count + 1, truths = truths + excluded.truths, "
+                    "first_ts = min(first_ts, excluded.first_ts), "
+                    "last_ts = max(last_ts, excluded.last_ts)",
+                    (bucket, truth, ts, ts),
+                )
+                conn.executemany(
+                    "INSERT INTO bucket_tokens (bucket, token, n) VALUES (?, ?, ?) "
+                    "ON CONFLICT (bucket, token) DO UPDATE SET n = n + excluded.n",
+                    [(bucket, token, n) for token, n in tokens.items()],
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return row_id, ts
+
+    def page(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Return up to ``limit`` entries older than ``cursor``, newest first,
+        and the cursor of the next page (``None`` on the last one)."""
+        conditions, args = [], []
+        if cursor:
+            conditions.append("(ts, id) < (?, ?)")
+            args.extend(decode_cursor(cursor))
+        if since is not None:
+            conditions.append("ts >= ?")
+            args.append(since)
+        if until is not None:
+            conditions.append("ts <= ?")
+            args.append(until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._connection().execute(
+            f"SELECT id, ts, body FROM entries {where} "
+            "ORDER BY ts DESC, id DESC LIMIT ?",
+            (*args, limit + 1),
+        ).fetchall()
+
+        entries = [json.loads(body) for _, _, body in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            row_id, ts, _ = rows[limit - 1]
+            next_cursor = encode_cursor(ts, row_id)
+        return entries, next_cursor
+
+    def latest(self, limit: int) -> List[Dict[str, Any]]:
+        """The ``limit`` most recently captured entries, oldest first."""
+        rows = self._connection().execute(
+            "SELECT body FROM entries ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [json.loads(body) for (body,) in reversed(rows)]
+
+    def summary(
+        self, since: Optional[float] = None, until: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Per-bucket counts, newest bucket first."""
+        lo = int(since // self.bucket_seconds) if since is not None else None
+        hi = int(until // self.bucket_seconds) if until is not None else None
+        conn = self._connection()
+        rows = conn.execute(
+            "SELECT bucket, count, truths, first_ts, last_ts FROM buckets "
+            "WHERE (? IS NULL OR bucket >= ?) AND (? IS NULL OR bucket <= ?) "
+            "ORDER BY bucket DESC",
+            (lo, lo, hi, hi),
+        ).fetchall()
+
+        summaries = []
+        for bucket, count, truths, first_ts, last_ts in rows:
+            top = conn.execute(
+                "SELECT token, n FROM bucket_tokens WHERE bucket = ? "
+                "ORDER BY n DESC, token LIMIT ?",
+                (bucket, SUMMARY_TOP_TOKENS),
+            ).fetchall()
+            summaries.append(
+                {
+                    "start": _iso(bucket * self.bucket_seconds),
+                    "end": _iso((bucket + 1) * self.bucket_seconds),
+                    "count": count,
+                    "truths": truths,
+                    "first": _iso(first_ts),
+                    "last": _iso(last_ts),
+                    "top_tokens": [{"token": t, "count": n} for t, n in top],
+                }
+            )
+        return summaries
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
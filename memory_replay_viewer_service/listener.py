@@ -1,24 +1,42 @@
-# listeners.py
-from shared.redis_utils import subscribe
+# listener.py
+from shared.redis_utils import listen
 from shared.logger import logger
+from shared.metrics import StageMetrics
 from storage import add_replay
+from history import HistoryStore
 from schemas import MemoryEntry
+from broadcast import broadcaster
 import json
+import os
+import threading
 
-def memory_listener():
-    pubsub = subscribe("memory_replay_channel")
-    logger.info("[VIEWER] Subscribed to memory_replay_channel")
+MEMORY_REPLAY_CHANNEL = os.getenv("MEMORY_REPLAY_CHANNEL", "memory_replay_channel")
 
-    for message in pubsub.listen():
-        if message["type"] != "message":
+stage_metrics = StageMetrics("viewer")
+listener_stop = threading.Event()
+
+
+def memory_listener(history: HistoryStore):
+    """Persist replayed memories, keep the latest in memory and push each
+    one to the WebSocket clients; runs in its own thread."""
+    logger.info(f"[VIEWER] Subscribing to {MEMORY_REPLAY_CHANNEL}")
+
+    for message in listen(MEMORY_REPLAY_CHANNEL, listener_stop):
+        if not message:
             continue
+        stage_metrics.messages_in.inc()
 
         try:
             data = json.loads(message["data"])
             entry = MemoryEntry(**data)
-            add_replay(entry)
+            history.append(data)
+            add_replay(data)
+            # Forward the payload as received; it is already JSON.
+            broadcaster.publish_threadsafe(message["data"])
             logger.info(f"[VIEWER] Captured replay: {entry.timestamp}")
         except json.JSONDecodeError as e:
+            stage_metrics.dropped("invalid")
             logger.error(f"[VIEWER] JSON decode error: {e}")
         except Exception as e:
+            stage_metrics.dropped("error")
             logger.error(f"[VIEWER] General error: {e}")
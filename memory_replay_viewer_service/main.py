@@ -1,13 +1,21 @@
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from shared.redis_utils import subscribe
+from shared import profiling
 from shared.logger import logger
+from storage import buffer
+from history import HistoryStore, to_epoch
+from listener import memory_listener, stage_metrics
+from broadcast import broadcaster, websocket_endpoint
+from prometheus_fastapi_instrumentator import Instrumentator
+import asyncio
+import html
 import threading
 import json
+from typing import Optional
 
 app = FastAPI()
-latest_replays = []
+Instrumentator().instrument(app).expose(app)
+profiling.mount(app)
 
 app.add_middleware(
     CORSMiddleware,
@@ -15,42 +23,110 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "Link"],
 )
+history: Optional[HistoryStore] = None
+
+# New entries are pushed to every client connected here.
+app.add_api_websocket_route("/ws", websocket_endpoint)
+
 
 def listener():
     try:
-        pubsub = subscribe("memory_replay_channel")
-        logger.info("[VIEWER] Subscribed to memory_replay_channel")
-        for message in pubsub.listen():
-            if message["type"] == "message":
-                data = json.loads(message["data"])
-                latest_replays.append(data)
-                if len(latest_replays) > 50:
-                    latest_replays.pop(0)
-                logger.info(f"[VIEWER] Captured replay: {data}")
+        memory_listener(history)
     except Exception as e:
         logger.error(f"[VIEWER] Listener failed: {e}")
 
+
 @app.on_event("startup")
-def start_listener_thread():
+async def start_listener_thread():
+    global history
+    broadcaster.loop = asyncio.get_running_loop()
+    history = HistoryStore()
+    for entry in history.latest(buffer.size):
+        buffer.add(entry)
+    logger.info(f"[VIEWER] Restored {len(buffer)} replays from {history.path}")
     threading.Thread(target=listener, daemon=True).start()
+    stage_metrics.start_loop_monitor()
+
+
+def render_html(replays) -> bytes:
+    items = "".join(
+        f"<li><b>{html.escape(str(replay.get('timestamp')))}</b>: "
+        f"{html.escape(', '.join(map(str, replay.get('tokens') or [])))}</li>"
+        for replay in replays
+    )
+    return f"<h1>Memory Replay Viewer</h1><ul>{items}</ul>".encode()
+
+
+def render_json(replays) -> bytes:
+    return json.dumps(replays, default=str).encode()
+
+
+def cached_response(request: Request, view: str, render, media_type: str):
+    etag, (body, headers) = buffer.view(view, render)
+    headers = {**headers, "ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def page_headers(request: Request, next_cursor: Optional[str], limit: int):
+    if not next_cursor:
+        return {}
+    url = request.url.include_query_params(cursor=next_cursor, limit=limit)
+    return {"X-Next-Cursor": next_cursor, "Link": f'<{url}>; rel="next"'}
+
+
+@app.get("/")
+def view_replays(request: Request):
+    return cached_response(
+        request, "html", lambda replays: (render_html(replays), {}), "text/html"
+    )
 
-@app.get("/", response_class=HTMLResponse)
-def view_replays():
-    html = "<h1>Memory Replay Viewer</h1><ul>"
-    for replay in reversed(latest_replays):
-        html += f"<li><b>{replay.get('timestamp')}</b>: {', '.join(replay.get('tokens', []))}</li>"
-    html += "</ul>"
-    return html
 
 @app.get("/memory/replay")
-def get_latest_replays():
+def get_latest_replays(
+    request: Request,
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+):
     """
-    Returns the latest memory replays for frontend consumption.
+    Returns memory replays for frontend consumption, newest first. Follow
+    the ``X-Next-Cursor`` header (or ``Link: rel="next"``) to scroll back.
     """
-    logger.info(f"[VIEWER] Serving {len(latest_replays)} replays")
-    return list(reversed(latest_replays))  # newest first
+    start = to_epoch(since) if since else None
+    end = to_epoch(until) if until else None
+
+    def render(_):
+        entries, next_cursor = history.page(limit, cursor, start, end)
+        return render_json(entries), page_headers(request, next_cursor, limit)
+
+    if cursor is None and start is None and end is None:
+        # The newest page only changes when an entry arrives.
+        return cached_response(request, f"json:{limit}", render, "application/json")
+    try:
+        body, headers = render(None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.get("/memory/summary")
+def get_summary(since: Optional[str] = None, until: Optional[str] = None):
+    """Precomputed per-bucket counts and top tokens, newest bucket first."""
+    return history.summary(
+        to_epoch(since) if since else None, to_epoch(until) if until else None
+    )
+
 
 @app.get("/health")
 def health():
-    return {"status": "ok", "count": len(latest_replays)}
+    return {
+        "status": "ok",
+        "count": len(buffer),
+        "version": buffer.version,
+        "clients": len(broadcaster),
+    }
@@ -4,5 +4,5 @@ from typing import List, Optional
 
 class MemoryEntry(BaseModel):
     timestamp: str
-    tokens: List[str]
+    tokens: List[str] = []
     truth: Optional[bool] = None
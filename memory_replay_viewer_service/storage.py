@@ -1,17 +1,69 @@
 # storage.py
-from schemas import MemoryEntry
-from typing import List
+"""Bounded, thread-safe store of the latest replayed memories.
+
+The Redis listener thread appends while request handlers read, so every
+access goes through one lock. Each append bumps ``version``; rendered views
+(HTML page, JSON list) are cached per version and double as ETags, so
+repeated polls between updates cost a dictionary lookup.
+"""
+
+import os
 import threading
+import uuid
+from collections import deque
+from typing import Any, Callable, Dict, List, Tuple
+
+REPLAY_BUFFER_SIZE = int(os.getenv("REPLAY_BUFFER_SIZE", "50"))
+
+
+class ReplayBuffer:
+    def __init__(self, size: int = REPLAY_BUFFER_SIZE) -> None:
+        self.size = size
+        self._entries: deque = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._views: Dict[str, Tuple[int, Any]] = {}
+        self._epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def etag(self) -> str:
+        # The epoch keeps ETags from a previous process from matching.
+        return f'"{self._epoch}-{self.version}"'
+
+    def add(self, entry: Dict[str, Any]) -> int:
+        with self._lock:
+            self._entries.append(entry)
+            self.version += 1
+            return self.version
+
+    def latest(self) -> List[Dict[str, Any]]:
+        """Newest first."""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def view(self, name: str, render: Callable[[List[Dict[str, Any]]], Any]):
+        """Return ``(etag, render(latest()))``, rendering once per version."""
+        with self._lock:
+            version, etag = self.version, self.etag
+            cached = self._views.get(name)
+            if cached and cached[0] == version:
+                return etag, cached[1]
+            entries = list(reversed(self._entries))
+        body = render(entries)
+        with self._lock:
+            self._views[name] = (version, body)
+        return etag, body
+
+
+buffer = ReplayBuffer()
+
 
-latest_replays: List[MemoryEntry] = []
-lock = threading.Lock()
+def add_replay(entry: Dict[str, Any]) -> int:
+    return buffer.add(entry)
 
-def add_replay(entry: MemoryEntry, limit: int = 50):
-    with lock:
-        latest_replays.append(entry)
-        if len(latest_replays) > limit:
-            latest_replays.pop(0)
 
-def get_latest_replays() -> List[MemoryEntry]:
-    with lock:
-        return list(reversed(latest_replays))
+def get_latest_replays() -> List[Dict[str, Any]]:
+    return buffer.latest()
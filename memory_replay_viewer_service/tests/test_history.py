@@ -0,0 +1,50 @@
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+from memory_replay_viewer_service.history import HistoryStore, to_epoch
+
+
+def _entry(minute: int, truth: bool = True) -> dict:
+    return {
+        "timestamp": f"2025-05-15T22:{minute:02d}:00",
+        "tokens": ["pressure", f"m{minute}"],
+        "truth": truth,
+    }
+
+
+def test_pages_walk_back_by_timestamp(tmp_path) -> None:
+    store = HistoryStore(str(tmp_path / "history.db"))
+    # Captured out of timestamp order, as replays of older memories are.
+    for minute in [5, 1, 9, 3, 7, 2, 8, 0, 6, 4]:
+        store.append(_entry(minute))
+
+    seen, cursor = [], None
+    while True:
+        entries, cursor = store.page(limit=3, cursor=cursor)
+        seen.extend(e["timestamp"] for e in entries)
+        if cursor is None:
+            break
+    assert seen == [_entry(m)["timestamp"] for m in range(9, -1, -1)]
+
+    entries, _ = store.page(
+        limit=10,
+        since=to_epoch("2025-05-15T22:03:00"),
+        until=to_epoch("2025-05-15T22:05:00"),
+    )
+    assert [e["tokens"][1] for e in entries] == ["m5", "m4", "m3"]
+    assert [e["tokens"][1] for e in store.latest(2)] == ["m6", "m4"]
+
+
+def test_summary_counts_per_bucket(tmp_path) -> None:
+    store = HistoryStore(str(tmp_path / "history.db"), bucket_seconds=300)
+    for minute in range(10):
+        store.append(_entry(minute, truth=minute % 2 == 0))
+
+    buckets = store.summary()
+    assert [b["count"] for b in buckets] == [5, 5]
+    assert [b["truths"] for b in buckets] == [2, 3]
+    assert buckets[0]["top_tokens"][0] == {"token": "pressure", "count": 5}
+    assert buckets[1]["start"].startswith("2025-05-15T22:00")
@@ -1,8 +1,12 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, Body
+from fastapi import (
+    FastAPI, UploadFile, File, Form, HTTPException, BackgroundTasks, Body, Query
+)
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from typing import Optional
 from uuid import uuid4
 from datetime import datetime, timedelta
+import asyncio
 import os
 import psycopg2
 from psycopg2.pool import SimpleConnectionPool
@@ -10,9 +14,17 @@ from loguru import logger
 import shutil
 from prometheus_fastapi_instrumentator import Instrumentator
 
+from shared import profiling
 from shared.schemas import NowSignal
-from shared.redis_utils import publish
+from shared.redis_utils import health as redis_health, publish, publish_many
+from shared import tracing
+from shared.metrics import StageMetrics
+from shared.pg_partitions import INGESTED_FILES, ensure_partitions
+from shared.qdrant_client import writer as qdrant_writer
 import pandas as pd
+from .scada_features import SCADA_FEATURES_COLLECTION, feature_matrix
+from .scada_filter import ScadaFilter
+from .scada_store import ScadaStore, readings_frame
 from .scada_utils import row_to_memory
 
 # ────────────────────────────────────────────
@@ -21,7 +33,10 @@ from .scada_utils import row_to_memory
 ALLOWED_EXTENSIONS = {'.txt', '.md', '.json'}
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5 MB
 STORAGE_ROOT = '/tmp/ingested_files'
-EXPRESS_CHANNEL = os.getenv('EXPRESS_CHANNEL', 'express_channel')
+NOW_CHANNEL = os.getenv('NOW_CHANNEL', 'now_channel')
+SCADA_CHANNEL = os.getenv('SCADA_CHANNEL', 'scada_channel')
+PUBLISH_BATCH_SIZE = int(os.getenv('PUBLISH_BATCH_SIZE', '500'))
+PARTITION_MAINTENANCE_SECONDS = int(os.getenv('PARTITION_MAINTENANCE_SECONDS', '3600'))
 
 # ────────────────────────────────────────────
 # FastAPI App Setup
@@ -37,6 +52,10 @@ app.add_middleware(
 )
 
 Instrumentator().instrument(app).expose(app)
+profiling.mount(app)
+stage_metrics = StageMetrics("now")
+scada_filter = ScadaFilter()
+scada_store = ScadaStore()
 
 # ────────────────────────────────────────────
 # PostgreSQL Connection Pool
@@ -61,29 +80,42 @@ def put_db_connection(conn):
 # Startup: Init DB + Storage Dir
 # ────────────────────────────────────────────
 @app.on_event("startup")
-def startup_event():
+async def startup_event():
     init_db()
     os.makedirs(STORAGE_ROOT, exist_ok=True)
+    await qdrant_writer.start()
+    asyncio.create_task(partition_maintenance())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await qdrant_writer.close()
 
 def init_db():
     conn = get_db_connection()
     try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS ingested_files (
-                    id UUID PRIMARY KEY,
-                    filename TEXT,
-                    filetype TEXT,
-                    timestamp TIMESTAMP
-                )
-            """)
-            conn.commit()
-            logger.info("[NOW] Database initialized successfully")
+        ensure_partitions(conn, INGESTED_FILES)
+        logger.info("[NOW] Database initialized successfully")
     except Exception as e:
         logger.error(f"[NOW] DB initialization failed: {e}")
     finally:
         put_db_connection(conn)
 
+def maintain_partitions():
+    """Create upcoming partitions and drop expired ones."""
+    conn = get_db_connection()
+    try:
+        ensure_partitions(conn, INGESTED_FILES)
+    finally:
+        put_db_connection(conn)
+
+async def partition_maintenance():
+    while True:
+        await asyncio.sleep(PARTITION_MAINTENANCE_SECONDS)
+        try:
+            await asyncio.to_thread(maintain_partitions)
+        except Exception as e:
+            logger.error(f"[NOW] Partition maintenance failed: {e}")
+
 # ────────────────────────────────────────────
 # Models
 # ────────────────────────────────────────────
@@ -98,6 +130,8 @@ class NowSignal(BaseModel):
     timestamp: datetime
     source: str
     content: str
+    # Carried through every stage so a memory can be followed downstream.
+    uuid: Optional[str] = None
 
 # ────────────────────────────────────────────
 # Routes
@@ -107,16 +141,20 @@ def memory_ingest_fallback(text: str = Body(..., embed=True)):
     signal = NowSignal(
         timestamp=datetime.utcnow(),
         source="frontend",
-        content=text
+        content=text,
+        uuid=str(uuid4()),
     )
     logger.info("[NOW] Received memory snapshot via /memory/ingest", text=text)
-    publish("now_channel", signal.dict())
+    publish("now_channel", tracing.start(signal.dict()))
+    stage_metrics.messages_out.inc()
     return {"status": "published", "text": text}
 
 @app.post("/ingest")
 def ingest_signal(signal: NowSignal):
+    signal.uuid = signal.uuid or str(uuid4())
     logger.info("[NOW] Received NowSignal", signal=signal.dict())
-    publish("now_channel", signal.dict())
+    publish("now_channel", tracing.start(signal.dict()))
+    stage_metrics.messages_out.inc()
     return {"status": "published"}
 
 @app.post("/ingest-file", response_model=IngestResponse)
@@ -173,9 +211,25 @@ async def ingest_file(file: UploadFile = File(...), background_tasks: Background
     )
 
 
+def publish_scada_batch(batch: list) -> None:
+    publish_many(batch)
+    stage_metrics.batch_size.observe(len(batch))
+    stage_metrics.messages_out.inc(len(batch))
+
+
 @app.post("/ingest/scada")
-async def ingest_scada(file: UploadFile = File(...)):
-    """Ingest SCADA CSV data and publish each row to the EXPRESS channel."""
+async def ingest_scada(
+    file: UploadFile = File(...), well_id: str = Form("unknown")
+):
+    """Ingest SCADA CSV data and publish changed rows to the SCADA channel.
+
+    Every reading is kept in ``scada_store``. ``scada_filter`` suppresses
+    rows that repeat the well's last reading; a ``well_id`` column in the CSV
+    overrides the form field. Forwarded rows get a numeric feature vector in
+    the SCADA features collection, with the memory's uuid as its point id.
+    They are not sent through EXPRESS: the text encoder never runs on a
+    reading, and the main collection only holds text embeddings.
+    """
     if not file.filename.lower().endswith(".csv"):
         raise HTTPException(status_code=400, detail="CSV file required")
 
@@ -185,22 +239,114 @@ async def ingest_scada(file: UploadFile = File(...)):
         logger.error(f"[SCADA] Failed to parse CSV: {e}")
         raise HTTPException(status_code=400, detail="Invalid CSV format")
 
+    try:
+        readings = readings_frame(df, well_id)
+    except Exception as e:
+        # Missing columns; row_to_memory reports them row by row below.
+        logger.error(f"[SCADA] Failed to read SCADA columns: {e}")
+        readings = None
+
+    rows_stored = 0
+    vectors: dict = {}
+    if readings is not None:
+        try:
+            rows_stored = await asyncio.to_thread(scada_store.write, readings)
+        except Exception as e:
+            logger.error(f"[SCADA] Failed to store readings: {e}")
+        # Keyed by CSV row; rows without a timestamp get no vector.
+        vectors = dict(zip(readings.index, feature_matrix(readings)))
+
     rows_ingested = 0
+    rows_suppressed = 0
     errors: list[str] = []
+    batch: list = []
     for idx, row in df.iterrows():
         try:
             memory = row_to_memory(row)
-            publish(EXPRESS_CHANNEL, memory)
-            rows_ingested += 1
+            memory.setdefault("well_id", well_id)
+            decision = scada_filter.check(memory)
+            if not decision.forward:
+                rows_suppressed += 1
+                continue
+            memory.setdefault("uuid", str(uuid4()))
+            memory["reasons"] = decision.reasons
+            if decision.anomalies:
+                memory["tags"].append("anomaly")
+            if idx in vectors:
+                qdrant_writer.add(
+                    SCADA_FEATURES_COLLECTION,
+                    vectors[idx].tolist(),
+                    {
+                        "well_id": memory["well_id"],
+                        "timestamp": memory["timestamp"],
+                        **memory["signal"],
+                    },
+                    point_id=memory["uuid"],
+                )
+            batch.append((SCADA_CHANNEL, tracing.start(memory)))
         except Exception as exc:
+            stage_metrics.dropped("invalid")
             errors.append(f"row {idx}: {exc}")
+        if len(batch) >= PUBLISH_BATCH_SIZE:
+            publish_scada_batch(batch)
+            rows_ingested += len(batch)
+            batch = []
+    if batch:
+        publish_scada_batch(batch)
+        rows_ingested += len(batch)
+    if rows_suppressed:
+        stage_metrics.dropped("suppressed", rows_suppressed)
 
     return {
         "rows_ingested": rows_ingested,
+        "rows_suppressed": rows_suppressed,
+        "rows_stored": rows_stored,
         "success": len(errors) == 0,
         "errors": errors,
     }
 
+@app.get("/well/readings")
+async def well_readings(
+    well_id: str,
+    start: datetime,
+    end: datetime,
+    columns: Optional[str] = None,
+    resolution: str = "1h",
+):
+    """Raw readings or 1h/1d rollups for one well; ``columns`` is a
+    comma-separated list of signal fields."""
+    fields = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+    try:
+        frame = await asyncio.to_thread(
+            scada_store.query, well_id, start, end, fields, resolution
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    frame["timestamp"] = frame["timestamp"].map(lambda ts: ts.isoformat())
+    frame = frame.astype(object).where(frame.notna(), None)
+    return {
+        "well_id": well_id,
+        "resolution": resolution,
+        "rows": frame.to_dict("records"),
+    }
+
+
+@app.get("/well/overview")
+async def well_overview(well_id: str, days: int = Query(30, ge=1, le=3660)):
+    """Daily production (volume_mcf) and uptime (flow_time_pct) for the
+    portal's overview card."""
+    overview = await asyncio.to_thread(scada_store.overview, well_id, days)
+    return {
+        **overview,
+        "downtime": round(100.0 - overview["uptime"], 1) if overview["days"] else 0.0,
+        # Not known to the ingestor; the portal shows them blank.
+        "operator": "",
+        "district": "",
+        "field": "",
+        "tags": [],
+        "reflection": "",
+    }
+
 @app.get("/health")
 def detailed_healthcheck():
     try:
@@ -214,6 +360,7 @@ def detailed_healthcheck():
     return {
         "status": "active",
         "database": db_status,
+        "redis": redis_health(),
         "timestamp": datetime.utcnow().isoformat()
     }
 
@@ -0,0 +1,103 @@
+"""Numeric feature vectors for SCADA readings.
+
+A reading is seven floats, so it does not go through the text encoder.
+:func:`feature_matrix` turns a whole frame of readings into one vector per
+row in a few array operations. Each vector holds, per signal field, the
+reading, the trailing mean and standard deviation over the well's last
+``window`` readings and the change since its previous reading, plus an alarm
+flag. The vectors live only in the ``scada_features`` collection; they are
+not comparable with the text embeddings of the main memory collection.
+
+Values are compressed with a signed ``log1p`` first, so that flow rates in
+the thousands do not drown out pressures and percentages. Rows are then
+L2-normalised, which suits the cosine distance the collection uses.
+"""
+
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pandas as pd
+
+SCADA_FEATURES_COLLECTION = os.getenv("SCADA_FEATURES_COLLECTION", "scada_features")
+SCADA_FEATURE_WINDOW = int(os.getenv("SCADA_FEATURE_WINDOW", "12"))
+
+SIGNAL_FIELDS = (
+    "diff_pressure_inH20",
+    "static_pressure_psia",
+    "temperature_degF",
+    "volume_mcf",
+    "flow_rate_mcf_day",
+    "energy_mmbtu",
+    "flow_time_pct",
+)
+# reading, rolling mean, rolling std and delta per field, plus the alarm flag
+FEATURE_DIM = 4 * len(SIGNAL_FIELDS) + 1
+
+
+def _rolling(values: np.ndarray, window: int) -> tuple[np.ndarray, np.ndarray]:
+    """Trailing mean and standard deviation over up to ``window`` rows."""
+    n = len(values)
+    zero = np.zeros((1, values.shape[1]))
+    sums = np.vstack([zero, np.cumsum(values, axis=0)])
+    squares = np.vstack([zero, np.cumsum(values * values, axis=0)])
+    end = np.arange(1, n + 1)
+    start = np.maximum(end - window, 0)
+    count = (end - start)[:, None]
+    mean = (sums[end] - sums[start]) / count
+    var = (squares[end] - squares[start]) / count - mean * mean
+    return mean, np.sqrt(np.maximum(var, 0.0))
+
+
+def _well_runs(df: pd.DataFrame) -> tuple[np.ndarray, list[slice]]:
+    """Row order that groups ``df`` by well and sorts each well by time.
+
+    Returns the positions in that order and the slice each well occupies.
+    Frames without ``well_id`` count as one well, and without ``timestamp``
+    keep their row order.
+    """
+    n = len(df)
+    keys = pd.DataFrame({"pos": np.arange(n)}, index=df.index)
+    keys["well"] = df["well_id"].astype(str) if "well_id" in df else ""
+    keys["time"] = df["timestamp"] if "timestamp" in df else 0
+    keys = keys.sort_values(["well", "time", "pos"], kind="stable")
+    wells = keys["well"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, wells[1:] != wells[:-1]])
+    ends = [*starts[1:], n]
+    return keys["pos"].to_numpy(), [slice(a, b) for a, b in zip(starts, ends)]
+
+
+def feature_matrix(
+    df: pd.DataFrame, window: int = SCADA_FEATURE_WINDOW
+) -> np.ndarray:
+    """One ``FEATURE_DIM`` float32 vector per row of ``df``, in row order.
+
+    The rolling statistics and change follow each ``well_id`` on its own, in
+    ``timestamp`` order. Missing or unparseable readings count as zero.
+    """
+    raw = np.column_stack(
+        [pd.to_numeric(df[field], errors="coerce") for field in SIGNAL_FIELDS]
+    ).astype(np.float64)
+    values = np.sign(raw) * np.log1p(np.abs(raw))
+    values = np.nan_to_num(values, nan=0.0, posinf=0.0, neginf=0.0)
+
+    order, runs = _well_runs(df)
+    mean = np.empty_like(values)
+    std = np.empty_like(values)
+    delta = np.empty_like(values)
+    for run in runs:
+        rows = order[run]
+        series = values[rows]
+        mean[rows], std[rows] = _rolling(series, max(window, 1))
+        delta[rows] = np.diff(series, axis=0, prepend=series[:1])
+    if "alarms" in df:
+        alarms = df["alarms"].fillna("").astype(str).str.strip().str.lower()
+        alarm = (~alarms.isin(["", "none", "nan", "0"])).to_numpy(np.float64)
+    else:
+        alarm = np.zeros(len(df))
+
+    features = np.column_stack([values, mean, std, delta, alarm])
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    np.divide(features, norms, out=features, where=norms > 0)
+    return features.astype(np.float32)
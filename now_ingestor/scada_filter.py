@@ -0,0 +1,179 @@
+"""Streaming change filter for SCADA readings.
+
+Most SCADA rows repeat the previous reading within sensor noise. The
+:class:`ScadaFilter` keeps a little state per well and forwards a row only
+when it says something new:
+
+* ``first``: the first reading seen for the well.
+* ``deadband:<field>``: a signal moved more than its deadband since the last
+  forwarded row.
+* ``anomaly:<field>``: a signal's rolling z-score over the last ``window``
+  readings exceeds ``z_threshold``.
+* ``alarm``: the alarm text changed.
+* ``heartbeat``: nothing was forwarded for ``heartbeat_seconds``, so the
+  well does not look silent downstream.
+
+Everything else is suppressed and only counted. Missing (NaN) or infinite
+readings are ignored field by field, so one bad sample neither triggers nor
+poisons the state. The state lives in the process, so a well's stream
+continues across uploads.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+# Absolute deadbands in each signal's own unit.
+DEFAULT_DEADBANDS = {
+    "diff_pressure_inH20": 0.5,
+    "static_pressure_psia": 2.0,
+    "temperature_degF": 1.0,
+    "flow_rate_mcf_day": 5.0,
+}
+
+
+def parse_deadbands(value: str) -> Dict[str, float]:
+    """``"field=band,field=band"`` merged over :data:`DEFAULT_DEADBANDS`."""
+    deadbands = dict(DEFAULT_DEADBANDS)
+    for item in value.split(","):
+        if item.strip():
+            name, band = item.split("=", 1)
+            deadbands[name.strip()] = float(band)
+    return deadbands
+
+
+SCADA_DEADBANDS = parse_deadbands(os.getenv("SCADA_DEADBANDS", ""))
+SCADA_Z_THRESHOLD = float(os.getenv("SCADA_Z_THRESHOLD", "4.0"))
+SCADA_Z_WINDOW = int(os.getenv("SCADA_Z_WINDOW", "60"))
+SCADA_Z_MIN_SAMPLES = int(os.getenv("SCADA_Z_MIN_SAMPLES", "10"))
+SCADA_HEARTBEAT_SECONDS = float(os.getenv("SCADA_HEARTBEAT_SECONDS", "3600"))
+
+
+@dataclass
+class FilterConfig:
+    deadbands: Dict[str, float] = field(default_factory=lambda: dict(SCADA_DEADBANDS))
+    z_threshold: float = SCADA_Z_THRESHOLD
+    window: int = SCADA_Z_WINDOW
+    min_samples: int = SCADA_Z_MIN_SAMPLES
+    heartbeat_seconds: float = SCADA_HEARTBEAT_SECONDS
+
+
+@dataclass
+class Decision:
+    forward: bool
+    reasons: List[str]
+
+    @property
+    def anomalies(self) -> List[str]:
+        return [r.split(":", 1)[1] for r in self.reasons if r.startswith("anomaly:")]
+
+
+def _finite(value: Any) -> bool:
+    return isinstance(value, (int, float)) and math.isfinite(value)
+
+
+def _finite_fields(signal: Dict[str, Any]) -> Dict[str, float]:
+    return {name: value for name, value in signal.items() if _finite(value)}
+
+
+class _Rolling:
+    """Mean and standard deviation of the last ``size`` values."""
+
+    def __init__(self, size: int) -> None:
+        self.values: Deque[float] = deque(maxlen=size)
+        self.total = 0.0
+        self.squares = 0.0
+
+    def zscore(self, value: float) -> Optional[float]:
+        n = len(self.values)
+        if n == 0:
+            return None
+        mean = self.total / n
+        var = max(self.squares / n - mean * mean, 0.0)
+        if var == 0.0:
+            return None
+        return (value - mean) / math.sqrt(var)
+
+    def add(self, value: float) -> None:
+        if not _finite(value):
+            return
+        if len(self.values) == self.values.maxlen:
+            old = self.values[0]
+            self.total -= old
+            self.squares -= old * old
+        self.values.append(value)
+        self.total += value
+        self.squares += value * value
+
+
+@dataclass
+class _WellState:
+    forwarded: Dict[str, float]
+    forwarded_at: datetime
+    alarms: str
+    rolling: Dict[str, _Rolling]
+
+
+class ScadaFilter:
+    def __init__(self, config: Optional[FilterConfig] = None) -> None:
+        self.config = config or FilterConfig()
+        self._wells: Dict[str, _WellState] = {}
+        self.forwarded = 0
+        self.suppressed = 0
+
+    def check(self, memory: Dict[str, Any]) -> Decision:
+        """Decide whether a :func:`row_to_memory` dict goes downstream."""
+        well = str(memory.get("well_id") or "unknown")
+        at = datetime.fromisoformat(memory["timestamp"].replace("Z", "+00:00"))
+        signal = memory["signal"]
+        alarms = str(signal.get("alarms", "")).strip()
+        config = self.config
+
+        state = self._wells.get(well)
+        if state is None:
+            state = _WellState(
+                forwarded=_finite_fields(signal),
+                forwarded_at=at,
+                alarms=alarms,
+                rolling={name: _Rolling(config.window) for name in config.deadbands},
+            )
+            self._wells[well] = state
+            reasons = ["first"]
+        else:
+            reasons = []
+            for name, band in config.deadbands.items():
+                value = signal.get(name)
+                if not _finite(value):
+                    continue
+                last = state.forwarded.get(name)
+                # A signal that comes back after missing readings is news too.
+                if last is None or abs(value - last) > band:
+                    reasons.append(f"deadband:{name}")
+            for name, rolling in state.rolling.items():
+                value = signal.get(name)
+                if len(rolling.values) < config.min_samples or not _finite(value):
+                    continue
+                z = rolling.zscore(value)
+                if z is not None and abs(z) > config.z_threshold:
+                    reasons.append(f"anomaly:{name}")
+            if alarms != state.alarms:
+                reasons.append("alarm")
+            elapsed = (at - state.forwarded_at).total_seconds()
+            if not reasons and elapsed >= config.heartbeat_seconds:
+                reasons.append("heartbeat")
+
+        for name, rolling in state.rolling.items():
+            rolling.add(signal.get(name))
+        state.alarms = alarms
+        if reasons:
+            state.forwarded.update(_finite_fields(signal))
+            state.forwarded_at = at
+            self.forwarded += 1
+        else:
+            self.suppressed += 1
+        return Decision(bool(reasons), reasons)
@@ -0,0 +1,261 @@
+"""Raw SCADA readings and their rollups in Parquet, partitioned by well and time.
+
+Layout under ``SCADA_STORE_ROOT``::
+
+    raw/well_id=<well>/date=YYYY-MM-DD/readings.parquet    raw readings
+    1h/well_id=<well>/date=YYYY-MM-DD/rollup.parquet       hourly buckets
+    1d/well_id=<well>/month=YYYY-MM/rollup.parquet         daily buckets
+
+Rollups keep count, sum, min and max per signal, so a write only merges its
+own buckets into the partitions it touches, and averages are ``sum / count``
+at read time. Raw readings are merged the same way, so each well-day stays
+one file however many uploads touch it. Readings whose timestamp the well
+already has are skipped, so uploading the same export twice leaves the
+rollups unchanged.
+:meth:`ScadaStore.query` lists the well's partition directories, skips those
+outside the range by name, and reads only the requested columns from the
+rest. A few months of daily rollups are a handful of small files.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote
+
+import pandas as pd
+
+from .scada_features import SIGNAL_FIELDS
+
+SCADA_STORE_ROOT = os.getenv("SCADA_STORE_ROOT", "/app/data/scada")
+
+RAW_PARTITION = "date=%Y-%m-%d"
+# resolution -> (bucket frequency, partition format)
+ROLLUPS: Dict[str, Tuple[str, str]] = {
+    "1h": ("1h", "date=%Y-%m-%d"),
+    "1d": ("1D", "month=%Y-%m"),
+}
+STATS = ("count", "sum", "min", "max")
+_COMBINE = {"count": "sum", "sum": "sum", "min": "min", "max": "max"}
+
+
+def readings_frame(df: pd.DataFrame, well_id: str) -> pd.DataFrame:
+    """Typed readings from a SCADA CSV frame; rows without a time are dropped.
+
+    A ``well_id`` column wins over the ``well_id`` argument.
+    """
+    stamps = df["DateTime"].astype(str).str.split("-").str[0].str.strip()
+    if "well_id" in df:
+        wells = df["well_id"].fillna(well_id).astype(str)
+    else:
+        wells = pd.Series(well_id, index=df.index)
+    frame = pd.DataFrame(
+        {
+            "well_id": wells,
+            "timestamp": pd.to_datetime(
+                stamps, format="%m/%d/%Y %H:%M", utc=True, errors="coerce"
+            ),
+        }
+    )
+    for field in SIGNAL_FIELDS:
+        frame[field] = pd.to_numeric(df[field], errors="coerce")
+    if "alarms" in df:
+        frame["alarms"] = df["alarms"].fillna("").astype(str)
+    else:
+        frame["alarms"] = ""
+    return frame.dropna(subset=["timestamp"])
+
+
+def _aggregate(readings: pd.DataFrame, freq: str) -> pd.DataFrame:
+    """Per-bucket count, sum, min and max of every signal."""
+    buckets = readings["timestamp"].dt.floor(freq)
+    stats = readings[list(SIGNAL_FIELDS)].groupby(buckets).agg(list(STATS))
+    stats.columns = [f"{field}_{stat}" for field, stat in stats.columns]
+    return stats
+
+
+def _merge(old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    both = pd.concat([old, new])
+    combine = {column: _COMBINE[column.rsplit("_", 1)[1]] for column in both.columns}
+    return both.groupby(level=0).agg(combine).sort_index()
+
+
+def _utc(value) -> pd.Timestamp:
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+class ScadaStore:
+    def __init__(self, root: str = SCADA_STORE_ROOT) -> None:
+        self.root = Path(root)
+        self._write_lock = threading.Lock()
+
+    def _well_dir(self, resolution: str, well_id: str) -> Path:
+        return self.root / resolution / f"well_id={quote(str(well_id), safe='')}"
+
+    def write(self, readings: pd.DataFrame) -> int:
+        """Append :func:`readings_frame` rows and fold them into the rollups.
+
+        A well keeps one reading per timestamp: rows already stored, say from
+        a re-uploaded export, are skipped so they are not counted twice.
+        Returns the number of rows written.
+        """
+        if readings.empty:
+            return 0
+        written = 0
+        with self._write_lock:
+            for well_id, rows in readings.groupby("well_id"):
+                rows = rows.drop(columns="well_id").drop_duplicates("timestamp")
+                rows = rows.sort_values("timestamp")
+                days = rows["timestamp"].dt.strftime(RAW_PARTITION)
+                new = []
+                for day, part in rows.groupby(days):
+                    part = self._merge_raw(self._well_dir("raw", well_id) / day, part)
+                    if not part.empty:
+                        new.append(part)
+                if not new:
+                    continue
+                rows = pd.concat(new)
+                for resolution, (freq, partition) in ROLLUPS.items():
+                    self._update_rollup(resolution, well_id, rows, freq, partition)
+                written += len(rows)
+        return written
+
+    def _merge_raw(self, day_dir: Path, rows: pd.DataFrame) -> pd.DataFrame:
+        """Fold ``rows`` into one raw partition; returns the rows it lacked.
+
+        The partition is rewritten as a single ``readings.parquet``, replacing
+        any part files an older layout left behind.
+        """
+        files = sorted(day_dir.glob("*.parquet"))
+        stored = [pd.read_parquet(path) for path in files]
+        if stored:
+            known = pd.concat([frame["timestamp"] for frame in stored])
+            rows = rows[~rows["timestamp"].isin(known)]
+        if rows.empty:
+            return rows
+        merged = pd.concat([*stored, rows], ignore_index=True)
+        merged = merged.drop_duplicates("timestamp").sort_values("timestamp")
+        day_dir.mkdir(parents=True, exist_ok=True)
+        path = day_dir / "readings.parquet"
+        tmp = path.with_suffix(".tmp")
+        merged.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+        for old in files:
+            if old != path:
+                old.unlink()
+        return rows
+
+    def _update_rollup(
+        self,
+        resolution: str,
+        well_id: str,
+        rows: pd.DataFrame,
+        freq: str,
+        partition: str,
+    ) -> None:
+        stats = _aggregate(rows, freq)
+        for key, chunk in stats.groupby(stats.index.strftime(partition)):
+            path = self._well_dir(resolution, well_id) / key / "rollup.parquet"
+            if path.exists():
+                chunk = _merge(pd.read_parquet(path).set_index("timestamp"), chunk)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            chunk.reset_index().to_parquet(tmp, index=False)
+            os.replace(tmp, path)
+
+    def _files(
+        self, resolution: str, well_id: str, start: pd.Timestamp, end: pd.Timestamp
+    ) -> Iterable[Path]:
+        partition = RAW_PARTITION if resolution == "raw" else ROLLUPS[resolution][1]
+        first, last = start.strftime(partition), end.strftime(partition)
+        well_dir = self._well_dir(resolution, well_id)
+        if not well_dir.is_dir():
+            return []
+        return [
+            path
+            for part in sorted(well_dir.iterdir())
+            if first <= part.name <= last
+            for path in sorted(part.glob("*.parquet"))
+        ]
+
+    def query(
+        self,
+        well_id: str,
+        start,
+        end,
+        columns: Optional[List[str]] = None,
+        resolution: str = "1h",
+    ) -> pd.DataFrame:
+        """Readings or rollup buckets with ``start <= timestamp < end``.
+
+        ``resolution`` is ``raw``, ``1h`` or ``1d``. Rollups come back as
+        ``<field>_{count,sum,min,max,avg}`` columns.
+        """
+        fields = list(columns or SIGNAL_FIELDS)
+        allowed = set(SIGNAL_FIELDS) | ({"alarms"} if resolution == "raw" else set())
+        unknown = [field for field in fields if field not in allowed]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        if resolution == "raw":
+            read = ["timestamp", *fields]
+        elif resolution in ROLLUPS:
+            read = ["timestamp", *(f"{f}_{s}" for f in fields for s in STATS)]
+        else:
+            raise ValueError(f"Unknown resolution {resolution!r}: raw, 1h or 1d")
+
+        start, end = _utc(start), _utc(end)
+        frames = [
+            pd.read_parquet(path, columns=read)
+            for path in self._files(resolution, well_id, start, end)
+        ]
+        if not frames:
+            frame = pd.DataFrame(columns=read)
+        else:
+            frame = pd.concat(frames, ignore_index=True)
+            in_range = (frame["timestamp"] >= start) & (frame["timestamp"] < end)
+            frame = frame[in_range].sort_values("timestamp", ignore_index=True)
+        if resolution != "raw":
+            for field in fields:
+                frame[f"{field}_avg"] = frame[f"{field}_sum"] / frame[f"{field}_count"]
+        return frame
+
+    def latest(self, well_id: str, resolution: str = "1d") -> Optional[pd.Timestamp]:
+        """Start of the newest bucket stored for ``well_id``."""
+        well_dir = self._well_dir(resolution, well_id)
+        if not well_dir.is_dir():
+            return None
+        # A partition without a rollup yet (say, mid-write) is skipped.
+        rollups = [
+            part / "rollup.parquet"
+            for part in sorted(well_dir.iterdir())
+            if (part / "rollup.parquet").is_file()
+        ]
+        if not rollups:
+            return None
+        stamps = pd.read_parquet(rollups[-1], columns=["timestamp"])
+        return stamps["timestamp"].max()
+
+    def overview(self, well_id: str, days: int = 30) -> dict:
+        """Daily production and uptime for the ``days`` up to the newest data."""
+        latest = self.latest(well_id)
+        if latest is None:
+            return {"well_id": well_id, "days": [], "production": [], "uptime": 0.0}
+        end = latest + pd.Timedelta(days=1)
+        daily = self.query(
+            well_id,
+            end - pd.Timedelta(days=days),
+            end,
+            ["volume_mcf", "flow_time_pct"],
+            resolution="1d",
+        )
+        samples = daily["flow_time_pct_count"].sum()
+        uptime = daily["flow_time_pct_sum"].sum() / samples if samples else 0.0
+        return {
+            "well_id": well_id,
+            "days": [ts.strftime("%Y-%m-%d") for ts in daily["timestamp"]],
+            "production": [round(float(v), 3) for v in daily["volume_mcf_sum"]],
+            "uptime": round(float(uptime), 1),
+        }
@@ -37,4 +37,6 @@ def row_to_memory(row: pd.Series | Dict[str, Any]) -> Dict[str, Any]:
         "tags": ["scada", "automated", "sensor"],
         "content": f"SCADA reading flow={signal['flow_rate_mcf_day']} at {ts_iso}",
     }
+    if "well_id" in row and not pd.isna(row["well_id"]):
+        memory["well_id"] = str(row["well_id"])
     return memory
@@ -0,0 +1,67 @@
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from now_ingestor.scada_features import FEATURE_DIM, SIGNAL_FIELDS, feature_matrix
+
+
+def frame(rows: int, alarm_at: int = -1) -> "pd.DataFrame":
+    data = {
+        field: [float(i + k) for i in range(rows)]
+        for k, field in enumerate(SIGNAL_FIELDS)
+    }
+    data["alarms"] = ["HIGH_DP" if i == alarm_at else "" for i in range(rows)]
+    return pd.DataFrame(data)
+
+
+def test_feature_matrix_shape_and_norm() -> None:
+    vectors = feature_matrix(frame(20), window=4)
+    assert vectors.shape == (20, FEATURE_DIM)
+    assert vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-5)
+
+
+def test_rolling_window_and_alarm() -> None:
+    df = frame(6, alarm_at=3)
+    vectors = feature_matrix(df, window=2)
+    n = len(SIGNAL_FIELDS)
+    # The first row has no history: zero spread and zero change.
+    assert np.all(vectors[0, 2 * n : 4 * n] == 0)
+    assert vectors[3, -1] > 0
+    assert vectors[2, -1] == 0
+    assert np.all(vectors[1:, 2 * n : 3 * n] > 0)
+    # A one-row window has no spread.
+    spread = feature_matrix(df, window=1)[:, 2 * n : 3 * n]
+    assert np.allclose(spread, 0, atol=1e-6)
+
+
+def test_missing_values_count_as_zero() -> None:
+    df = frame(3)
+    df["flow_rate_mcf_day"] = [1.0, "n/a", None]
+    vectors = feature_matrix(df)
+    assert np.isfinite(vectors).all()
+
+
+def test_history_follows_each_well_in_time_order() -> None:
+    a = frame(4).assign(well_id="A")
+    b = (frame(4) * 10).assign(well_id="B", alarms="")
+    for df in (a, b):
+        df["timestamp"] = pd.date_range("2024-05-01", periods=4, freq="h")
+    # Interleave the wells and shuffle time, as a combined export might.
+    mixed = pd.concat([a, b]).iloc[[7, 0, 5, 2, 1, 6, 3, 4]].reset_index(drop=True)
+    vectors = feature_matrix(mixed, window=2)
+
+    alone_a = feature_matrix(a, window=2)
+    alone_b = feature_matrix(b, window=2)
+    for pos, (well, hour) in enumerate(
+        zip(mixed["well_id"], mixed["timestamp"].dt.hour)
+    ):
+        expected = alone_a if well == "A" else alone_b
+        assert np.allclose(vectors[pos], expected[hour], atol=1e-6)
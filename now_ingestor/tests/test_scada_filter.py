@@ -0,0 +1,106 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+from now_ingestor.scada_filter import FilterConfig, ScadaFilter, parse_deadbands
+
+START = datetime(2024, 5, 7)
+
+
+def reading(minute: int, well: str = "W1", alarms: str = "", **changes) -> dict:
+    signal = {
+        "diff_pressure_inH20": 20.0,
+        "static_pressure_psia": 500.0,
+        "temperature_degF": 70.0,
+        "volume_mcf": 1.0,
+        "flow_rate_mcf_day": 400.0,
+        "energy_mmbtu": 1.0,
+        "flow_time_pct": 100.0,
+        "alarms": alarms,
+    }
+    signal.update(changes)
+    ts = START + timedelta(minutes=minute)
+    return {
+        "well_id": well,
+        "timestamp": ts.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "signal": signal,
+    }
+
+
+def config(**overrides) -> FilterConfig:
+    settings = {
+        "deadbands": parse_deadbands(""),
+        "z_threshold": 4.0,
+        "window": 30,
+        "min_samples": 10,
+        "heartbeat_seconds": 3600,
+    }
+    settings.update(overrides)
+    return FilterConfig(**settings)
+
+
+def test_steady_well_is_suppressed_between_heartbeats() -> None:
+    scada_filter = ScadaFilter(config())
+    decisions = [scada_filter.check(reading(m)) for m in range(24 * 60)]
+    reasons = [d.reasons for d in decisions if d.forward]
+    assert reasons[0] == ["first"]
+    assert all(r == ["heartbeat"] for r in reasons[1:])
+    assert len(reasons) == 24
+    assert scada_filter.suppressed == 24 * 60 - 24
+
+
+def test_deadband_compares_with_last_forwarded_reading() -> None:
+    scada_filter = ScadaFilter(config())
+    scada_filter.check(reading(0))
+    # Creeping up 0.2 at a time stays inside the 0.5 deadband until the
+    # total drift since the last forwarded row exceeds it.
+    drift = [
+        scada_filter.check(reading(m, diff_pressure_inH20=20.0 + 0.2 * m)).forward
+        for m in range(1, 5)
+    ]
+    assert drift == [False, False, True, False]
+
+
+def test_alarm_change_and_wells_are_independent() -> None:
+    scada_filter = ScadaFilter(config())
+    scada_filter.check(reading(0, well="W1"))
+    assert scada_filter.check(reading(0, well="W2")).reasons == ["first"]
+    assert scada_filter.check(reading(1, alarms="HIGH_DP")).reasons == ["alarm"]
+    assert not scada_filter.check(reading(2, alarms="HIGH_DP")).forward
+    assert scada_filter.check(reading(3)).reasons == ["alarm"]
+
+
+def test_zscore_flags_anomaly_inside_a_wide_deadband() -> None:
+    bands = {name: 1000.0 for name in parse_deadbands("")}
+    scada_filter = ScadaFilter(config(deadbands=bands))
+    for m in range(30):
+        scada_filter.check(reading(m, temperature_degF=70.0 + (m % 2)))
+    decision = scada_filter.check(reading(30, temperature_degF=80.0))
+    assert decision.forward
+    assert decision.anomalies == ["temperature_degF"]
+
+
+def test_missing_readings_do_not_poison_the_state() -> None:
+    bands = {name: 1000.0 for name in parse_deadbands("")}
+    scada_filter = ScadaFilter(config(deadbands=bands))
+    nan = float("nan")
+    for m in range(30):
+        scada_filter.check(reading(m, temperature_degF=70.0 + (m % 2)))
+    assert not scada_filter.check(reading(30, temperature_degF=nan)).forward
+    assert not scada_filter.check(reading(31, temperature_degF=float("inf"))).forward
+    # The rolling statistics still flag a real spike afterwards.
+    decision = scada_filter.check(reading(32, temperature_degF=80.0))
+    assert decision.anomalies == ["temperature_degF"]
+
+
+def test_signal_returning_after_missing_readings_is_forwarded() -> None:
+    scada_filter = ScadaFilter(config())
+    scada_filter.check(reading(0, flow_rate_mcf_day=float("nan")))
+    assert not scada_filter.check(reading(1, flow_rate_mcf_day=float("nan"))).forward
+    decision = scada_filter.check(reading(2))
+    assert decision.reasons == ["deadband:flow_rate_mcf_day"]
+    # The forwarded value is the real reading, so steady rows are suppressed.
+    assert not scada_filter.check(reading(3)).forward
@@ -0,0 +1,95 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from now_ingestor.scada_features import SIGNAL_FIELDS
+from now_ingestor.scada_store import ScadaStore, readings_frame
+
+START = datetime(2024, 5, 7)
+
+
+def export(minutes: range, flow: float = 100.0) -> "pd.DataFrame":
+    rows = []
+    for m in minutes:
+        ts = START + timedelta(minutes=m)
+        row = {field: 1.0 for field in SIGNAL_FIELDS}
+        row["DateTime"] = ts.strftime("%m/%d/%Y %H:%M") + "-01:00"
+        row["flow_rate_mcf_day"] = flow + m
+        row["flow_time_pct"] = 50.0
+        row["alarms"] = ""
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def test_rollups_merge_across_writes(tmp_path) -> None:
+    store = ScadaStore(str(tmp_path))
+    assert store.write(readings_frame(export(range(0, 30)), "W1")) == 30
+    store.write(readings_frame(export(range(30, 90)), "W1"))
+
+    hourly = store.query(
+        "W1", START, START + timedelta(hours=2), ["flow_rate_mcf_day"]
+    )
+    assert list(hourly["flow_rate_mcf_day_count"]) == [60, 30]
+    assert hourly["flow_rate_mcf_day_min"][0] == 100.0
+    assert hourly["flow_rate_mcf_day_max"][0] == 159.0
+    assert hourly["flow_rate_mcf_day_avg"][0] == pytest.approx(129.5)
+    assert "static_pressure_psia_sum" not in hourly
+
+
+def test_raw_query_reads_only_the_range(tmp_path) -> None:
+    store = ScadaStore(str(tmp_path))
+    store.write(readings_frame(export(range(0, 3 * 24 * 60, 60)), "W1"))
+    store.write(readings_frame(export(range(0, 60, 10)), "W2"))
+
+    day = START + timedelta(days=1)
+    raw = store.query(
+        "W1", day, day + timedelta(days=1), ["flow_rate_mcf_day"], resolution="raw"
+    )
+    assert len(raw) == 24
+    assert list(raw.columns) == ["timestamp", "flow_rate_mcf_day"]
+    assert store.query("W3", START, day, resolution="raw").empty
+    with pytest.raises(ValueError):
+        store.query("W1", START, day, ["nope"])
+
+
+def test_overview(tmp_path) -> None:
+    store = ScadaStore(str(tmp_path))
+    store.write(readings_frame(export(range(0, 2 * 24 * 60, 60)), "W1"))
+    overview = store.overview("W1", days=30)
+    assert overview["days"] == ["2024-05-07", "2024-05-08"]
+    assert overview["production"] == [24.0, 24.0]
+    assert overview["uptime"] == 50.0
+    assert store.overview("W9")["days"] == []
+
+
+def test_reuploaded_readings_are_not_counted_twice(tmp_path) -> None:
+    store = ScadaStore(str(tmp_path))
+    assert store.write(readings_frame(export(range(0, 60)), "W1")) == 60
+    # The same export again, then one overlapping the first by half an hour.
+    assert store.write(readings_frame(export(range(0, 60)), "W1")) == 0
+    assert store.write(readings_frame(export(range(30, 90)), "W1")) == 30
+
+    end = START + timedelta(hours=2)
+    hourly = store.query("W1", START, end, ["flow_rate_mcf_day"])
+    assert list(hourly["flow_rate_mcf_day_count"]) == [60, 30]
+    raw = store.query("W1", START, end, ["flow_rate_mcf_day"], resolution="raw")
+    assert len(raw) == 90 and raw["timestamp"].is_unique
+    # Every upload was merged into the day's single file.
+    assert [p.name for p in tmp_path.glob("raw/well_id=W1/*/*")] == [
+        "readings.parquet"
+    ]
+
+
+def test_latest_skips_partitions_without_a_rollup(tmp_path) -> None:
+    store = ScadaStore(str(tmp_path))
+    store.write(readings_frame(export(range(0, 60)), "W1"))
+    (tmp_path / "1d" / "well_id=W1" / "month=2024-06").mkdir()
+    assert store.latest("W1") == pd.Timestamp("2024-05-07", tz="UTC")
@@ -6,7 +6,10 @@ import os
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.insert(0, ROOT)
 
-sys.modules['pandas'] = types.SimpleNamespace(Series=dict)
+try:
+    import pandas  # noqa: F401
+except ImportError:
+    sys.modules['pandas'] = types.SimpleNamespace(Series=dict)
 from now_ingestor.scada_utils import parse_scada_timestamp, row_to_memory
 import pandas as pd
 
@@ -0,0 +1,308 @@
+"""In-process backfill: EXPRESS → INTERPRET → REFLECT → EMBED without Redis.
+
+Records are read in batches and flow through bounded asyncio queues:
+
+    read ─▶ encode (model, worker thread) ─▶ prune (process pool)
+         ─▶ validate + store (one INSERT and one Qdrant upsert per batch)
+
+Each queue holds at most ``--queue-depth`` batches, so a slow stage stalls the
+ones before it instead of piling records up in memory. The stages call the
+same functions the services use: ``preprocess_text`` and the sentence
+encoder (EXPRESS), ``prune_embedding`` (INTERPRET), ``validate_embedding``
+(REFLECT) and ``Database`` (EMBED). VISUALIZE is skipped; its plots are per
+message and not part of what a backfill restores.
+
+Run from the repository root::
+
+    python -m pipeline_runner.runner jsonl memories.jsonl
+    python -m pipeline_runner.runner express_files --since 2025-01-01
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from embed_memory_service.database import Database
+from reflect_service.validation import validate_embedding
+from shared.logger import logger
+
+from .stages import Batch, Record, clean_texts, parse_time, prune_batch
+
+MODEL_NAME = os.getenv("MODEL_NAME", "all-MiniLM-L6-v2")
+PRUNE_THRESHOLD = float(os.getenv("PRUNE_THRESHOLD", "0.1"))
+REDUCE_DIM = int(os.getenv("REDUCE_DIM", "0"))
+BACKFILL_BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE", "256"))
+
+_DONE = object()
+
+
+# -- sources -------------------------------------------------------------------
+
+
+def stable_uuid(file_id) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"express_files/{file_id}"))
+
+
+def _record(data: Dict) -> Record:
+    return Record(
+        uuid=str(data.get("uuid") or uuid.uuid4()),
+        content=data.get("content") or data.get("text") or "",
+        timestamp=parse_time(data.get("timestamp")),
+        metadata=data.get("metadata") or {},
+    )
+
+
+async def jsonl_source(path: str, batch_size: int) -> AsyncIterator[List[Record]]:
+    """Batches of records from a JSON-lines file."""
+
+    def read_batch(f) -> List[Record]:
+        records = []
+        for line in f:
+            if line.strip():
+                records.append(_record(json.loads(line)))
+                if len(records) == batch_size:
+                    break
+        return records
+
+    with open(path) as f:
+        while records := await asyncio.to_thread(read_batch, f):
+            yield records
+
+
+async def express_files_source(
+    pool, batch_size: int, since: Optional[str], until: Optional[str]
+) -> AsyncIterator[List[Record]]:
+    """Batches of uploaded files from ``express_files``, oldest first."""
+    conditions, args = ["content IS NOT NULL"], []
+    if since:
+        args.append(parse_time(since))
+        conditions.append(f"timestamp >= ${len(args)}")
+    if until:
+        args.append(parse_time(until))
+        conditions.append(f"timestamp <= ${len(args)}")
+    where = " AND ".join(conditions)
+    n = len(args)
+
+    cursor = None
+    while True:
+        async with pool.acquire() as conn:
+            if cursor is None:
+                rows = await conn.fetch(
+                    f"SELECT id, content, timestamp, meta, filename, source "
+                    f"FROM express_files WHERE {where} "
+                    f"ORDER BY timestamp, id LIMIT ${n + 1}",
+                    *args,
+                    batch_size,
+                )
+            else:
+                rows = await conn.fetch(
+                    f"SELECT id, content, timestamp, meta, filename, source "
+                    f"FROM express_files WHERE {where} "
+                    f"AND (timestamp, id) > (${n + 1}, ${n + 2}) "
+                    f"ORDER BY timestamp, id LIMIT ${n + 3}",
+                    *args,
+                    *cursor,
+                    batch_size,
+                )
+        if not rows:
+            return
+        records = []
+        for row in rows:
+            meta = row["meta"]
+            meta = json.loads(meta) if isinstance(meta, str) else meta or {}
+            records.append(
+                Record(
+                    # Stable ids: re-running a backfill overwrites its points.
+                    uuid=stable_uuid(row["id"]),
+                    content=row["content"],
+                    timestamp=parse_time(row["timestamp"]),
+                    metadata={
+                        **meta,
+                        "filename": row["filename"],
+                        "source": row["source"],
+                    },
+                )
+            )
+        yield records
+        cursor = (rows[-1]["timestamp"], rows[-1]["id"])
+
+
+# -- stages --------------------------------------------------------------------
+
+
+class Runner:
+    def __init__(
+        self,
+        db: Database,
+        encoder=None,
+        queue_depth: int = 4,
+        prune_workers: Optional[int] = None,
+        store_workers: int = 4,
+        threshold: float = PRUNE_THRESHOLD,
+        reduce_dim: Optional[int] = REDUCE_DIM or None,
+    ) -> None:
+        self.db = db
+        self.encoder = encoder
+        self.queue_depth = queue_depth
+        self.prune_workers = prune_workers or os.cpu_count() or 1
+        self.store_workers = store_workers
+        self.threshold = threshold
+        self.reduce_dim = reduce_dim
+        self.counts: Counter = Counter()
+        self.stage_seconds: Counter = Counter()
+
+    def _model(self):
+        if self.encoder is None:
+            from shared.fake_model import load_encoder
+
+            self.encoder = load_encoder(MODEL_NAME)
+        return self.encoder
+
+    async def _stage(
+        self,
+        name: str,
+        inbox: asyncio.Queue,
+        outbox: Optional[asyncio.Queue],
+        work: Callable[[Batch], Awaitable[Optional[Batch]]],
+        concurrency: int,
+    ) -> None:
+        async def worker() -> None:
+            while True:
+                batch = await inbox.get()
+                if batch is _DONE:
+                    await inbox.put(_DONE)  # let sibling workers see it too
+                    return
+                started = time.perf_counter()
+                try:
+                    result = await work(batch)
+                except Exception as e:
+                    self.counts[f"{name}_failed"] += len(batch.records)
+                    logger.error(f"[BACKFILL] {name} failed for a batch: {e}")
+                    continue
+                self.stage_seconds[name] += time.perf_counter() - started
+                self.counts[name] += len(batch.records)
+                if outbox is not None and result is not None:
+                    await outbox.put(result)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        if outbox is not None:
+            await outbox.put(_DONE)
+
+    async def _encode(self, batch: Batch) -> Batch:
+        texts = clean_texts(batch.records)
+        batch.vectors = await asyncio.to_thread(
+            self._model().encode, texts, batch_size=len(texts), convert_to_numpy=True
+        )
+        return batch
+
+    async def _prune(self, pool: ProcessPoolExecutor, batch: Batch) -> Batch:
+        loop = asyncio.get_running_loop()
+        batch.pruned = await loop.run_in_executor(
+            pool, prune_batch, batch.vectors, self.threshold, self.reduce_dim
+        )
+        batch.vectors = None
+        return batch
+
+    async def _store(self, batch: Batch) -> None:
+        items = []
+        for record, (pruned, details) in zip(batch.records, batch.pruned):
+            anchored, status, summary = await validate_embedding(pruned)
+            self.counts[f"validation_{status}"] += 1
+            items.append((record.uuid, anchored, record.metadata, record.timestamp))
+        await self.db.store_embeddings(items)
+
+    async def run(self, source: AsyncIterator[List[Record]]) -> Dict:
+        encoded: asyncio.Queue = asyncio.Queue(self.queue_depth)
+        pruned: asyncio.Queue = asyncio.Queue(self.queue_depth)
+        inbox: asyncio.Queue = asyncio.Queue(self.queue_depth)
+        started = time.perf_counter()
+
+        async def read() -> None:
+            try:
+                async for records in source:
+                    self.counts["read"] += len(records)
+                    await inbox.put(Batch(records))
+            finally:
+                await inbox.put(_DONE)
+
+        with ProcessPoolExecutor(self.prune_workers) as pool:
+            await asyncio.gather(
+                read(),
+                self._stage("encode", inbox, encoded, self._encode, 1),
+                self._stage(
+                    "prune",
+                    encoded,
+                    pruned,
+                    partial(self._prune, pool),
+                    self.prune_workers,
+                ),
+                self._stage("store", pruned, None, self._store, self.store_workers),
+            )
+
+        elapsed = time.perf_counter() - started
+        return {
+            "records": self.counts["store"],
+            "elapsed_seconds": round(elapsed, 2),
+            "records_per_second": round(self.counts["store"] / elapsed, 1)
+            if elapsed
+            else 0.0,
+            "counts": dict(self.counts),
+            "stage_seconds": {k: round(v, 2) for k, v in self.stage_seconds.items()},
+        }
+
+
+# -- CLI -----------------------------------------------------------------------
+
+
+async def amain(args: argparse.Namespace) -> Dict:
+    db = Database()
+    await db.connect()
+    try:
+        if args.source == "jsonl":
+            source = jsonl_source(args.path, args.batch_size)
+        else:
+            source = express_files_source(
+                db.pg_pool, args.batch_size, args.since, args.until
+            )
+        runner = Runner(
+            db,
+            queue_depth=args.queue_depth,
+            prune_workers=args.prune_workers,
+            store_workers=args.store_workers,
+        )
+        return await runner.run(source)
+    finally:
+        await db.pg_pool.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="source", required=True)
+    jsonl = sub.add_parser("jsonl", help="backfill records from a JSON-lines file")
+    jsonl.add_argument("path")
+    files = sub.add_parser("express_files", help="re-encode uploaded files")
+    files.add_argument("--since")
+    files.add_argument("--until")
+    for p in (jsonl, files):
+        p.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE)
+        p.add_argument("--queue-depth", type=int, default=4)
+        p.add_argument("--prune-workers", type=int, default=None)
+        p.add_argument("--store-workers", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(amain(args))
+    logger.info(f"[BACKFILL] Finished: {report}")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
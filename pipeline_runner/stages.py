@@ -0,0 +1,50 @@
+"""Batch-shaped wrappers around the services' stage functions.
+
+Everything here is importable from the repository root and picklable, so the
+CPU-bound stages can run in a process pool.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from express_emitter.utils import preprocess_text
+from interpret_service.pruning import prune_embedding
+
+
+@dataclass
+class Record:
+    uuid: str
+    content: str
+    timestamp: datetime
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Batch:
+    records: List[Record]
+    vectors: Any = None  # (n, dim) array from the encoder
+    pruned: List[Tuple[List[float], dict]] = field(default_factory=list)
+
+
+def parse_time(value) -> datetime:
+    if isinstance(value, datetime):
+        dt = value
+    elif value:
+        dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    else:
+        dt = datetime.now(timezone.utc)
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def clean_texts(records: List[Record]) -> List[str]:
+    return [preprocess_text(record.content) for record in records]
+
+
+def prune_batch(
+    vectors, threshold: float, reduce_dim: Optional[int]
+) -> List[Tuple[List[float], dict]]:
+    """Run INTERPRET's pruning over every row of ``vectors``."""
+    return [prune_embedding(list(row), threshold, reduce_dim) for row in vectors]
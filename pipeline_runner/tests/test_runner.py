@@ -0,0 +1,47 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+np = pytest.importorskip("numpy")
+for module in ("sklearn", "loguru", "asyncpg", "qdrant_client"):
+    pytest.importorskip(module)
+
+from pipeline_runner.runner import Runner, jsonl_source
+
+
+class FakeEncoder:
+    def encode(self, texts, batch_size=None, convert_to_numpy=True):
+        return np.full((len(texts), 8), 0.15, dtype=np.float32)
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.stored = []
+
+    async def store_embeddings(self, items):
+        self.stored.extend(items)
+        return list(range(len(items)))
+
+
+def test_backfill_runs_every_record_through_all_stages(tmp_path) -> None:
+    path = tmp_path / "memories.jsonl"
+    path.write_text(
+        "\n".join(
+            f'{{"uuid": "u{i}", "content": "pressure {i}!", '
+            f'"timestamp": "2025-05-15T22:00:{i:02d}"}}'
+            for i in range(25)
+        )
+    )
+    db = FakeDatabase()
+    runner = Runner(db, encoder=FakeEncoder(), prune_workers=1, store_workers=2)
+
+    report = asyncio.run(runner.run(jsonl_source(str(path), batch_size=10)))
+
+    assert report["records"] == 25
+    assert sorted(item[0] for item in db.stored) == sorted(f"u{i}" for i in range(25))
+    assert report["counts"]["validation_valid"] == 25
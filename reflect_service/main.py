@@ -1,9 +1,14 @@
 from fastapi import FastAPI, HTTPException
+from shared import profiling
 from shared.logger import logger
+from shared.qdrant_client import writer as qdrant_writer
 from routes import router
 from validation import validate_embedding
 from schemas import AnchorResponse
-import redis.asyncio as redis
+from shared import tracing
+from shared.metrics import StageMetrics
+from shared.worker_pool import WorkerPool
+from shared.redis_utils import alisten, apublish, close_async_redis, get_async_redis
 from loguru import logger
 from prometheus_fastapi_instrumentator import Instrumentator
 from prometheus_client import Histogram, Counter
@@ -18,25 +23,22 @@ app = FastAPI(title="Genio REFLECT Service")
 
 # Instrument Prometheus metrics immediately after app creation
 Instrumentator().instrument(app).expose(app)
+profiling.mount(app)
 
 app.include_router(router)
 
 # Redis setup
-REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
-REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 INTERPRET_CHANNEL = os.getenv("INTERPRET_CHANNEL", "interpret_channel")
 REFLECT_CHANNEL = os.getenv("REFLECT_CHANNEL", "reflect_channel")
 
-redis_pool = redis.ConnectionPool.from_url(
-    f"redis://{REDIS_HOST}:{REDIS_PORT}/0", decode_responses=True
-)
-redis_client = redis.Redis(connection_pool=redis_pool)
+redis_client = get_async_redis()
 
 # Prometheus metrics
 validation_latency = Histogram(
     "validation_latency_seconds", "Embedding validation latency"
 )
 reflect_errors = Counter("reflect_errors_total", "Total errors in Reflect service")
+stage_metrics = StageMetrics("reflect")
 
 shutdown_event = asyncio.Event()
 
@@ -44,9 +46,11 @@ shutdown_event = asyncio.Event()
 async def handle_message(data):
     uuid = data.get("uuid", datetime.utcnow().isoformat())
     pruned_embedding = data.get("pruned_embedding")
+    trace = tracing.received(data, "reflect")
 
     if not pruned_embedding:
         reflect_errors.inc()
+        stage_metrics.dropped("invalid")
         logger.error("[REFLECT] Missing pruned_embedding", uuid=uuid)
         return
 
@@ -55,6 +59,7 @@ async def handle_message(data):
             anchored, status, summary = await validate_embedding(pruned_embedding)
     except Exception as e:
         reflect_errors.inc()
+        stage_metrics.dropped("error")
         logger.error("[REFLECT] Validation error", uuid=uuid, error=str(e))
         return
 
@@ -66,36 +71,42 @@ async def handle_message(data):
         summary=summary,
     )
 
-    # Corrected serialization using response.json()
-    await redis_client.publish(REFLECT_CHANNEL, response.json())
+    await apublish(REFLECT_CHANNEL, tracing.forward(trace, response.dict()))
+    stage_metrics.messages_out.inc()
     logger.info("[REFLECT] Published anchored embedding", uuid=uuid, status=status)
 
 
-async def listener():
-    pubsub = redis_client.pubsub()
-    await pubsub.subscribe(INTERPRET_CHANNEL)
-    logger.info(f"[REFLECT] Subscribed to '{INTERPRET_CHANNEL}'")
+workers = WorkerPool(handle_message, stage_metrics)
 
-    while not shutdown_event.is_set():
-        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1)
+
+async def listener():
+    logger.info(f"[REFLECT] Subscribing to '{INTERPRET_CHANNEL}'")
+    async for message in alisten(INTERPRET_CHANNEL, shutdown_event):
         if message:
+            stage_metrics.messages_in.inc()
             try:
                 data = json.loads(message["data"])
-                asyncio.create_task(handle_message(data))
+                await workers.submit(data)
             except Exception as e:
                 reflect_errors.inc()
+                stage_metrics.dropped("invalid")
                 logger.error("[REFLECT] Error processing message", error=str(e))
 
 
 @app.on_event("startup")
 async def startup_event():
+    await qdrant_writer.start()
+    workers.start()
     asyncio.create_task(listener())
+    stage_metrics.start_loop_monitor()
 
 
 @app.on_event("shutdown")
 async def shutdown_event_trigger():
     shutdown_event.set()
-    await redis_client.close()
+    await workers.drain()
+    await qdrant_writer.close()
+    await close_async_redis()
 
 
 @app.get("/health")
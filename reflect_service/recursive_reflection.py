@@ -8,7 +8,7 @@ import os
 
 import openai
 
-from shared.qdrant_client import insert_embedding_with_stage
+from shared.qdrant_client import queue_embedding_with_stage
 from .schemas import ReflectionRequest, ReflectionResponse
 
 # In-memory store of past reflection requests
@@ -72,7 +72,7 @@ def _process_level(
         "gravity_score": score,
         "timestamp": datetime.utcnow().isoformat(),
     }
-    insert_embedding_with_stage("well_docs", embedding, payload)
+    queue_embedding_with_stage("well_docs", embedding, payload)
     return ReflectionResponse(
         reflection_level=level,
         summary=summary,
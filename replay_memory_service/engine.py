@@ -0,0 +1,243 @@
+# engine.py
+"""Concurrent, rate-controlled replay sessions.
+
+Every replay runs as its own asyncio task with its own pacing:
+
+* ``realtime`` keeps the original spacing between entry timestamps,
+* a number (``speed: 60``) compresses that spacing N times,
+* ``max`` emits as fast as possible, capped at ``max_rate`` entries/second.
+
+Entries that are due at the same moment are published through one Redis
+pipeline, so a fast replay costs one round trip per batch rather than per
+entry. Sessions can be paused, resumed and cancelled by id.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from memory_log import parse_timestamp
+from shared.logger import logger
+
+MEMORY_REPLAY_CHANNEL = os.getenv("MEMORY_REPLAY_CHANNEL", "memory_replay_channel")
+REPLAY_STATUS_CHANNEL = os.getenv("REPLAY_STATUS_CHANNEL", "replay_status_channel")
+REPLAY_BATCH_SIZE = int(os.getenv("REPLAY_BATCH_SIZE", "100"))
+REPLAY_MAX_RATE = float(os.getenv("REPLAY_MAX_RATE", "100"))
+# Entries due within this many seconds of now join the pending pipeline.
+SCHEDULE_SLACK = 0.01
+
+
+async def aiter_sync(iterator: Iterator[Dict], chunk: int = REPLAY_BATCH_SIZE):
+    """Drain a blocking iterator in a worker thread, ``chunk`` items at a time."""
+    while True:
+        items = await asyncio.to_thread(list, itertools.islice(iterator, chunk))
+        if not items:
+            return
+        for item in items:
+            yield item
+
+
+@dataclass
+class ReplaySession:
+    source: AsyncIterator[Dict[str, Any]]
+    speed: Optional[float] = None  # None -> as fast as max_rate allows
+    max_rate: Optional[float] = REPLAY_MAX_RATE
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    state: str = "pending"
+    emitted: int = 0
+    started_at: Optional[float] = None
+    task: Optional[asyncio.Task] = None
+    _resume: asyncio.Event = field(default_factory=asyncio.Event)
+    _pause: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def __post_init__(self) -> None:
+        self._resume.set()
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.id,
+            "state": self.state,
+            "emitted": self.emitted,
+            "speed": "realtime" if self.speed == 1 else self.speed or "max",
+            "max_rate": self.max_rate,
+        }
+
+
+def parse_speed(value) -> Optional[float]:
+    """``realtime`` -> 1.0, ``max``/missing -> None, numbers -> N× compression."""
+    if value in (None, "max"):
+        return None
+    if value == "realtime":
+        return 1.0
+    speed = float(value)
+    if speed <= 0:
+        raise ValueError("speed must be positive")
+    return speed
+
+
+async def _held(resume: asyncio.Event) -> float:
+    """Wait until ``resume`` is set; return how long that took."""
+    paused_at = time.monotonic()
+    await resume.wait()
+    return time.monotonic() - paused_at
+
+
+async def paced(
+    source: AsyncIterator[Dict[str, Any]],
+    speed: Optional[float] = None,
+    max_rate: Optional[float] = None,
+    resume: Optional[asyncio.Event] = None,
+    pause: Optional[asyncio.Event] = None,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield batches of entries from ``source`` as they fall due.
+
+    Entries that are already due (or due within ``SCHEDULE_SLACK``) are
+    grouped into one batch, so consumers can send them in one round trip.
+    Clearing ``resume`` pauses the schedule without losing its place; setting
+    ``pause`` as well also cuts short the wait for the next entry, so a slow
+    replay stops at once instead of after its next emit.
+    """
+    wall_start = time.monotonic()
+    paused_for = 0.0
+    first_ts: Optional[float] = None
+    sent = 0
+    batch: List[Dict[str, Any]] = []
+
+    async for entry in source:
+        if resume is not None and not resume.is_set():
+            if batch:
+                yield batch
+                sent += len(batch)
+                batch = []
+            paused_for += await _held(resume)
+
+        due = 0.0
+        if speed is not None:
+            ts = parse_timestamp(entry.get("timestamp"))
+            first_ts = ts if first_ts is None else first_ts
+            due = max(ts - first_ts, 0.0) / speed
+        if max_rate:
+            due = max(due, (sent + len(batch)) / max_rate)
+
+        elapsed = time.monotonic() - wall_start - paused_for
+        full = len(batch) >= REPLAY_BATCH_SIZE
+        if batch and (full or due > elapsed + SCHEDULE_SLACK):
+            yield batch
+            sent += len(batch)
+            batch = []
+            elapsed = time.monotonic() - wall_start - paused_for
+        while not batch and due > elapsed:
+            if pause is None or resume is None:
+                await asyncio.sleep(due - elapsed)
+                break
+            try:
+                await asyncio.wait_for(pause.wait(), due - elapsed)
+            except asyncio.TimeoutError:
+                break
+            paused_for += await _held(resume)
+            elapsed = time.monotonic() - wall_start - paused_for
+        batch.append(entry)
+
+    if batch:
+        yield batch
+
+
+class ReplayEngine:
+    def __init__(self, redis_client, channel: str = MEMORY_REPLAY_CHANNEL) -> None:
+        self.redis = redis_client
+        self.channel = channel
+        self.sessions: Dict[str, ReplaySession] = {}
+
+    # -- control -------------------------------------------------------------
+
+    def start(self, session: ReplaySession) -> ReplaySession:
+        if session.id in self.sessions:
+            raise ValueError(f"Session {session.id} is already running")
+        self.sessions[session.id] = session
+        session.task = asyncio.create_task(self._run(session))
+        return session
+
+    async def pause(self, session_id: str) -> None:
+        session = self.sessions[session_id]
+        if session.state == "running":
+            session._resume.clear()
+            session._pause.set()
+            session.state = "paused"
+            await self._status(session)
+
+    async def resume(self, session_id: str) -> None:
+        session = self.sessions[session_id]
+        if session.state == "paused":
+            session.state = "running"
+            session._pause.clear()
+            session._resume.set()
+            await self._status(session)
+
+    async def cancel(self, session_id: str) -> None:
+        session = self.sessions[session_id]
+        if session.task and not session.task.done():
+            session.task.cancel()
+        if session.state == "pending":
+            # _run never started, so its cleanup will not run either.
+            session.state = "cancelled"
+            self.sessions.pop(session.id, None)
+            await self._status(session)
+
+    async def shutdown(self) -> None:
+        for session_id in list(self.sessions):
+            await self.cancel(session_id)
+        tasks = [s.task for s in self.sessions.values() if s.task]
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def describe(self) -> List[Dict[str, Any]]:
+        return [s.describe() for s in self.sessions.values()]
+
+    # -- pacing ----------------------------------------------------------------
+
+    async def _publish(self, batch: List[Dict[str, Any]]) -> None:
+        pipe = self.redis.pipeline(transaction=False)
+        for entry in batch:
+            message = json.dumps({**entry, "replayed": True}, default=str)
+            pipe.publish(self.channel, message)
+        await pipe.execute()
+
+    async def _status(self, session: ReplaySession) -> None:
+        try:
+            status = json.dumps(session.describe())
+            await self.redis.publish(REPLAY_STATUS_CHANNEL, status)
+        except Exception as e:
+            logger.error(f"[REPLAY] Failed to publish session status: {e}")
+
+    async def _run(self, session: ReplaySession) -> None:
+        session.state = "running"
+        session.started_at = time.monotonic()
+        await self._status(session)
+
+        try:
+            async for batch in paced(
+                session.source,
+                session.speed,
+                session.max_rate,
+                session._resume,
+                session._pause,
+            ):
+                await self._publish(batch)
+                session.emitted += len(batch)
+            session.state = "finished"
+        except asyncio.CancelledError:
+            session.state = "cancelled"
+        except Exception as e:
+            session.state = "failed"
+            logger.error(f"[REPLAY] Session {session.id} failed: {e}")
+        finally:
+            logger.info(
+                f"[REPLAY] Session {session.id} {session.state} "
+                f"after {session.emitted} entries"
+            )
+            await self._status(session)
+            self.sessions.pop(session.id, None)
@@ -1,26 +1,62 @@
 # listeners.py
-from shared.redis_utils import subscribe, publish
 from shared.logger import logger
-from storage import load_memory
-import json, time
+from shared.redis_utils import alisten
+from memory_log import parse_timestamp
+from engine import ReplayEngine, ReplaySession, parse_speed
+from sources import ReplaySources
+import json
+import os
+import time
 
-def replay_listener():
-    pubsub = subscribe("replay_channel")
-    logger.info("[REPLAY] Subscribed to replay_channel")
+REPLAY_CHANNEL = os.getenv("REPLAY_CHANNEL", "replay_channel")
 
-    for message in pubsub.listen():
-        if message["type"] != "message":
-            continue
 
+def replay_window(data):
+    """Translate replay command fields into an epoch-seconds range."""
+    start = parse_timestamp(data["since"]) if data.get("since") else None
+    end = parse_timestamp(data["until"]) if data.get("until") else None
+    if data.get("last_seconds"):
+        start = time.time() - float(data["last_seconds"])
+    return start, end
+
+
+def build_session(data, sources: ReplaySources) -> ReplaySession:
+    start, end = replay_window(data)
+    source = sources.open(data, start, end)
+    session = ReplaySession(source=source, speed=parse_speed(data.get("speed")))
+    if "max_rate" in data:
+        session.max_rate = float(data["max_rate"]) if data["max_rate"] else None
+    if data.get("session_id"):
+        session.id = str(data["session_id"])
+    return session
+
+
+async def handle_command(engine: ReplayEngine, sources: ReplaySources, data) -> None:
+    cmd = data.get("command", "")
+    if cmd == "replay":
+        if data.get("session_id") and str(data["session_id"]) in engine.sessions:
+            logger.warning(f"[REPLAY] Session {data['session_id']} already exists")
+            return
+        session = engine.start(build_session(data, sources))
+        logger.info(f"[REPLAY] Started session {session.id}")
+    elif cmd in ("pause", "resume", "cancel"):
+        session_id = data.get("session_id")
+        if session_id not in engine.sessions:
+            logger.warning(f"[REPLAY] Unknown session for {cmd}: {session_id}")
+            return
+        await getattr(engine, cmd)(session_id)
+        logger.info(f"[REPLAY] {cmd} session {session_id}")
+    else:
+        logger.warning(f"[REPLAY] Unknown command: {cmd}")
+
+
+async def replay_listener(engine: ReplayEngine, sources: ReplaySources, shutdown_event):
+    logger.info(f"[REPLAY] Subscribing to {REPLAY_CHANNEL}")
+    async for message in alisten(REPLAY_CHANNEL, shutdown_event):
+        if not message:
+            continue
         try:
-            data = json.loads(message["data"])
-            if data.get("command") == "replay":
-                logger.info("[REPLAY] Command received: replay")
-                entries = load_memory(filter_truth=True)
-                for entry in entries:
-                    publish("memory_replay_channel", entry.dict())
-                    logger.info(f"[REPLAY] Emitted memory: {entry.timestamp}")
-                    time.sleep(0.5)
+            await handle_command(engine, sources, json.loads(message["data"]))
         except json.JSONDecodeError as e:
             logger.error(f"[REPLAY] JSON decode error: {e}")
         except Exception as e:
@@ -1,45 +1,155 @@
-from fastapi import FastAPI
-from shared.redis_utils import subscribe, publish
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from shared import profiling
+from shared.redis_utils import close_async_redis, get_async_redis, listen
 from shared.logger import logger
-import threading, json, time
+from shared.metrics import StageMetrics
+from shared.config import (
+    PGHOST,
+    PGPORT,
+    PGUSER,
+    PGPASSWORD,
+    PGDATABASE,
+)
+from memory_log import MemoryLogWriter
+from engine import ReplayEngine, parse_speed
+from listeners import replay_listener, replay_window
+from stream import pick_format, stream_replay
+from sources import ReplaySources
+from shared.qdrant_profiles import client_from_env
+from typing import Optional
+import asyncpg
+import asyncio
+import threading, json
 import os
 
 app = FastAPI()
-MEMORY_LOG = "/app/memory_log.jsonl"
-
-def load_memory(filter_truth=True):
-    if not os.path.exists(MEMORY_LOG):
-        return []
-    with open(MEMORY_LOG, "r") as f:
-        entries = [json.loads(line) for line in f if line.strip()]
-    if filter_truth:
-        return [e for e in entries if e.get("truth") is True]
-    return entries
-
-def listener():
-    pubsub = subscribe("replay_channel")
-    logger.info("[REPLAY] Subscribed to replay_channel")
-    for message in pubsub.listen():
-        if message["type"] == "message":
-            try:
-                data = json.loads(message["data"])
-                cmd = data.get("command", "")
-                if cmd == "replay":
-                    logger.info("[REPLAY] Command received: replay")
-                    entries = load_memory(filter_truth=True)
-                    for entry in entries:
-                        publish("memory_replay_channel", entry)
-                        logger.info(f"[REPLAY] Emitted memory: {entry}")
-                        time.sleep(0.5)  # Simulate temporal replay
-            except Exception as e:
-                logger.error(f"[REPLAY] Error processing message: {e}")
-
-threading.Thread(target=listener, daemon=True).start()
+profiling.mount(app)
+RECORD_CHANNEL = os.getenv("MEMORY_LOG_RECORD_CHANNEL", "")
+
+redis_client = get_async_redis()
+engine = ReplayEngine(redis_client)
+sources = ReplaySources(qdrant=client_from_env())
+shutdown_event = asyncio.Event()
+recorder_stop = threading.Event()
+stage_metrics = StageMetrics("replay")
+
+
+def recorder(channel: str):
+    """Append live memories from ``channel`` to the segmented memory log."""
+    writer = MemoryLogWriter()
+    logger.info(f"[REPLAY] Recording memories from {channel}")
+    for message in listen(channel, recorder_stop):
+        if not message:
+            continue
+        stage_metrics.messages_in.inc()
+        try:
+            data = json.loads(message["data"])
+            if not data.get("replayed"):
+                writer.append(data)
+        except Exception as e:
+            stage_metrics.dropped("error")
+            logger.error(f"[REPLAY] Failed to record memory: {e}")
+
+
+@app.on_event("startup")
+async def startup_event():
+    try:
+        sources.pg_pool = await asyncpg.create_pool(
+            host=PGHOST,
+            port=PGPORT,
+            user=PGUSER,
+            password=PGPASSWORD,
+            database=PGDATABASE,
+        )
+    except Exception as e:
+        logger.error(f"[REPLAY] Postgres unavailable, postgres source disabled: {e}")
+    asyncio.create_task(
+        replay_listener(engine, sources, shutdown_event)
+    )
+    stage_metrics.start_loop_monitor()
+    if RECORD_CHANNEL:
+        threading.Thread(target=recorder, args=(RECORD_CHANNEL,), daemon=True).start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event_trigger():
+    shutdown_event.set()
+    recorder_stop.set()
+    await engine.shutdown()
+    if sources.pg_pool is not None:
+        await sources.pg_pool.close()
+    await close_async_redis()
+
 
 @app.get("/")
 def healthcheck():
     return {"status": "replay_memory_service active"}
 
+
+@app.get("/replay/sessions")
+def replay_sessions():
+    return engine.describe()
+
+
+@app.get("/replay/stream")
+async def replay_stream(
+    request: Request,
+    source: str = "log",
+    format: Optional[str] = None,
+    speed: Optional[str] = None,
+    max_rate: Optional[float] = Query(None, gt=0),
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    last_seconds: Optional[float] = Query(None, gt=0),
+    truth: bool = True,
+    well_id: Optional[str] = None,
+    field: Optional[str] = None,
+    district: Optional[str] = None,
+    stage: Optional[str] = None,
+    layer: Optional[str] = None,
+    collection: Optional[str] = None,
+    like_id: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=10000),
+    score_threshold: Optional[float] = None,
+):
+    """Stream matching memories to this client only; ``speed`` and
+    ``max_rate`` pace the replay like a bus session, by default it runs as
+    fast as the client reads."""
+    data = {
+        "source": source,
+        "since": since,
+        "until": until,
+        "last_seconds": last_seconds,
+        "truth": truth,
+        "filters": {
+            "well_id": well_id,
+            "field": field,
+            "district": district,
+            "stage": stage,
+            "layer": layer,
+        },
+        "like_id": like_id,
+        "limit": limit,
+        "score_threshold": score_threshold,
+    }
+    if collection:
+        data["collection"] = collection
+    try:
+        media_type = pick_format(format, request.headers.get("accept", ""))
+        start, end = replay_window(data)
+        entries = sources.open(data, start, end)
+        pace = parse_speed(speed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    logger.info(f"[REPLAY] Streaming {source} replay as {media_type}")
+    return StreamingResponse(
+        stream_replay(entries, media_type, pace, max_rate, request.is_disconnected),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 import uvicorn
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000)
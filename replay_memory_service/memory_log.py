@@ -0,0 +1,369 @@
+# memory_log.py
+"""Append-only, segmented memory log with a sidecar offset index.
+
+Entries are JSON lines written to numbered segments
+(``memory_log.000001.jsonl``). Each segment has a ``.idx`` sidecar holding
+one fixed-size record per line: the entry timestamp, the byte offset of the
+line and its truth flag. Full segments are rotated and gzip-compressed; the
+index keeps pointing at offsets in the uncompressed stream.
+
+Readers use the index to skip whole segments outside the requested time
+range, bisect to the first matching line and only parse lines that pass the
+time and truth filters, so replaying the last hour of a large log does not
+touch the rest of it. A plain ``memory_log.jsonl`` from older releases is
+read the same way; its index is built on first use.
+"""
+
+import bisect
+import gzip
+import json
+import mmap
+import os
+import re
+import shutil
+import struct
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# timestamp (epoch seconds), line offset, truth flag
+INDEX_RECORD = struct.Struct("<dQB")
+SEGMENT_RE = re.compile(r"^(?P<prefix>.+)\.(?P<seq>\d{6})\.jsonl(?P<gz>\.gz)?$")
+
+MEMORY_LOG = os.getenv("MEMORY_LOG", "/app/memory_log.jsonl")
+MEMORY_LOG_DIR = os.getenv("MEMORY_LOG_DIR", "/app/memory_log")
+SEGMENT_MAX_BYTES = int(os.getenv("MEMORY_LOG_SEGMENT_BYTES", str(64 * 1024 * 1024)))
+
+
+def parse_timestamp(value) -> float:
+    """Return epoch seconds for an ISO timestamp, treating naive values as UTC."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        try:
+            dt = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return 0.0
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def index_path(segment: str) -> str:
+    base = segment[:-3] if segment.endswith(".gz") else segment
+    return base + ".idx"
+
+
+class SegmentIndex:
+    """Offsets, timestamps and truth flags for one segment."""
+
+    def __init__(
+        self, timestamps: List[float], offsets: List[int], truths: List[int]
+    ) -> None:
+        self.timestamps: List[float] = []
+        self.offsets: List[int] = []
+        self.truths: List[int] = []
+        self.ordered = True
+        self._first = self._last = 0.0
+        self.extend(timestamps, offsets, truths)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def extend(
+        self, timestamps: List[float], offsets: List[int], truths: List[int]
+    ) -> None:
+        """Append records; existing positions stay valid for running readers."""
+        if not timestamps:
+            return
+        if self.timestamps:
+            self.ordered = self.ordered and self.timestamps[-1] <= timestamps[0]
+            self._first = min(self._first, min(timestamps))
+            self._last = max(self._last, max(timestamps))
+        else:
+            self._first, self._last = min(timestamps), max(timestamps)
+        self.ordered = self.ordered and all(
+            a <= b for a, b in zip(timestamps, timestamps[1:])
+        )
+        self.timestamps.extend(timestamps)
+        self.offsets.extend(offsets)
+        self.truths.extend(truths)
+
+    @property
+    def span(self) -> Tuple[float, float]:
+        return (self._first, self._last)
+
+    def positions(
+        self, start: Optional[float], end: Optional[float], truth: Optional[bool]
+    ) -> Iterator[int]:
+        """Yield positions of records matching the filters, in log order."""
+        lo, hi = 0, len(self)
+        if self.ordered:
+            if start is not None:
+                lo = bisect.bisect_left(self.timestamps, start)
+            if end is not None:
+                hi = bisect.bisect_right(self.timestamps, end)
+        for pos in range(lo, hi):
+            ts = self.timestamps[pos]
+            if start is not None and ts < start:
+                continue
+            if end is not None and ts > end:
+                continue
+            if truth is not None and bool(self.truths[pos]) != truth:
+                continue
+            yield pos
+
+
+def _record(entry: Dict, offset: int) -> bytes:
+    truth = 1 if entry.get("truth") is True else 0
+    return INDEX_RECORD.pack(parse_timestamp(entry.get("timestamp")), offset, truth)
+
+
+def _open_segment(path: str):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def _scan(path: str, offset: int) -> bytes:
+    """Index lines of ``path`` starting at ``offset``."""
+    records = bytearray()
+    with _open_segment(path) as f:
+        f.seek(offset)
+        for line in f:
+            if line.strip():
+                try:
+                    records += _record(json.loads(line), offset)
+                except (ValueError, AttributeError):
+                    pass
+            offset += len(line)
+    return bytes(records)
+
+
+class _Cached:
+    """A segment's parsed index and how much of the segment it covers."""
+
+    def __init__(self) -> None:
+        self.key: Tuple[int, float] = (-1, 0.0)
+        self.index = SegmentIndex([], [], [])
+        self.index_bytes = 0  # bytes of the sidecar already parsed
+        self.covered = 0  # segment bytes the index reaches
+
+
+_index_cache: Dict[str, _Cached] = {}
+_index_lock = threading.Lock()
+
+
+def _line_end(segment: str, offset: int) -> int:
+    with _open_segment(segment) as f:
+        f.seek(offset)
+        return offset + len(f.readline())
+
+
+def load_index(segment: str) -> SegmentIndex:
+    """Load the sidecar index of ``segment``, building or extending it first
+    when the segment has lines the index does not cover yet.
+
+    The parsed index is cached per segment and only the sidecar records and
+    segment lines added since the last call are read, so reading a live
+    segment that is being appended to stays cheap.
+    """
+    stat = os.stat(segment)
+    key = (stat.st_size, stat.st_mtime)
+    with _index_lock:
+        cached = _index_cache.get(segment)
+        if cached is None or stat.st_size < cached.key[0]:
+            # New, or rewritten from scratch since it was cached.
+            cached = _index_cache[segment] = _Cached()
+        if cached.key == key:
+            return cached.index
+
+        idx_file = index_path(segment)
+        data = b""
+        if os.path.exists(idx_file):
+            with open(idx_file, "rb") as f:
+                f.seek(cached.index_bytes)
+                data = f.read()
+            data = data[: len(data) - len(data) % INDEX_RECORD.size]
+        cached.index_bytes += len(data)
+
+        # Compressed segments are sealed at rotation with a complete index;
+        # only the live segment (or a legacy file) can have lines past it.
+        sealed = segment.endswith(".gz") and (data or len(cached.index))
+        if data and not sealed:
+            last = len(data) - INDEX_RECORD.size
+            _, last_offset, _ = INDEX_RECORD.unpack_from(data, last)
+            cached.covered = _line_end(segment, last_offset)
+        if not sealed and cached.covered < stat.st_size:
+            extra = _scan(segment, cached.covered)
+            if extra:
+                try:
+                    with open(idx_file, "ab") as f:
+                        f.write(extra)
+                    cached.index_bytes += len(extra)
+                except OSError:
+                    # Read-only mounts still get an in-process index.
+                    pass
+                data += extra
+                _, last_offset, _ = INDEX_RECORD.unpack_from(
+                    extra, len(extra) - INDEX_RECORD.size
+                )
+                cached.covered = _line_end(segment, last_offset)
+
+        timestamps, offsets, truths = [], [], []
+        for ts, offset, truth in INDEX_RECORD.iter_unpack(data):
+            timestamps.append(ts)
+            offsets.append(offset)
+            truths.append(truth)
+        cached.index.extend(timestamps, offsets, truths)
+        cached.key = key
+        return cached.index
+
+
+def list_segments(
+    directory: str = MEMORY_LOG_DIR, legacy: Optional[str] = MEMORY_LOG
+) -> List[str]:
+    """Return readable segments oldest first, the legacy log leading."""
+    segments = []
+    if legacy and os.path.exists(legacy):
+        segments.append(legacy)
+    if directory and os.path.isdir(directory):
+        numbered: Dict[Tuple[str, int], str] = {}
+        for name in os.listdir(directory):
+            match = SEGMENT_RE.match(name)
+            if not match:
+                continue
+            key = (match.group("prefix"), int(match.group("seq")))
+            # A crash after compressing but before removing the plain file
+            # leaves both; the .gz is only in place once it is complete.
+            if match.group("gz") or key not in numbered:
+                numbered[key] = os.path.join(directory, name)
+        ordered = sorted(numbered.items(), key=lambda item: (item[0][1], item[0][0]))
+        segments.extend(path for _, path in ordered)
+    return segments
+
+
+def _read_lines(
+    segment: str, index: SegmentIndex, positions: Iterator[int]
+) -> Iterator[bytes]:
+    if segment.endswith(".gz"):
+        with gzip.open(segment, "rb") as f:
+            for pos in positions:
+                f.seek(index.offsets[pos])
+                yield f.readline()
+        return
+
+    if os.path.getsize(segment) == 0:
+        return
+    with open(segment, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm:
+        for pos in positions:
+            offset = index.offsets[pos]
+            end = mm.find(b"\n", offset)
+            yield mm[offset : len(mm) if end == -1 else end]
+
+
+def iter_memory(
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    truth: Optional[bool] = None,
+    segments: Optional[List[str]] = None,
+) -> Iterator[Dict]:
+    """Stream log entries with ``start <= timestamp <= end`` (epoch seconds).
+
+    ``truth=True`` keeps only entries flagged as truth; ``None`` keeps all.
+    """
+    for segment in segments if segments is not None else list_segments():
+        index = load_index(segment)
+        if not len(index):
+            continue
+        first, last = index.span
+        if (start is not None and last < start) or (end is not None and first > end):
+            continue
+        for line in _read_lines(segment, index, index.positions(start, end, truth)):
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+class MemoryLogWriter:
+    """Append entries to rotating, compressed segments of the memory log."""
+
+    def __init__(
+        self,
+        directory: str = MEMORY_LOG_DIR,
+        prefix: str = "memory_log",
+        max_bytes: int = SEGMENT_MAX_BYTES,
+        compress: bool = True,
+    ) -> None:
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        existing = [
+            int(m.group("seq"))
+            for name in os.listdir(directory)
+            if (m := SEGMENT_RE.match(name)) and m.group("prefix") == prefix
+        ]
+        self.seq = max(existing, default=0)
+        if self.seq == 0:
+            self.seq = 1
+        elif os.path.exists(self._path(self.seq) + ".gz"):
+            self._finish_rotation(self.seq)
+            self.seq += 1
+        self._open()
+
+    def _path(self, seq: int) -> str:
+        return os.path.join(self.directory, f"{self.prefix}.{seq:06d}.jsonl")
+
+    def _open(self) -> None:
+        path = self._path(self.seq)
+        if os.path.exists(path):
+            # Make sure the sidecar covers lines written before a crash.
+            load_index(path)
+        self._data = open(path, "ab")
+        self._index = open(index_path(path), "ab")
+        self.size = self._data.tell()
+
+    def append(self, entry: Dict) -> None:
+        line = (json.dumps(entry, separators=(",", ":"), default=str) + "\n").encode()
+        with self._lock:
+            offset = self.size
+            self._data.write(line)
+            self._data.flush()
+            self._index.write(_record(entry, offset))
+            self._index.flush()
+            self.size += len(line)
+            if self.size >= self.max_bytes:
+                self._rotate()
+
+    def _finish_rotation(self, seq: int) -> None:
+        """Drop what a rotation interrupted after its .gz was in place."""
+        path = self._path(seq)
+        for leftover in (path, path + ".gz.tmp"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    def _rotate(self) -> None:
+        self._data.close()
+        self._index.close()
+        path = self._path(self.seq)
+        if self.compress:
+            # Readers never see a partial .gz: it only appears once complete.
+            tmp = path + ".gz.tmp"
+            with open(path, "rb") as src, gzip.open(tmp, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(tmp, path + ".gz")
+            os.remove(path)
+        self.seq += 1
+        self._open()
+
+    def close(self) -> None:
+        with self._lock:
+            self._data.close()
+            self._index.close()
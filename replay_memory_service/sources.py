@@ -0,0 +1,267 @@
+# sources.py
+"""Streaming replay sources backed by Postgres and Qdrant.
+
+Each source is an async generator that pages through its store (keyset
+pagination on ``(timestamp, id)`` for Postgres, scroll offsets or search
+pages for Qdrant) so a replay never holds more than a page or two in
+memory. :func:`prefetch` overlaps fetching the next page with publishing
+the current one.
+"""
+
+import asyncio
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from engine import aiter_sync
+from memory_log import iter_memory
+
+REPLAY_PAGE_SIZE = int(os.getenv("REPLAY_PAGE_SIZE", "500"))
+EMBEDDINGS_COLLECTION = os.getenv("QDRANT_COLLECTION", "genio_embeddings")
+FILTER_FIELDS = ("well_id", "field", "district", "stage", "layer")
+
+
+def _as_datetime(epoch: Optional[float]) -> Optional[datetime]:
+    return None if epoch is None else datetime.fromtimestamp(epoch, tz=timezone.utc)
+
+
+def clean_filters(filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    filters = filters or {}
+    return {k: filters[k] for k in FILTER_FIELDS if filters.get(k) is not None}
+
+
+async def postgres_source(
+    pool,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    page_size: int = REPLAY_PAGE_SIZE,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Stream rows of ``embeddings`` in timestamp order."""
+    conditions, args = ["metadata @> $1::jsonb"], [json.dumps(clean_filters(filters))]
+    if start is not None:
+        args.append(_as_datetime(start))
+        conditions.append(f"timestamp >= ${len(args)}")
+    if end is not None:
+        args.append(_as_datetime(end))
+        conditions.append(f"timestamp <= ${len(args)}")
+    where = " AND ".join(conditions)
+    n = len(args)
+
+    first_page = (
+        f"SELECT id, uuid, timestamp, metadata FROM embeddings WHERE {where} "
+        f"ORDER BY timestamp, id LIMIT ${n + 1}"
+    )
+    next_page = (
+        f"SELECT id, uuid, timestamp, metadata FROM embeddings WHERE {where} "
+        f"AND (timestamp, id) > (${n + 1}, ${n + 2}) "
+        f"ORDER BY timestamp, id LIMIT ${n + 3}"
+    )
+
+    cursor = None
+    while True:
+        async with pool.acquire() as conn:
+            if cursor is None:
+                rows = await conn.fetch(first_page, *args, page_size)
+            else:
+                rows = await conn.fetch(next_page, *args, *cursor, page_size)
+        for row in rows:
+            metadata = row["metadata"]
+            if isinstance(metadata, str):
+                metadata = json.loads(metadata)
+            metadata = metadata or {}
+            yield {
+                "tokens": [],
+                **metadata,
+                "uuid": row["uuid"],
+                "metadata_id": row["id"],
+                "timestamp": row["timestamp"].isoformat(),
+            }
+        if len(rows) < page_size:
+            return
+        cursor = (rows[-1]["timestamp"], rows[-1]["id"])
+
+
+def qdrant_filter(
+    filters: Optional[Dict[str, Any]],
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+) -> Optional[models.Filter]:
+    must: List[models.Condition] = [
+        models.FieldCondition(key=key, match=models.MatchValue(value=value))
+        for key, value in clean_filters(filters).items()
+    ]
+    if start is not None or end is not None:
+        must.append(
+            models.FieldCondition(
+                key="timestamp",
+                range=models.DatetimeRange(
+                    gte=_as_datetime(start), lte=_as_datetime(end)
+                ),
+            )
+        )
+    return models.Filter(must=must) if must else None
+
+
+def _point_entry(point) -> Dict[str, Any]:
+    entry = {"tokens": [], **(point.payload or {}), "uuid": str(point.id)}
+    score = getattr(point, "score", None)
+    if score is not None:
+        entry["score"] = score
+    return entry
+
+
+async def qdrant_source(
+    client: QdrantClient,
+    collection: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    page_size: int = REPLAY_PAGE_SIZE,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Scroll every point of ``collection`` matching the filters."""
+    query_filter = qdrant_filter(filters, start, end)
+    offset = None
+    while True:
+        points, offset = await asyncio.to_thread(
+            client.scroll,
+            collection_name=collection,
+            scroll_filter=query_filter,
+            limit=page_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False,
+        )
+        for point in points:
+            yield _point_entry(point)
+        if offset is None:
+            return
+
+
+async def similar_source(
+    client: QdrantClient,
+    collection: str,
+    vector: Optional[List[float]] = None,
+    like_id: Optional[str] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    limit: int = 100,
+    score_threshold: Optional[float] = None,
+    page_size: int = REPLAY_PAGE_SIZE,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Stream up to ``limit`` memories most similar to ``vector`` or to the
+    stored point ``like_id``, best match first."""
+    if vector is None:
+        if like_id is None:
+            raise ValueError("similarity replay needs 'vector' or 'like_id'")
+        points = await asyncio.to_thread(
+            client.retrieve,
+            collection_name=collection,
+            ids=[like_id],
+            with_vectors=True,
+        )
+        if not points:
+            raise ValueError(f"point {like_id} not found in {collection}")
+        vector = points[0].vector
+
+    query_filter = qdrant_filter(filters, start, end)
+    offset = 0
+    while offset < limit:
+        hits = await asyncio.to_thread(
+            client.search,
+            collection_name=collection,
+            query_vector=vector,
+            query_filter=query_filter,
+            limit=min(page_size, limit - offset),
+            offset=offset,
+            score_threshold=score_threshold,
+            with_payload=True,
+            with_vectors=False,
+        )
+        for hit in hits:
+            yield _point_entry(hit)
+        if len(hits) < min(page_size, limit - offset):
+            return
+        offset += len(hits)
+
+
+_DONE = object()
+
+
+async def prefetch(
+    source: AsyncIterator[Dict[str, Any]], depth: int = REPLAY_PAGE_SIZE * 2
+) -> AsyncIterator[Dict[str, Any]]:
+    """Read ``source`` ahead into a bounded queue from a background task."""
+    queue: asyncio.Queue = asyncio.Queue(maxsize=depth)
+
+    async def produce() -> None:
+        try:
+            async for item in source:
+                await queue.put(item)
+            await queue.put(_DONE)
+        except Exception as e:  # surfaced to the consumer below
+            await queue.put(e)
+
+    task = asyncio.create_task(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        task.cancel()
+
+
+class ReplaySources:
+    """Open the replay source a command asks for."""
+
+    def __init__(self, pg_pool=None, qdrant: Optional[QdrantClient] = None) -> None:
+        self.pg_pool = pg_pool
+        self.qdrant = qdrant
+
+    def open(
+        self,
+        data: Dict[str, Any],
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        kind = data.get("source", "log")
+        filters = data.get("filters")
+        collection = data.get("collection", EMBEDDINGS_COLLECTION)
+
+        if data.get("vector") is not None or data.get("like_id") is not None:
+            kind = "similar"
+        if kind == "log":
+            truth = True if data.get("truth", True) else None
+            return aiter_sync(iter_memory(start=start, end=end, truth=truth))
+        if kind == "postgres":
+            if self.pg_pool is None:
+                raise ValueError("Postgres replay source is not available")
+            return prefetch(postgres_source(self.pg_pool, start, end, filters))
+        if self.qdrant is None:
+            raise ValueError("Qdrant replay source is not available")
+        if kind == "qdrant":
+            return prefetch(qdrant_source(self.qdrant, collection, start, end, filters))
+        if kind == "similar":
+            return prefetch(
+                similar_source(
+                    self.qdrant,
+                    collection,
+                    vector=data.get("vector"),
+                    like_id=data.get("like_id"),
+                    start=start,
+                    end=end,
+                    filters=filters,
+                    limit=int(data.get("limit", 100)),
+                    score_threshold=data.get("score_threshold"),
+                )
+            )
+        raise ValueError(f"Unknown replay source: {kind}")
@@ -1,16 +1,15 @@
 # storage.py
-import os
-import json
 from schemas import MemoryEntry
-from typing import List
+from memory_log import iter_memory
+from typing import Iterator, Optional
 
-MEMORY_LOG = "/app/memory_log.jsonl"
 
-def load_memory(filter_truth: bool = True) -> List[MemoryEntry]:
-    if not os.path.exists(MEMORY_LOG):
-        return []
-    with open(MEMORY_LOG, "r") as f:
-        entries = [MemoryEntry(**json.loads(line)) for line in f if line.strip()]
-    if filter_truth:
-        return [entry for entry in entries if entry.truth]
-    return entries
+def load_memory(
+    filter_truth: bool = True,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+) -> Iterator[MemoryEntry]:
+    """Stream memory log entries between ``start`` and ``end`` (epoch seconds)."""
+    truth = True if filter_truth else None
+    for entry in iter_memory(start=start, end=end, truth=truth):
+        yield MemoryEntry(**entry)
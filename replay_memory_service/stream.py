@@ -0,0 +1,62 @@
+# stream.py
+"""Replay memories straight to an HTTP client as SSE or NDJSON.
+
+A streamed replay is private to the connection: nothing is published on the
+shared bus. The response body is an async generator, so the next batch is
+only read from the source once the previous one has been written to the
+socket, and a slow client slows its own replay down instead of buffering it.
+"""
+
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from engine import paced
+
+NDJSON = "application/x-ndjson"
+SSE = "text/event-stream"
+FORMATS = {"ndjson": NDJSON, "sse": SSE}
+
+
+def pick_format(requested: Optional[str], accept: str = "") -> str:
+    """Resolve ``?format=`` or the ``Accept`` header to a media type."""
+    if requested:
+        if requested not in FORMATS:
+            raise ValueError(f"format must be one of {sorted(FORMATS)}")
+        return FORMATS[requested]
+    return SSE if SSE in (accept or "") else NDJSON
+
+
+def _dumps(entry: Dict[str, Any]) -> str:
+    return json.dumps(entry, separators=(",", ":"), default=str)
+
+
+def encode(entry: Dict[str, Any], media_type: str, seq: int) -> str:
+    if media_type == SSE:
+        return f"id: {seq}\nevent: memory\ndata: {_dumps(entry)}\n\n"
+    return _dumps(entry) + "\n"
+
+
+async def stream_replay(
+    source: AsyncIterator[Dict[str, Any]],
+    media_type: str,
+    speed: Optional[float] = None,
+    max_rate: Optional[float] = None,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+) -> AsyncIterator[str]:
+    """Yield one response chunk per due batch of ``source``."""
+    seq = 0
+    try:
+        async for batch in paced(source, speed, max_rate):
+            if is_disconnected is not None and await is_disconnected():
+                return
+            chunk = []
+            for entry in batch:
+                seq += 1
+                chunk.append(encode(entry, media_type, seq))
+            yield "".join(chunk)
+        if media_type == SSE:
+            yield f"event: end\ndata: {_dumps({'count': seq})}\n\n"
+    finally:
+        aclose = getattr(source, "aclose", None)
+        if aclose is not None:
+            await aclose()
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import os
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+# The service imports its modules as siblings, as it does inside /app.
+sys.path.insert(0, os.path.join(ROOT, "replay_memory_service"))
+
+import pytest
+
+from engine import REPLAY_STATUS_CHANNEL, ReplayEngine, ReplaySession, paced
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis") -> None:
+        self.redis = redis
+        self.queued = []
+
+    def publish(self, channel, message):
+        self.queued.append((channel, message))
+
+    async def execute(self):
+        self.redis.round_trips += 1
+        self.redis.published.extend(self.queued)
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.published = []
+        self.round_trips = 0
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+
+    def statuses(self):
+        return [
+            json.loads(m)["state"]
+            for channel, m in self.published
+            if channel == REPLAY_STATUS_CHANNEL
+        ]
+
+    def entries(self, channel="replay_test"):
+        return [json.loads(m) for c, m in self.published if c == channel]
+
+
+async def source(n: int, gap: float = 0.0):
+    for i in range(n):
+        if gap:
+            await asyncio.sleep(gap)
+        yield {"i": i, "timestamp": 1_700_000_000 + i}
+
+
+def test_fast_replay_publishes_batches() -> None:
+    redis = FakeRedis()
+
+    async def scenario():
+        engine = ReplayEngine(redis, channel="replay_test")
+        session = engine.start(ReplaySession(source=source(250), max_rate=None))
+        await session.task
+        return engine, session
+
+    engine, session = asyncio.run(scenario())
+    assert session.state == "finished" and session.emitted == 250
+    assert [e["i"] for e in redis.entries()] == list(range(250))
+    assert all(e["replayed"] for e in redis.entries())
+    assert redis.round_trips == 3  # batches of REPLAY_BATCH_SIZE
+    assert redis.statuses() == ["running", "finished"]
+    assert engine.sessions == {}
+
+
+def test_realtime_speed_keeps_spacing() -> None:
+    async def scenario():
+        entries = [{"timestamp": 0}, {"timestamp": 1}, {"timestamp": 2}]
+
+        async def src():
+            for entry in entries:
+                yield entry
+
+        loop = asyncio.get_running_loop()
+        start, times = loop.time(), []
+        async for batch in paced(src(), speed=20):
+            times.append(loop.time() - start)
+        return times
+
+    times = asyncio.run(scenario())
+    assert times[1] == pytest.approx(0.05, abs=0.03)
+    assert times[2] == pytest.approx(0.1, abs=0.03)
+
+
+def test_pause_resume_and_cancel() -> None:
+    redis = FakeRedis()
+
+    async def scenario():
+        engine = ReplayEngine(redis, channel="replay_test")
+        session = engine.start(ReplaySession(source=source(1000, gap=0.001)))
+        await asyncio.sleep(0.02)
+        await engine.pause(session.id)
+        await asyncio.sleep(0.01)
+        paused_at = len(redis.entries())
+        await asyncio.sleep(0.03)
+        assert len(redis.entries()) == paused_at
+        await engine.resume(session.id)
+        await asyncio.sleep(0.02)
+        await engine.cancel(session.id)
+        await asyncio.gather(session.task, return_exceptions=True)
+        return engine, session, paused_at
+
+    engine, session, paused_at = asyncio.run(scenario())
+    assert session.state == "cancelled"
+    assert paused_at < session.emitted < 1000
+    assert redis.statuses() == ["running", "paused", "running", "cancelled"]
+    assert engine.sessions == {}
+
+
+def test_cancel_before_the_session_starts() -> None:
+    redis = FakeRedis()
+
+    async def scenario():
+        engine = ReplayEngine(redis, channel="replay_test")
+        session = engine.start(ReplaySession(source=source(10)))
+        await engine.cancel(session.id)
+        await asyncio.gather(session.task, return_exceptions=True)
+        return engine, session
+
+    engine, session = asyncio.run(scenario())
+    assert session.state == "cancelled" and session.emitted == 0
+    assert redis.statuses() == ["cancelled"]
+    assert engine.sessions == {}
+
+
+def test_duplicate_session_ids_are_rejected() -> None:
+    redis = FakeRedis()
+
+    async def scenario():
+        engine = ReplayEngine(redis, channel="replay_test")
+        first = engine.start(ReplaySession(source=source(10), id="nightly"))
+        with pytest.raises(ValueError):
+            engine.start(ReplaySession(source=source(10), id="nightly"))
+        await first.task
+        return first
+
+    first = asyncio.run(scenario())
+    assert first.state == "finished" and first.emitted == 10
+
+
+def test_pause_interrupts_the_wait_for_the_next_entry() -> None:
+    redis = FakeRedis()
+
+    async def scenario():
+        engine = ReplayEngine(redis, channel="replay_test")
+        # One entry every 0.2s: the pause lands in the middle of a wait.
+        session = engine.start(ReplaySession(source=source(5), max_rate=5))
+        await asyncio.sleep(0.05)
+        await engine.pause(session.id)
+        await asyncio.sleep(0.4)
+        paused = len(redis.entries())
+        await engine.resume(session.id)
+        await asyncio.sleep(0.1)
+        resumed = len(redis.entries())
+        await engine.cancel(session.id)
+        await asyncio.gather(session.task, return_exceptions=True)
+        return paused, resumed
+
+    paused, resumed = asyncio.run(scenario())
+    assert paused == 1
+    # The paused time does not count, so the rest of the wait remains.
+    assert resumed == 1
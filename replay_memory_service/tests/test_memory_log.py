@@ -0,0 +1,106 @@
+import gzip
+import os
+import sys
+import json
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+from replay_memory_service import memory_log
+from replay_memory_service.memory_log import (
+    MemoryLogWriter,
+    iter_memory,
+    list_segments,
+    load_index,
+    parse_timestamp,
+)
+
+
+def _entry(minute: int, truth: bool) -> dict:
+    return {
+        "timestamp": f"2025-05-15T22:{minute:02d}:00",
+        "tokens": [f"m{minute}"],
+        "truth": truth,
+    }
+
+
+def test_writer_rotates_and_reader_filters(tmp_path) -> None:
+    writer = MemoryLogWriter(directory=str(tmp_path), max_bytes=200)
+    for minute in range(20):
+        writer.append(_entry(minute, truth=minute % 2 == 0))
+    writer.close()
+
+    segments = list_segments(str(tmp_path), legacy=None)
+    assert len(segments) > 1
+    assert any(s.endswith(".gz") for s in segments)
+
+    start = parse_timestamp("2025-05-15T22:05:00")
+    end = parse_timestamp("2025-05-15T22:12:00")
+    found = list(iter_memory(start=start, end=end, truth=True, segments=segments))
+    assert [e["tokens"][0] for e in found] == ["m6", "m8", "m10", "m12"]
+
+    everything = list(iter_memory(segments=segments))
+    assert len(everything) == 20
+
+
+def test_legacy_log_index_extends_on_append(tmp_path) -> None:
+    legacy = tmp_path / "memory_log.jsonl"
+    legacy.write_text(json.dumps(_entry(0, True)) + "\n")
+    assert len(list(iter_memory(truth=True, segments=[str(legacy)]))) == 1
+
+    with open(legacy, "a") as f:
+        f.write(json.dumps(_entry(1, False)) + "\n")
+        f.write(json.dumps(_entry(2, True)) + "\n")
+
+    found = list(iter_memory(truth=True, segments=[str(legacy)]))
+    assert [e["tokens"][0] for e in found] == ["m0", "m2"]
+    assert (tmp_path / "memory_log.jsonl.idx").exists()
+
+
+def test_interrupted_rotation_is_read_once(tmp_path) -> None:
+    writer = MemoryLogWriter(directory=str(tmp_path), max_bytes=10_000)
+    for minute in range(5):
+        writer.append(_entry(minute, truth=True))
+    writer.close()
+    # Crash after the .gz was put in place but before the plain file went.
+    plain = tmp_path / "memory_log.000001.jsonl"
+    with gzip.open(str(plain) + ".gz", "wb") as f:
+        f.write(plain.read_bytes())
+    (tmp_path / "memory_log.000002.jsonl.gz.tmp").write_bytes(b"partial")
+
+    segments = list_segments(str(tmp_path), legacy=None)
+    assert segments == [str(plain) + ".gz"]
+    assert len(list(iter_memory(segments=segments))) == 5
+
+    writer = MemoryLogWriter(directory=str(tmp_path), max_bytes=10_000)
+    writer.append(_entry(6, truth=False))
+    writer.close()
+    assert not plain.exists()
+    assert len(list(iter_memory(segments=list_segments(str(tmp_path), None)))) == 6
+
+
+def test_live_index_is_extended_not_reparsed(tmp_path, monkeypatch) -> None:
+    writer = MemoryLogWriter(directory=str(tmp_path), max_bytes=1_000_000)
+    writer.append(_entry(0, truth=True))
+    segment = list_segments(str(tmp_path), legacy=None)[0]
+    index = load_index(segment)
+    assert len(index) == 1
+
+    parsed = []
+    extend = memory_log.SegmentIndex.extend
+
+    def spy(self, timestamps, offsets, truths):
+        parsed.append(len(timestamps))
+        extend(self, timestamps, offsets, truths)
+
+    monkeypatch.setattr(memory_log.SegmentIndex, "extend", spy)
+    for minute in range(1, 4):
+        writer.append(_entry(minute, truth=minute % 2 == 0))
+        assert load_index(segment) is index
+    writer.close()
+
+    assert len(index) == 4
+    # Each call parsed only the one record appended since the last.
+    assert parsed == [1, 1, 1]
+    found = list(iter_memory(truth=True, segments=[segment]))
+    assert [e["tokens"][0] for e in found] == ["m0", "m2"]
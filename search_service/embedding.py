@@ -0,0 +1,60 @@
+import asyncio
+import os
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+import httpx
+import openai
+
+openai.api_key = os.getenv("OPENAI_API_KEY", "")
+
+EXPRESS_URL = os.getenv("EXPRESS_URL", "http://express_emitter:8000/encode")
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+
+# Which encoder produced the vectors stored in each collection. Queries have
+# to be embedded by the same model to land in the same space.
+COLLECTION_ENCODERS: Dict[str, str] = {
+    "well_docs": "openai",
+    "genio_embeddings": "express",
+}
+
+_cache: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+_cache_lock = asyncio.Lock()
+
+
+def _openai_embedding(text: str) -> List[float]:
+    resp = openai.Embedding.create(
+        input=text, model=os.getenv("EMBED_MODEL", "text-embedding-ada-002")
+    )
+    return resp["data"][0]["embedding"]
+
+
+async def _express_embedding(text: str) -> List[float]:
+    async with httpx.AsyncClient() as client:
+        resp = await client.post(
+            EXPRESS_URL, json={"uuid": "search-query", "text": text}, timeout=10
+        )
+        resp.raise_for_status()
+        return resp.json()["embedding"]
+
+
+async def embed_query(collection: str, text: str) -> List[float]:
+    """Embed ``text`` for ``collection``, reusing recent results."""
+    encoder = COLLECTION_ENCODERS.get(collection, "openai")
+    key = (encoder, " ".join(text.split()))
+
+    async with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    if encoder == "express":
+        vector = await _express_embedding(text)
+    else:
+        vector = await asyncio.to_thread(_openai_embedding, text)
+
+    async with _cache_lock:
+        _cache[key] = vector
+        while len(_cache) > QUERY_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return vector
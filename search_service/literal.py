@@ -0,0 +1,141 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import asyncpg
+
+from schemas import SearchRequest
+
+# Metadata keys stored in express_files.meta that literal search can filter on.
+META_FILTERS = ("well_id", "field", "district", "operator", "document_type")
+
+# ts_headline marks matches with control characters that never occur in
+# extracted text; they are turned into offsets so snippets stay plain text.
+START_SEL, STOP_SEL = "\x02", "\x03"
+SNIPPET_OPTIONS = (
+    "MaxFragments=2, MaxWords=25, MinWords=8, FragmentDelimiter=' … ', "
+    f"StartSel={START_SEL}, StopSel={STOP_SEL}"
+)
+SUBSTRING_CONTEXT = 80
+
+# Ranking runs on the GIN index only; snippets are cut for the page that is
+# actually returned, never for every matching document.
+FULLTEXT_SQL = f"""
+WITH hits AS (
+    SELECT id, ts_rank_cd(content_tsv, q) AS score, q
+    FROM express_files, websearch_to_tsquery('english', $1) AS q
+    WHERE content_tsv @@ q AND meta @> $2::jsonb
+    ORDER BY score DESC, id DESC
+    LIMIT $3 OFFSET $4
+)
+SELECT f.id, f.filename, f.source, f.timestamp, f.meta, hits.score,
+       ts_headline('english', f.content, hits.q, '{SNIPPET_OPTIONS}') AS snippet
+FROM hits JOIN express_files f USING (id)
+ORDER BY hits.score DESC, f.id DESC
+"""
+
+SUBSTRING_SQL = rf"""
+WITH hits AS (
+    SELECT id, strpos(lower(content), lower($1)) AS pos
+    FROM express_files
+    WHERE content ILIKE '%' || regexp_replace($1, '([%_\\])', '\\\1', 'g') || '%'
+      AND meta @> $2::jsonb
+    ORDER BY timestamp DESC, id DESC
+    LIMIT $3 OFFSET $4
+)
+SELECT f.id, f.filename, f.source, f.timestamp, f.meta, 1.0::float AS score,
+       substr(f.content, greatest(hits.pos - {SUBSTRING_CONTEXT}, 1),
+              length($1) + {2 * SUBSTRING_CONTEXT}) AS snippet
+FROM hits JOIN express_files f USING (id)
+ORDER BY f.timestamp DESC, f.id DESC
+"""
+
+FUZZY_SQL = f"""
+WITH hits AS (
+    SELECT id, word_similarity($1, content) AS score
+    FROM express_files
+    WHERE $1 <% content AND meta @> $2::jsonb
+    ORDER BY score DESC, id DESC
+    LIMIT $3 OFFSET $4
+)
+SELECT f.id, f.filename, f.source, f.timestamp, f.meta, hits.score,
+       left(f.content, {2 * SUBSTRING_CONTEXT}) AS snippet
+FROM hits JOIN express_files f USING (id)
+ORDER BY hits.score DESC, f.id DESC
+"""
+
+QUERIES = {"fulltext": FULLTEXT_SQL, "substring": SUBSTRING_SQL, "fuzzy": FUZZY_SQL}
+
+
+def split_highlights(snippet: str) -> Tuple[str, List[Tuple[int, int]]]:
+    """Strip ts_headline markers, returning the text and ``[start, end)`` spans."""
+    text, spans, start = [], [], None
+    length = 0
+    for part in re.split(f"([{START_SEL}{STOP_SEL}])", snippet):
+        if part == START_SEL:
+            start = length
+        elif part == STOP_SEL:
+            if start is not None:
+                spans.append((start, length))
+            start = None
+        else:
+            text.append(part)
+            length += len(part)
+    return "".join(text), spans
+
+
+def find_highlights(snippet: str, query: str) -> List[Tuple[int, int]]:
+    """Spans of every case-insensitive occurrence of ``query`` in ``snippet``."""
+    pattern = re.compile(re.escape(query), re.IGNORECASE)
+    return [m.span() for m in pattern.finditer(snippet)]
+
+
+def highlight(match: str, snippet: Optional[str], query: str):
+    if not snippet:
+        return snippet, []
+    if match == "fulltext":
+        return split_highlights(snippet)
+    if match == "substring":
+        return snippet, find_highlights(snippet, query)
+    return snippet, []
+
+
+def meta_filter(req: SearchRequest) -> Dict[str, Any]:
+    return {
+        name: value
+        for name in META_FILTERS
+        if (value := getattr(req, name, None)) is not None
+    }
+
+
+async def literal_search(
+    pool: asyncpg.Pool, req: SearchRequest
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """Return one page of matching files and whether another page exists."""
+    sql = QUERIES[req.match]
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            sql, req.query, json.dumps(meta_filter(req)), req.limit + 1, req.offset
+        )
+
+    results = []
+    for row in rows[: req.limit]:
+        meta = row["meta"]
+        timestamp = row["timestamp"].isoformat() if row["timestamp"] else None
+        snippet, highlights = highlight(req.match, row["snippet"], req.query)
+        results.append(
+            {
+                "id": str(row["id"]),
+                "score": float(row["score"]),
+                "snippet": snippet,
+                "highlights": highlights,
+                "date": timestamp,
+                "payload": {
+                    "filename": row["filename"],
+                    "source": row["source"],
+                    "timestamp": timestamp,
+                    **(json.loads(meta) if isinstance(meta, str) else meta or {}),
+                },
+            }
+        )
+    return results, len(rows) > req.limit
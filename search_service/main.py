@@ -0,0 +1,240 @@
+from fastapi import FastAPI, HTTPException
+from datetime import datetime
+from loguru import logger
+from qdrant_client.http import models
+from prometheus_fastapi_instrumentator import Instrumentator
+from prometheus_client import Histogram, Counter
+from schemas import SearchRequest, SearchResponse, SearchHit
+from embedding import embed_query
+from literal import literal_search
+from shared import profiling
+from shared.config import (
+    PGHOST,
+    PGPORT,
+    PGUSER,
+    PGPASSWORD,
+    PGDATABASE,
+)
+from shared.qdrant_profiles import (
+    client_from_env,
+    CollectionProfile,
+    create_payload_indexes,
+    profile_from_config,
+)
+import asyncio
+import asyncpg
+import os
+import time
+import uvicorn
+
+app = FastAPI(title="Genio Search Service")
+
+# Instrument middleware immediately after FastAPI app creation
+Instrumentator().instrument(app).expose(app)
+profiling.mount(app)
+
+SEARCH_COLLECTIONS = os.getenv(
+    "SEARCH_COLLECTIONS", "well_docs,genio_embeddings"
+).split(",")
+HNSW_EF = int(os.getenv("SEARCH_HNSW_EF", "128"))
+# How long a collection's applied profile is trusted before it is re-read,
+# so a `qdrant_profiles migrate` is picked up without a restart.
+PROFILE_CACHE_SECONDS = float(os.getenv("SEARCH_PROFILE_CACHE_SECONDS", "300"))
+
+# Payload fields returned to the portal; everything else stays in Qdrant.
+RESULT_FIELDS = [
+    "well_id",
+    "filename",
+    "field",
+    "district",
+    "operator",
+    "document_type",
+    "stage",
+    "layer",
+    "reflection_level",
+    "gravity_score",
+    "summary",
+    "text",
+    "timestamp",
+]
+# Payload text shown as the snippet of a semantic hit, first one present wins.
+SNIPPET_FIELDS = ("summary", "text")
+SNIPPET_CHARS = 240
+FILTER_FIELDS = ("well_id", "field", "district", "stage", "layer")
+
+qdrant = client_from_env()
+pg_pool: asyncpg.Pool | None = None
+# collection -> (read at, profile applied to the live collection)
+_profiles: dict[str, tuple[float, CollectionProfile]] = {}
+
+# Prometheus metrics
+search_latency = Histogram(
+    "search_latency_seconds", "Time spent answering searches", ["mode"]
+)
+search_errors = Counter("search_errors_total", "Total errors in Search service")
+
+
+@app.on_event("startup")
+async def startup():
+    global pg_pool
+    try:
+        pg_pool = await asyncpg.create_pool(
+            host=PGHOST,
+            port=PGPORT,
+            user=PGUSER,
+            password=PGPASSWORD,
+            database=PGDATABASE,
+        )
+    except Exception as e:
+        logger.error(f"[SEARCH] Postgres unavailable, literal search disabled: {e}")
+
+    response = await asyncio.to_thread(qdrant.get_collections)
+    existing = {c.name for c in response.collections}
+    for collection in SEARCH_COLLECTIONS:
+        if collection in existing:
+            await asyncio.to_thread(create_payload_indexes, qdrant, collection)
+            logger.info(f"[SEARCH] Payload indexes ready on '{collection}'")
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    if pg_pool is not None:
+        await pg_pool.close()
+
+
+def build_filter(req: SearchRequest) -> models.Filter | None:
+    conditions = [
+        models.FieldCondition(key=name, match=models.MatchValue(value=value))
+        for name in FILTER_FIELDS
+        if (value := getattr(req, name)) is not None
+    ]
+    return models.Filter(must=conditions) if conditions else None
+
+
+def semantic_hit(hit) -> SearchHit:
+    payload = dict(hit.payload or {})
+    text = next((payload[f] for f in SNIPPET_FIELDS if payload.get(f)), None)
+    payload.pop("text", None)  # only fetched for the snippet
+    if text and len(text) > SNIPPET_CHARS:
+        text = text[:SNIPPET_CHARS].rsplit(" ", 1)[0] + " …"
+    return SearchHit(
+        id=str(hit.id),
+        score=hit.score,
+        payload=payload,
+        snippet=text,
+        date=payload.get("timestamp"),
+    )
+
+
+async def live_profile(collection: str) -> CollectionProfile:
+    """The profile the collection actually has, cached for a while."""
+    cached = _profiles.get(collection)
+    if cached and time.monotonic() - cached[0] < PROFILE_CACHE_SECONDS:
+        return cached[1]
+    info = await asyncio.to_thread(qdrant.get_collection, collection)
+    profile = profile_from_config(info.config)
+    _profiles[collection] = (time.monotonic(), profile)
+    return profile
+
+
+async def semantic_search(req: SearchRequest) -> SearchResponse:
+    vector = await embed_query(req.collection, req.query)
+    profile = await live_profile(req.collection)
+    params = profile.search_params(hnsw_ef=HNSW_EF)
+
+    # Ask for one extra hit to know whether another page exists.
+    hits = await asyncio.to_thread(
+        qdrant.search,
+        collection_name=req.collection,
+        query_vector=vector,
+        query_filter=build_filter(req),
+        limit=req.limit + 1,
+        offset=req.offset,
+        score_threshold=req.score_threshold,
+        search_params=params,
+        with_payload=models.PayloadSelectorInclude(include=RESULT_FIELDS),
+        with_vectors=False,
+    )
+    next_offset = req.offset + req.limit if len(hits) > req.limit else None
+    return SearchResponse(
+        mode=req.mode,
+        query=req.query,
+        results=[semantic_hit(hit) for hit in hits[: req.limit]],
+        next_offset=next_offset,
+    )
+
+
+async def text_search(req: SearchRequest) -> SearchResponse:
+    if pg_pool is None:
+        raise HTTPException(status_code=503, detail="Literal search unavailable")
+    results, has_more = await literal_search(pg_pool, req)
+    return SearchResponse(
+        mode=req.mode,
+        query=req.query,
+        results=[SearchHit(**hit) for hit in results],
+        next_offset=req.offset + req.limit if has_more else None,
+    )
+
+
+@app.post("/docs/search", response_model=SearchResponse)
+async def search_docs(req: SearchRequest):
+    if not req.query.strip():
+        raise HTTPException(status_code=400, detail="Query is empty")
+    if req.collection not in SEARCH_COLLECTIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown collection, expected one of {SEARCH_COLLECTIONS}",
+        )
+
+    search = semantic_search if req.mode == "semantic" else text_search
+    try:
+        with search_latency.labels(mode=req.mode).time():
+            result = await search(req)
+    except HTTPException:
+        raise
+    except Exception as e:
+        search_errors.inc()
+        logger.error("[SEARCH] Search failed", mode=req.mode, error=str(e))
+        raise HTTPException(status_code=500, detail="Search failed")
+
+    logger.info(
+        "[SEARCH] Served search",
+        mode=req.mode,
+        hits=len(result.results),
+        well_id=req.well_id,
+    )
+    return result
+
+
+@app.get("/health")
+async def detailed_healthcheck():
+    qdrant_status = "ok"
+    try:
+        await asyncio.to_thread(qdrant.get_collections)
+    except Exception as e:
+        qdrant_status = f"error: {str(e)}"
+        logger.error(f"[SEARCH] Qdrant health check failed: {e}")
+
+    db_status = "ok"
+    try:
+        async with pg_pool.acquire() as conn:
+            await conn.execute("SELECT 1")
+    except Exception as e:
+        db_status = f"error: {str(e)}"
+        logger.error(f"[SEARCH] Database health check failed: {e}")
+
+    return {
+        "status": "active",
+        "qdrant": qdrant_status,
+        "database": db_status,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
+@app.get("/")
+async def healthcheck():
+    return {"status": "search_service active"}
+
+
+if __name__ == "__main__":
+    uvicorn.run("main:app", host="0.0.0.0", port=8000)
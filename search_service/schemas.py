@@ -0,0 +1,36 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional, Dict, Any, Tuple
+
+
+class SearchRequest(BaseModel):
+    query: str
+    mode: Literal["semantic", "literal"] = "semantic"
+    match: Literal["fulltext", "substring", "fuzzy"] = "fulltext"
+    well_id: Optional[str] = None
+    field: Optional[str] = None
+    district: Optional[str] = None
+    stage: Optional[str] = None
+    layer: Optional[str] = None
+    operator: Optional[str] = None
+    document_type: Optional[str] = None
+    collection: str = "well_docs"
+    limit: int = Field(10, ge=1, le=100)
+    offset: int = Field(0, ge=0)
+    score_threshold: Optional[float] = None
+
+
+class SearchHit(BaseModel):
+    id: str
+    score: float
+    payload: Dict[str, Any]
+    snippet: Optional[str] = None
+    # [start, end) character offsets of the matched terms in ``snippet``.
+    highlights: List[Tuple[int, int]] = []
+    date: Optional[str] = None
+
+
+class SearchResponse(BaseModel):
+    mode: str
+    query: str
+    results: List[SearchHit]
+    next_offset: Optional[int] = None
@@ -3,6 +3,10 @@ import os
 # Redis settings explicitly defined
 REDIS_HOST = os.getenv("REDIS_HOST", "genio_redis")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
+REDIS_DB = int(os.getenv("REDIS_DB", 0))
+# Per-process pool size; callers wait up to REDIS_POOL_TIMEOUT for a connection.
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", 5))
 
 # PostgreSQL settings (optional example for clarity)
 PGHOST = os.getenv("PGHOST", "postgres")
@@ -14,3 +18,5 @@ PGDATABASE = os.getenv("PGDATABASE", "database")
 # Qdrant settings (optional example for clarity)
 QDRANT_HOST = os.getenv("QDRANT_HOST", "qdrant")
 QDRANT_PORT = int(os.getenv("QDRANT_PORT", 6333))
+# ":memory:", a local path or a URL; overrides QDRANT_HOST/QDRANT_PORT when set.
+QDRANT_LOCATION = os.getenv("QDRANT_LOCATION", "")
@@ -0,0 +1,52 @@
+"""Deterministic stand-in for the sentence encoder.
+
+Selected with ``MODEL_BACKEND=fake`` so the pipeline can run offline (load
+tests, CI) without downloading a model. Vectors are seeded from a hash of
+the text, so the same text always encodes to the same unit vector;
+``FAKE_MODEL_LATENCY_MS`` adds a fixed per-call delay to mimic model cost.
+"""
+
+import hashlib
+import os
+import time
+from typing import List, Union
+
+import numpy as np
+
+FAKE_MODEL_DIM = int(os.getenv("FAKE_MODEL_DIM", "384"))
+FAKE_MODEL_LATENCY_MS = float(os.getenv("FAKE_MODEL_LATENCY_MS", "0"))
+
+
+class HashingEncoder:
+    def __init__(
+        self, dim: int = FAKE_MODEL_DIM, latency_ms: float = FAKE_MODEL_LATENCY_MS
+    ) -> None:
+        self.dim = dim
+        self.latency = latency_ms / 1000.0
+
+    def _vector(self, text: str) -> np.ndarray:
+        digest = hashlib.blake2b(text.encode(), digest_size=8).digest()
+        seed = int.from_bytes(digest, "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dim)
+        return (vector / np.linalg.norm(vector)).astype(np.float32)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, sentences: Union[str, List[str]], **kwargs) -> np.ndarray:
+        if self.latency:
+            time.sleep(self.latency)
+        if isinstance(sentences, str):
+            return self._vector(sentences)
+        if not sentences:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.stack([self._vector(s) for s in sentences])
+
+
+def load_encoder(model_name: str):
+    """The configured encoder: ``MODEL_BACKEND=fake`` or a SentenceTransformer."""
+    if os.getenv("MODEL_BACKEND", "sentence-transformers") == "fake":
+        return HashingEncoder()
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(model_name)
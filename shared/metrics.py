@@ -0,0 +1,103 @@
+"""Backlog and throughput metrics shared by every pipeline listener.
+
+Each stage gets one :class:`StageMetrics`, and all series are labelled by
+stage:
+
+* ``pipeline_messages_{in,out}_total``: messages picked up and published.
+* ``pipeline_messages_dropped_total{reason}``: messages that never made it
+  downstream. ``invalid`` means unparseable or missing fields, ``error`` a
+  failure while processing.
+* ``pipeline_queue_depth``: messages held in the process waiting their
+  turn, such as EXPRESS's batch buffer or a worker pool's intake queue.
+* ``pipeline_in_flight``: handlers currently running.
+* ``pipeline_batch_size``: how many messages went out per batch.
+* ``pipeline_subscriber_lag_seconds``: age of the newest message when it was
+  picked up; set by :func:`shared.tracing.received`.
+* ``pipeline_event_loop_lag_seconds``: how late the event loop wakes a
+  sleeping task, sampled every ``EVENT_LOOP_LAG_INTERVAL`` seconds.
+
+A stage whose queue depth, in-flight count or loop lag keeps climbing is the
+one about to drop data.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from contextlib import contextmanager
+from typing import Iterator
+
+from prometheus_client import Counter, Gauge, Histogram
+
+EVENT_LOOP_LAG_INTERVAL = float(os.getenv("EVENT_LOOP_LAG_INTERVAL", "0.5"))
+
+messages_in = Counter(
+    "pipeline_messages_in_total", "Messages picked up by a stage", ["stage"]
+)
+messages_out = Counter(
+    "pipeline_messages_out_total", "Messages published by a stage", ["stage"]
+)
+messages_dropped = Counter(
+    "pipeline_messages_dropped_total",
+    "Messages a stage did not pass downstream",
+    ["stage", "reason"],
+)
+queue_depth = Gauge(
+    "pipeline_queue_depth", "Messages waiting inside a stage", ["stage"]
+)
+in_flight = Gauge("pipeline_in_flight", "Handlers running in a stage", ["stage"])
+batch_size = Histogram(
+    "pipeline_batch_size",
+    "Messages per published batch",
+    ["stage"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024),
+)
+subscriber_lag = Gauge(
+    "pipeline_subscriber_lag_seconds",
+    "Age of the last message a stage picked up",
+    ["stage"],
+)
+event_loop_lag = Histogram(
+    "pipeline_event_loop_lag_seconds",
+    "Delay of the event loop in waking a sleeping task",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+
+class StageMetrics:
+    """The metrics above, bound to one stage."""
+
+    def __init__(self, stage: str) -> None:
+        self.stage = stage
+        self.messages_in = messages_in.labels(stage)
+        self.messages_out = messages_out.labels(stage)
+        self.queue_depth = queue_depth.labels(stage)
+        self.in_flight = in_flight.labels(stage)
+        self.batch_size = batch_size.labels(stage)
+
+    def dropped(self, reason: str, n: int = 1) -> None:
+        messages_dropped.labels(self.stage, reason).inc(n)
+
+    @contextmanager
+    def task(self) -> Iterator[None]:
+        """Count a running handler; use around each message's processing."""
+        self.in_flight.inc()
+        try:
+            yield
+        finally:
+            self.in_flight.dec()
+
+    def start_loop_monitor(self) -> "asyncio.Task":
+        return asyncio.create_task(monitor_event_loop(self.stage))
+
+
+async def monitor_event_loop(
+    stage: str, interval: float = EVENT_LOOP_LAG_INTERVAL
+) -> None:
+    histogram = event_loop_lag.labels(stage)
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        histogram.observe(max(loop.time() - started - interval, 0.0))
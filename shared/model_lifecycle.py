@@ -0,0 +1,158 @@
+"""Load models once per process, in the background, and report readiness.
+
+A :class:`ModelHandle` wraps a loader (and an optional warm-up call, so the
+first real request does not pay for lazy initialisation). :meth:`start`
+loads on a daemon thread, so the service starts serving at once.
+:meth:`get` waits for the model (and loads it on first use if nothing
+started it), and :meth:`get_nowait` raises :class:`ModelNotReady` instead.
+
+:func:`mount` adds two probes:
+
+* ``/live``: cheap. 503 only if a model failed to load, so the orchestrator
+  restarts the container.
+* ``/ready``: 503 until every model is loaded and warm. Its body reports
+  each model's state, load time and warm-up time, which are also exported
+  as ``model_load_seconds`` and ``model_ready``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+from shared.logger import logger
+
+T = TypeVar("T")
+
+
+class ModelNotReady(RuntimeError):
+    pass
+
+
+class ModelHandle(Generic[T]):
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[[], T],
+        warmup: Optional[Callable[[T], Any]] = None,
+    ) -> None:
+        self.name = name
+        self._loader = loader
+        self._warmup = warmup
+        self._model: Optional[T] = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.state = "pending"  # loading, warming, ready or failed
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self.warmup_seconds: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def start(self) -> "ModelHandle[T]":
+        """Begin loading in the background; later calls do nothing."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._load, name=f"load-{self.name}", daemon=True
+                )
+                self._thread.start()
+        return self
+
+    def _load(self) -> None:
+        try:
+            self.state = "loading"
+            started = time.perf_counter()
+            model = self._loader()
+            self.load_seconds = round(time.perf_counter() - started, 3)
+            if self._warmup is not None:
+                self.state = "warming"
+                started = time.perf_counter()
+                self._warmup(model)
+                self.warmup_seconds = round(time.perf_counter() - started, 3)
+            self._model = model
+            self.state = "ready"
+            logger.info(
+                f"Model {self.name} ready: loaded in {self.load_seconds}s, "
+                f"warm-up {self.warmup_seconds}s"
+            )
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            logger.error(f"Model {self.name} failed to load: {e}")
+        finally:
+            self._done.set()
+
+    def get(self, timeout: Optional[float] = None) -> T:
+        """The model, waiting up to ``timeout`` seconds for it to load."""
+        self.start()
+        if not self._done.wait(timeout):
+            raise ModelNotReady(f"{self.name} is still {self.state}")
+        if self._model is None:
+            raise ModelNotReady(f"{self.name} failed to load: {self.error}")
+        return self._model
+
+    def get_nowait(self) -> T:
+        if not self.ready:
+            raise ModelNotReady(f"{self.name} is {self.state}")
+        return self._model
+
+    async def wait(self) -> T:
+        """``get`` for coroutines: waits without blocking the event loop."""
+        self.start()
+        if not self._done.is_set():
+            await asyncio.to_thread(self._done.wait)
+        return self.get(0)
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "error": self.error,
+        }
+
+
+def health_status(handle: ModelHandle) -> str:
+    """``"ok"``, ``"error: ..."`` or the loading state, for /health bodies."""
+    if handle.ready:
+        return "ok"
+    if handle.state == "failed":
+        return f"error: {handle.error}"
+    return handle.state
+
+
+def mount(app, *handles: ModelHandle) -> None:
+    """Add ``/live`` and ``/ready`` for ``handles`` to a FastAPI ``app``."""
+    # Imported here so modules that only hold a handle (and their tests)
+    # do not need the web stack.
+    from fastapi.responses import JSONResponse
+    from prometheus_client import Gauge
+
+    load_seconds = Gauge("model_load_seconds", "Time to load a model", ["model"])
+    ready = Gauge("model_ready", "1 once a model is loaded and warm", ["model"])
+    for handle in handles:
+        load_seconds.labels(handle.name).set_function(
+            lambda h=handle: h.load_seconds or 0.0
+        )
+        ready.labels(handle.name).set_function(lambda h=handle: float(h.ready))
+
+    @app.get("/live")
+    def live():
+        failed = [h.name for h in handles if h.state == "failed"]
+        if failed:
+            return JSONResponse({"status": "failed", "models": failed}, 503)
+        return {"status": "alive"}
+
+    @app.get("/ready")
+    def readiness():
+        body = {
+            "ready": all(h.ready for h in handles),
+            "models": {h.name: h.status() for h in handles},
+        }
+        return JSONResponse(body, 200 if body["ready"] else 503)
@@ -0,0 +1,363 @@
+"""Time-partitioned PostgreSQL tables with retention.
+
+Append-heavy tables (``embeddings``, ``express_files``,
+``express_duplicates``, ``ingested_files``) are range-partitioned on their
+timestamp column so inserts always hit a small, hot partition, time-range
+reads prune to the partitions they need and retention is a cheap
+``DROP TABLE`` of whole partitions instead of a ``DELETE`` scan. Services
+call :func:`ensure_partitions` (psycopg2) or :func:`ensure_partitions_async`
+(asyncpg) at startup and then every ``PARTITION_MAINTENANCE_SECONDS``; a
+plain table created by an older release is migrated into the partitioned
+layout on first run. Partitions ahead of time and retention can also be
+maintained from cron::
+
+    python -m shared.pg_partitions maintain
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Generator, List, Optional, Sequence, Tuple
+
+from shared.logger import logger
+
+_PARTITION_RE = re.compile(r"_p(\d{4})_(\d{2})(?:_(\d{2}))?$")
+
+# (sql, fetch) pairs yielded by PartitionedTable.steps; fetched rows are sent
+# back so the same plan drives both psycopg2 and asyncpg.
+Step = Tuple[str, bool]
+
+
+def _env_days(name: str) -> Optional[int]:
+    value = os.getenv(f"{name.upper()}_RETENTION_DAYS")
+    return int(value) if value else None
+
+
+def _env_interval(name: str, default: str) -> str:
+    return os.getenv(f"{name.upper()}_PARTITION_INTERVAL", default)
+
+
+@dataclass(frozen=True)
+class PartitionedTable:
+    """Layout of a table range-partitioned by time."""
+
+    name: str
+    columns: Sequence[str]
+    primary_key: str
+    key: str = "timestamp"
+    interval: str = "month"  # "day" or "month"
+    retention_days: Optional[int] = None
+    premake: int = 2
+    # (suffix, definition) -> CREATE INDEX <name>_<suffix> ON <name> <definition>
+    indexes: Sequence[Tuple[str, str]] = field(default_factory=tuple)
+
+    # -- naming and bounds --------------------------------------------------
+
+    def floor(self, when: datetime) -> datetime:
+        when = when.replace(hour=0, minute=0, second=0, microsecond=0)
+        return when if self.interval == "day" else when.replace(day=1)
+
+    def next_start(self, start: datetime) -> datetime:
+        if self.interval == "day":
+            return start + timedelta(days=1)
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+    def partition_name(self, start: datetime) -> str:
+        fmt = "%Y_%m_%d" if self.interval == "day" else "%Y_%m"
+        return f"{self.name}_p{start.strftime(fmt)}"
+
+    def partition_start(self, partition: str) -> Optional[datetime]:
+        match = _PARTITION_RE.search(partition)
+        if not match or not partition.startswith(self.name):
+            return None
+        year, month, day = match.groups()
+        return datetime(int(year), int(month), int(day or 1), tzinfo=timezone.utc)
+
+    # -- DDL ---------------------------------------------------------------
+
+    def create_sql(self, name: Optional[str] = None) -> str:
+        body = ",\n    ".join([*self.columns, f"PRIMARY KEY ({self.primary_key})"])
+        return (
+            f"CREATE TABLE IF NOT EXISTS {name or self.name} (\n    {body}\n)"
+            f" PARTITION BY RANGE ({self.key})"
+        )
+
+    def partition_sql(self, start: datetime) -> str:
+        end = self.next_start(start)
+        return (
+            f"CREATE TABLE IF NOT EXISTS {self.partition_name(start)} "
+            f"PARTITION OF {self.name} "
+            f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        )
+
+    def default_partition_sql(self) -> str:
+        return (
+            f"CREATE TABLE IF NOT EXISTS {self.name}_default "
+            f"PARTITION OF {self.name} DEFAULT"
+        )
+
+    def index_sql(self) -> List[str]:
+        return [
+            f"CREATE INDEX IF NOT EXISTS {self.name}_{suffix} ON {self.name} {definition}"
+            for suffix, definition in self.indexes
+        ]
+
+    def column_names(self) -> List[str]:
+        # Generated columns cannot be inserted into and are rebuilt anyway.
+        return [
+            col.split()[0] for col in self.columns if " GENERATED " not in col.upper()
+        ]
+
+    # -- plan ----------------------------------------------------------------
+
+    def steps(self, now: Optional[datetime] = None) -> Generator[Step, Any, None]:
+        """Yield the statements that bring the table up to date.
+
+        Creates the partitioned parent (migrating a legacy plain table),
+        partitions from the current one to ``premake`` intervals ahead, moves
+        rows that overflowed into the default partition into ranges of their
+        own, creates the indexes, and drops partitions that fell out of
+        retention.
+        """
+        now = now or datetime.now(timezone.utc)
+        rows = yield (
+            "SELECT c.relkind FROM pg_class c "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            f"WHERE n.nspname = current_schema() AND c.relname = '{self.name}'",
+            True,
+        )
+        kind = rows[0][0] if rows else None
+        if isinstance(kind, bytes):
+            kind = kind.decode()
+
+        first = self.floor(now)
+        if kind == "r":
+            rows = yield (f"SELECT min({self.key}) FROM {self.name}", True)
+            oldest = rows[0][0] if rows and rows[0][0] else now
+            if oldest.tzinfo is None:
+                oldest = oldest.replace(tzinfo=timezone.utc)
+            first = min(first, self.floor(oldest))
+            logger.info(f"[PG] Migrating '{self.name}' to a partitioned table")
+            yield (f"ALTER TABLE {self.name} RENAME TO {self.name}_legacy", False)
+
+        yield (self.create_sql(), False)
+        yield (self.default_partition_sql(), False)
+        start, horizon = first, self.floor(now)
+        for _ in range(self.premake):
+            horizon = self.next_start(horizon)
+
+        # Rows past the premade range land in the default partition, and
+        # Postgres refuses to create a range partition that would cover rows
+        # still sitting there. Detach it, create the ranges those rows need,
+        # move them over and attach the emptied default again.
+        default = f"{self.name}_default"
+        rows = yield (f"SELECT min({self.key}), max({self.key}) FROM {default}", True)
+        stray = rows[0] if rows and rows[0][0] is not None else None
+        if stray is not None:
+            oldest, newest = (
+                t if t.tzinfo else t.replace(tzinfo=timezone.utc) for t in stray
+            )
+            start = min(start, self.floor(oldest))
+            horizon = max(horizon, self.floor(newest))
+            logger.info(f"[PG] Moving rows out of '{default}'")
+            yield (f"ALTER TABLE {self.name} DETACH PARTITION {default}", False)
+
+        while start <= horizon:
+            yield (self.partition_sql(start), False)
+            start = self.next_start(start)
+
+        if stray is not None:
+            cols = ", ".join(self.column_names())
+            yield (
+                f"INSERT INTO {self.name} ({cols}) SELECT {cols} FROM {default}",
+                False,
+            )
+            yield (f"TRUNCATE {default}", False)
+            yield (f"ALTER TABLE {self.name} ATTACH PARTITION {default} DEFAULT", False)
+
+        if kind == "r":
+            cols = ", ".join(self.column_names())
+            select = ", ".join(
+                f"coalesce({c}, now())" if c == self.key else c
+                for c in self.column_names()
+            )
+            yield (
+                f"INSERT INTO {self.name} ({cols}) "
+                f"SELECT {select} FROM {self.name}_legacy",
+                False,
+            )
+            if "serial" in " ".join(self.columns).lower():
+                yield (
+                    f"SELECT setval(pg_get_serial_sequence('{self.name}', 'id'), "
+                    f"coalesce(max(id), 0) + 1, false) FROM {self.name}",
+                    True,
+                )
+            yield (f"DROP TABLE {self.name}_legacy", False)
+
+        for sql in self.index_sql():
+            yield (sql, False)
+
+        if self.retention_days is not None:
+            rows = yield (
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                f"WHERE i.inhparent = '{self.name}'::regclass",
+                True,
+            )
+            cutoff = now - timedelta(days=self.retention_days)
+            for (partition,) in rows:
+                start = self.partition_start(partition)
+                if start is not None and self.next_start(start) <= cutoff:
+                    logger.info(f"[PG] Dropping expired partition '{partition}'")
+                    yield (f"DROP TABLE IF EXISTS {partition}", False)
+
+
+EMBEDDINGS = PartitionedTable(
+    name="embeddings",
+    columns=(
+        "id BIGSERIAL",
+        "uuid TEXT NOT NULL",
+        "timestamp TIMESTAMPTZ NOT NULL",
+        "metadata JSONB",
+    ),
+    primary_key="id, timestamp",
+    interval=_env_interval("embeddings", "month"),
+    retention_days=_env_days("embeddings"),
+    indexes=(
+        ("uuid_idx", "(uuid)"),
+        ("timestamp_idx", "(timestamp)"),
+        ("metadata_idx", "USING GIN (metadata jsonb_path_ops)"),
+    ),
+)
+
+EXPRESS_FILES = PartitionedTable(
+    name="express_files",
+    columns=(
+        "id BIGSERIAL",
+        "filename TEXT",
+        "source TEXT",
+        "content TEXT",
+        "timestamp TIMESTAMPTZ NOT NULL DEFAULT now()",
+        "meta JSONB",
+        # Literal search: filename hits rank above body hits.
+        "content_tsv tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('english', coalesce(filename, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(content, '')), 'B')) STORED",
+    ),
+    primary_key="id, timestamp",
+    interval=_env_interval("express_files", "month"),
+    retention_days=_env_days("express_files"),
+    indexes=(
+        ("timestamp_idx", "(timestamp)"),
+        ("content_tsv_idx", "USING GIN (content_tsv)"),
+        ("content_trgm_idx", "USING GIN (content gin_trgm_ops)"),
+        ("meta_idx", "USING GIN (meta jsonb_path_ops)"),
+    ),
+)
+
+INGESTED_FILES = PartitionedTable(
+    name="ingested_files",
+    columns=(
+        "id UUID NOT NULL",
+        "filename TEXT",
+        "filetype TEXT",
+        "timestamp TIMESTAMP NOT NULL DEFAULT now()",
+    ),
+    primary_key="id, timestamp",
+    interval=_env_interval("ingested_files", "month"),
+    retention_days=_env_days("ingested_files"),
+    indexes=(("timestamp_idx", "(timestamp)"),),
+)
+
+# Memories EXPRESS collapsed into an earlier one instead of encoding them.
+EXPRESS_DUPLICATES = PartitionedTable(
+    name="express_duplicates",
+    columns=(
+        "uuid TEXT NOT NULL",
+        "original TEXT NOT NULL",
+        "similarity REAL NOT NULL",
+        "exact BOOLEAN NOT NULL",
+        "timestamp TIMESTAMPTZ NOT NULL DEFAULT now()",
+    ),
+    primary_key="uuid, timestamp",
+    interval=_env_interval("express_duplicates", "month"),
+    retention_days=_env_days("express_duplicates"),
+    indexes=(("uuid_idx", "(uuid)"), ("original_idx", "(original)")),
+)
+
+TABLES = {
+    t.name: t
+    for t in (EMBEDDINGS, EXPRESS_FILES, EXPRESS_DUPLICATES, INGESTED_FILES)
+}
+
+
+def ensure_partitions(conn, table: PartitionedTable, now: Optional[datetime] = None):
+    """Run ``table``'s plan on a psycopg2 connection and commit."""
+    steps = table.steps(now)
+    try:
+        with conn.cursor() as cur:
+            rows = None
+            while True:
+                sql, fetch = steps.send(rows)
+                cur.execute(sql)
+                rows = cur.fetchall() if fetch else None
+    except StopIteration:
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+async def ensure_partitions_async(
+    conn, table: PartitionedTable, now: Optional[datetime] = None
+) -> None:
+    """Run ``table``'s plan on an asyncpg connection in one transaction."""
+    steps = table.steps(now)
+    async with conn.transaction():
+        rows = None
+        try:
+            while True:
+                sql, fetch = steps.send(rows)
+                if fetch:
+                    rows = await conn.fetch(sql)
+                else:
+                    await conn.execute(sql)
+                    rows = None
+        except StopIteration:
+            pass
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["maintain", "show"])
+    parser.add_argument("tables", nargs="*", default=sorted(TABLES))
+    args = parser.parse_args(argv)
+
+    if args.command == "show":
+        for name in args.tables:
+            print(TABLES[name].create_sql() + ";")
+            for sql in TABLES[name].index_sql():
+                print(sql + ";")
+        return
+
+    import psycopg2
+
+    from shared.config import PGDATABASE, PGHOST, PGPASSWORD, PGPORT, PGUSER
+
+    conn = psycopg2.connect(
+        host=PGHOST, port=PGPORT, user=PGUSER, password=PGPASSWORD, dbname=PGDATABASE
+    )
+    try:
+        for name in args.tables:
+            ensure_partitions(conn, TABLES[name])
+            logger.info(f"[PG] Maintained partitions for '{name}'")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""On-demand profiling endpoints, mounted under ``/debug`` in every service.
+
+Off unless ``PROFILING_ENABLED=1``. Then :func:`mount` adds:
+
+* ``GET /debug/profile/cpu?seconds=10``: samples the stacks of every thread
+  for a while, so the threaded listeners are included. The result is
+  speedscope JSON (open it at https://www.speedscope.app), or folded stacks
+  for ``flamegraph.pl`` with ``format=collapsed``. Only one profile runs at a
+  time.
+* ``POST /debug/memory/start`` / ``POST /debug/memory/stop``: turn
+  ``tracemalloc`` on or off. ``GET /debug/memory/snapshot`` returns the top
+  allocators. ``GET /debug/memory/diff`` compares with the previous snapshot,
+  which is what shows a leak.
+* ``GET /debug/tasks``: every asyncio task with its coroutine and stack.
+  ``GET /debug/threads``: every thread with its current stack.
+
+Sampling walks ``sys._current_frames()`` from a helper thread. The cost is
+one stack walk per thread per ``interval``, and only while a profile runs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, FastAPI, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0").lower() in ("1", "true")
+TRACEMALLOC_FRAMES = int(os.getenv("PROFILING_TRACEMALLOC_FRAMES", "10"))
+MAX_PROFILE_SECONDS = 120.0
+
+router = APIRouter(prefix="/debug", tags=["debug"])
+
+_cpu_lock = asyncio.Lock()
+_last_snapshot: Optional[tracemalloc.Snapshot] = None
+
+Frame = Tuple[str, str, int]  # (function, file, line)
+
+
+def mount(app: FastAPI) -> None:
+    """Add the ``/debug`` routes to ``app`` when profiling is enabled."""
+    if PROFILING_ENABLED:
+        app.include_router(router)
+
+
+# -- CPU ---------------------------------------------------------------------------
+
+
+def _stack(frame) -> List[Frame]:
+    """Root-first frames of a thread's current stack."""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_name, code.co_filename, frame.f_lineno))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def sample_stacks(
+    seconds: float, interval: float
+) -> Tuple[Dict[str, Counter], float]:
+    """Sample every other thread's stack; per thread name, a Counter of
+    root-first stacks. Returns it with the elapsed time."""
+    me = threading.get_ident()
+    samples: Dict[str, Counter] = {}
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            name = names.get(ident, f"thread-{ident}")
+            samples.setdefault(name, Counter())[tuple(_stack(frame))] += 1
+        time.sleep(interval)
+    return samples, time.perf_counter() - started
+
+
+def to_collapsed(samples: Dict[str, Counter]) -> str:
+    lines = []
+    for thread, stacks in samples.items():
+        for stack, count in stacks.items():
+            names = [thread] + [f"{fn} ({file}:{line})" for fn, file, line in stack]
+            lines.append(f"{';'.join(names)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def to_speedscope(
+    samples: Dict[str, Counter], elapsed: float, interval: float, name: str
+) -> dict:
+    frames: List[dict] = []
+    index: Dict[Frame, int] = {}
+    profiles = []
+    for thread, stacks in samples.items():
+        profile_samples, weights = [], []
+        for stack, count in stacks.items():
+            ids = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    fn, file, line = frame
+                    frames.append({"name": fn, "file": file, "line": line})
+                ids.append(index[frame])
+            profile_samples.append(ids)
+            weights.append(count * interval)
+        profiles.append(
+            {
+                "type": "sampled",
+                "name": thread,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": elapsed,
+                "samples": profile_samples,
+                "weights": weights,
+            }
+        )
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": profiles,
+        "name": name,
+        "exporter": "genio shared.profiling",
+    }
+
+
+@router.get("/profile/cpu")
+async def cpu_profile(
+    seconds: float = Query(10.0, gt=0, le=MAX_PROFILE_SECONDS),
+    interval: float = Query(0.005, ge=0.001, le=1.0),
+    format: str = Query("speedscope"),
+):
+    if format not in ("speedscope", "collapsed"):
+        raise HTTPException(status_code=400, detail="format: speedscope|collapsed")
+    if _cpu_lock.locked():
+        raise HTTPException(status_code=409, detail="A CPU profile is running")
+    async with _cpu_lock:
+        samples, elapsed = await asyncio.to_thread(sample_stacks, seconds, interval)
+    if format == "collapsed":
+        return PlainTextResponse(to_collapsed(samples))
+    name = f"cpu-{time.strftime('%Y%m%dT%H%M%S')}"
+    disposition = f'attachment; filename="{name}.speedscope.json"'
+    return JSONResponse(
+        to_speedscope(samples, elapsed, interval, name),
+        headers={"Content-Disposition": disposition},
+    )
+
+
+# -- memory ------------------------------------------------------------------------
+
+
+def _stat(stat) -> dict:
+    frame = stat.traceback[0]
+    return {
+        "location": f"{frame.filename}:{frame.lineno}",
+        "size_kb": round(stat.size / 1024, 1),
+        "count": stat.count,
+    }
+
+
+def _stat_diff(stat) -> dict:
+    return {
+        **_stat(stat),
+        "size_diff_kb": round(stat.size_diff / 1024, 1),
+        "count_diff": stat.count_diff,
+    }
+
+
+def _take_snapshot() -> tracemalloc.Snapshot:
+    if not tracemalloc.is_tracing():
+        raise HTTPException(
+            status_code=409, detail="tracemalloc is off; POST /debug/memory/start"
+        )
+    return tracemalloc.take_snapshot().filter_traces(
+        [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ]
+    )
+
+
+@router.post("/memory/start")
+def memory_start(frames: int = Query(TRACEMALLOC_FRAMES, ge=1, le=100)):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    return {"tracing": True, "frames": tracemalloc.get_traceback_limit()}
+
+
+@router.post("/memory/stop")
+def memory_stop():
+    global _last_snapshot
+    tracemalloc.stop()
+    _last_snapshot = None
+    return {"tracing": False}
+
+
+@router.get("/memory/snapshot")
+def memory_snapshot(
+    top: int = Query(25, ge=1, le=500), key: str = Query("lineno")
+):
+    global _last_snapshot
+    if key not in ("lineno", "filename", "traceback"):
+        raise HTTPException(status_code=400, detail="key: lineno|filename|traceback")
+    snapshot = _take_snapshot()
+    _last_snapshot = snapshot
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "traced_kb": round(current / 1024, 1),
+        "peak_kb": round(peak / 1024, 1),
+        "top": [_stat(s) for s in snapshot.statistics(key)[:top]],
+    }
+
+
+@router.get("/memory/diff")
+def memory_diff(top: int = Query(25, ge=1, le=500), key: str = Query("lineno")):
+    """Growth since the previous snapshot; this one becomes the new base."""
+    global _last_snapshot
+    if key not in ("lineno", "filename", "traceback"):
+        raise HTTPException(status_code=400, detail="key: lineno|filename|traceback")
+    snapshot = _take_snapshot()
+    previous, _last_snapshot = _last_snapshot, snapshot
+    if previous is None:
+        raise HTTPException(
+            status_code=409, detail="No earlier snapshot; this one is the base now"
+        )
+    return {"top": [_stat_diff(s) for s in snapshot.compare_to(previous, key)[:top]]}
+
+
+# -- tasks and threads -------------------------------------------------------------
+
+
+def _format_frames(frames) -> List[str]:
+    return [
+        f"{frame.f_code.co_filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+        for frame in frames
+    ]
+
+
+@router.get("/tasks")
+async def task_dump(stack: int = Query(10, ge=0, le=100)):
+    current = asyncio.current_task()
+    tasks = []
+    for task in asyncio.all_tasks():
+        if task is current:
+            continue
+        coro = task.get_coro()
+        tasks.append(
+            {
+                "name": task.get_name(),
+                "coro": getattr(coro, "__qualname__", repr(coro)),
+                "done": task.done(),
+                "cancelled": task.cancelled(),
+                "stack": _format_frames(task.get_stack(limit=stack)) if stack else [],
+            }
+        )
+    tasks.sort(key=lambda t: t["coro"])
+    return {"count": len(tasks), "tasks": tasks}
+
+
+@router.get("/threads")
+def thread_dump(stack: int = Query(20, ge=0, le=200)):
+    frames = sys._current_frames()
+    threads = []
+    for thread in threading.enumerate():
+        frame = frames.get(thread.ident)
+        lines = [
+            f"{file}:{line} in {fn}" for fn, file, line in _stack(frame)
+        ]
+        threads.append(
+            {
+                "name": thread.name,
+                "ident": thread.ident,
+                "daemon": thread.daemon,
+                "stack": lines[-stack:] if stack else [],
+            }
+        )
+    return {"count": len(threads), "threads": threads}
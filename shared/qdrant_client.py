@@ -1,27 +1,62 @@
 from __future__ import annotations
 
+import asyncio
 import os
+import threading
 import uuid
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 from qdrant_client import QdrantClient
-from qdrant_client.http.models import PointStruct, VectorParams, Distance
+from qdrant_client.http.models import PointStruct
 
-QDRANT_HOST = os.getenv("QDRANT_HOST", "qdrant")
-QDRANT_PORT = int(os.getenv("QDRANT_PORT", 6333))
+from shared.logger import logger
+from shared.qdrant_profiles import client_from_env, create_collection
 
-_client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+QDRANT_BATCH_SIZE = int(os.getenv("QDRANT_BATCH_SIZE", "256"))
+QDRANT_FLUSH_INTERVAL = float(os.getenv("QDRANT_FLUSH_INTERVAL", "0.5"))
+# Per collection; the oldest points are dropped beyond this while Qdrant is down.
+QDRANT_MAX_PENDING = int(os.getenv("QDRANT_MAX_PENDING", "10000"))
+
+_client = client_from_env()
+
+# Collection name -> vector size, filled lazily so each process only asks
+# Qdrant about a collection once.
+_known_collections: Dict[str, int] = {}
+_collections_lock = threading.Lock()
+
+
+def _collection_dim(collection: str) -> Optional[int]:
+    """Return the vector size of an existing collection, or ``None``."""
+    names = {c.name for c in _client.get_collections().collections}
+    if collection not in names:
+        return None
+    vectors = _client.get_collection(collection).config.params.vectors
+    return vectors.size
 
 
 def _ensure_collection(collection: str, dim: int) -> None:
-    collections = [c.name for c in _client.get_collections().collections]
-    if collection not in collections:
-        _client.recreate_collection(
-            collection_name=collection,
-            vectors_config=VectorParams(size=dim, distance=Distance.COSINE),
+    known = _known_collections.get(collection)
+    if known is None:
+        with _collections_lock:
+            known = _known_collections.get(collection)
+            if known is None:
+                known = _collection_dim(collection)
+                if known is None:
+                    create_collection(_client, collection, dim)
+                    known = dim
+                _known_collections[collection] = known
+    if known != dim:
+        raise ValueError(
+            f"Collection '{collection}' expects {known}-d vectors, got {dim}-d"
         )
 
 
+def forget_collection(collection: str) -> None:
+    """Drop ``collection`` from the local cache after external changes."""
+    with _collections_lock:
+        _known_collections.pop(collection, None)
+
+
 def insert_embedding_with_stage(
     collection: str, vector: List[float], metadata: Dict[str, Any]
 ) -> None:
@@ -32,3 +67,143 @@ def insert_embedding_with_stage(
         collection_name=collection,
         points=[PointStruct(id=point_id, vector=vector, payload=metadata)],
     )
+
+
+class BufferedWriter:
+    """Coalesce points from many callers into batched Qdrant upserts.
+
+    ``add`` is cheap and thread-safe, so it can be called from request
+    handlers and listener threads alike. A background task started with
+    ``start`` flushes every ``flush_interval`` seconds, or as soon as a
+    collection has ``batch_size`` pending points. ``close`` lets a flush in
+    progress finish, flushes whatever is left and should be awaited on
+    shutdown. Points that fail to upsert are kept for the next flush, up to
+    ``max_pending`` per collection.
+    """
+
+    def __init__(
+        self,
+        client: QdrantClient | None = None,
+        batch_size: int = QDRANT_BATCH_SIZE,
+        flush_interval: float = QDRANT_FLUSH_INTERVAL,
+        max_pending: int = QDRANT_MAX_PENDING,
+    ) -> None:
+        self.client = client or _client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._pending: Dict[str, List[PointStruct]] = {}
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._stopping = False
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def add(
+        self,
+        collection: str,
+        vector: List[float],
+        metadata: Dict[str, Any],
+        point_id: str | None = None,
+    ) -> str:
+        """Queue a point for upsert and return its id."""
+        _ensure_collection(collection, len(vector))
+        point_id = point_id or str(uuid.uuid4())
+        point = PointStruct(id=point_id, vector=vector, payload=metadata)
+        with self._lock:
+            pending = self._pending.setdefault(collection, [])
+            pending.append(point)
+            self._trim(collection, pending)
+            full = len(pending) >= self.batch_size
+        if full and self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+        return point_id
+
+    def _trim(self, collection: str, pending: List[PointStruct]) -> None:
+        """Drop the oldest points beyond ``max_pending``; call under the lock."""
+        excess = len(pending) - self.max_pending
+        if excess > 0:
+            del pending[:excess]
+            self.dropped += excess
+            logger.warning(
+                f"[QDRANT] Dropped {excess} points queued for '{collection}'; "
+                f"{self.max_pending} already waiting"
+            )
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(len(points) for points in self._pending.values())
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task = asyncio.create_task(self._run())
+
+    async def flush(self) -> int:
+        """Upsert everything queued so far and return the number of points."""
+        with self._lock:
+            batches, self._pending = self._pending, {}
+
+        written = 0
+        for collection, points in batches.items():
+            for start in range(0, len(points), self.batch_size):
+                chunk = points[start : start + self.batch_size]
+                try:
+                    await asyncio.to_thread(
+                        self.client.upsert, collection_name=collection, points=chunk
+                    )
+                except Exception as e:  # noqa: BLE001
+                    logger.error(
+                        f"[QDRANT] Batched upsert to '{collection}' failed: {e}"
+                    )
+                    with self._lock:
+                        pending = self._pending.setdefault(collection, [])
+                        pending[:0] = points[start:]
+                        self._trim(collection, pending)
+                    break
+                written += len(chunk)
+        return written
+
+    async def close(self) -> None:
+        if self._task is not None:
+            # Stop between flushes; cancelling inside one would lose the
+            # points it had already taken out of the buffer.
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if self._stopping:
+                break
+            await self.flush()
+
+
+writer = BufferedWriter()
+
+
+def queue_embedding_with_stage(
+    collection: str, vector: List[float], metadata: Dict[str, Any]
+) -> None:
+    """Queue embedding for a batched upsert, inserting directly if the
+    shared writer has not been started in this process."""
+    if writer.running:
+        writer.add(collection, vector, metadata)
+    else:
+        insert_embedding_with_stage(collection, vector, metadata)
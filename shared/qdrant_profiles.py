@@ -0,0 +1,417 @@
+"""Storage profiles for Qdrant collections.
+
+A profile bundles the settings that decide how much RAM a collection needs:
+vector quantization, whether original vectors live on disk, HNSW graph
+parameters and the memmap threshold. Collections pick a profile through
+``QDRANT_PROFILE_<COLLECTION>`` (falling back to ``QDRANT_PROFILE``) when they
+are created, and existing collections can be moved to another profile with
+``migrate``. ``report`` estimates the memory of every profile and measures
+its recall on a scratch copy of the collection::
+
+    python -m shared.qdrant_profiles migrate genio_embeddings scalar
+    python -m shared.qdrant_profiles report genio_embeddings --samples 100
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from shared.logger import logger
+
+DEFAULT_PROFILE = os.getenv("QDRANT_PROFILE", "memory")
+
+# Payload fields every memory collection is filtered on.
+PAYLOAD_INDEX_FIELDS = ("well_id", "field", "district", "stage", "layer")
+
+
+@dataclass(frozen=True)
+class CollectionProfile:
+    """Creation and search settings for one storage trade-off."""
+
+    name: str
+    quantization: Optional[str] = None  # "int8", "binary" or None
+    on_disk: bool = False
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    hnsw_on_disk: bool = False
+    memmap_threshold_kb: Optional[int] = None
+    oversampling: float = 1.0
+
+    def vectors_config(
+        self, dim: int, distance: models.Distance = models.Distance.COSINE
+    ) -> models.VectorParams:
+        return models.VectorParams(size=dim, distance=distance, on_disk=self.on_disk)
+
+    def quantization_config(self) -> Optional[models.QuantizationConfig]:
+        if self.quantization == "int8":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8, quantile=0.99, always_ram=True
+                )
+            )
+        if self.quantization == "binary":
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=True)
+            )
+        return None
+
+    def hnsw_config(self) -> models.HnswConfigDiff:
+        return models.HnswConfigDiff(
+            m=self.hnsw_m,
+            ef_construct=self.hnsw_ef_construct,
+            on_disk=self.hnsw_on_disk,
+        )
+
+    def optimizers_config(self) -> Optional[models.OptimizersConfigDiff]:
+        if self.memmap_threshold_kb is None:
+            return None
+        return models.OptimizersConfigDiff(memmap_threshold=self.memmap_threshold_kb)
+
+    def search_params(self, hnsw_ef: Optional[int] = None) -> models.SearchParams:
+        """Search params that rescore quantized candidates with the originals."""
+        quantization = None
+        if self.quantization:
+            quantization = models.QuantizationSearchParams(
+                rescore=True, oversampling=self.oversampling
+            )
+        return models.SearchParams(hnsw_ef=hnsw_ef, quantization=quantization)
+
+    def bytes_per_point(self, dim: int) -> Dict[str, float]:
+        """Approximate RAM and disk bytes used by one point."""
+        original = dim * 4
+        if self.quantization == "int8":
+            quantized = dim
+        elif self.quantization == "binary":
+            quantized = math.ceil(dim / 8)
+        else:
+            quantized = 0
+        # Layer 0 of the graph keeps 2*m links of 4 bytes per point.
+        graph = self.hnsw_m * 2 * 4
+
+        ram = quantized
+        disk = 0
+        if self.on_disk:
+            disk += original
+        else:
+            ram += original
+        if self.hnsw_on_disk:
+            disk += graph
+        else:
+            ram += graph
+        return {"ram": ram, "disk": disk}
+
+
+PROFILES: Dict[str, CollectionProfile] = {
+    "memory": CollectionProfile(name="memory"),
+    "scalar": CollectionProfile(
+        name="scalar",
+        quantization="int8",
+        on_disk=True,
+        memmap_threshold_kb=20000,
+        oversampling=2.0,
+    ),
+    "binary": CollectionProfile(
+        name="binary",
+        quantization="binary",
+        on_disk=True,
+        memmap_threshold_kb=20000,
+        oversampling=3.0,
+    ),
+    "disk": CollectionProfile(
+        name="disk",
+        on_disk=True,
+        hnsw_on_disk=True,
+        memmap_threshold_kb=20000,
+    ),
+}
+
+
+def get_profile(name: str) -> CollectionProfile:
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown Qdrant profile '{name}', expected one of {sorted(PROFILES)}"
+        ) from None
+
+
+def profile_for(collection: str) -> CollectionProfile:
+    """Return the configured profile for ``collection``."""
+    env_key = f"QDRANT_PROFILE_{collection.upper()}"
+    return get_profile(os.getenv(env_key, DEFAULT_PROFILE))
+
+
+def profile_from_config(config: models.CollectionConfig) -> CollectionProfile:
+    """The profile a collection's live ``config`` actually applies.
+
+    Named after the entry of ``PROFILES`` it matches, or ``custom``. Either way
+    searches oversample quantized candidates like the profile of that kind.
+    """
+    quantization = config.quantization_config
+    if isinstance(quantization, models.ScalarQuantization):
+        kind = "int8"
+    elif isinstance(quantization, models.BinaryQuantization):
+        kind = "binary"
+    else:
+        kind = None
+    hnsw = config.hnsw_config
+    applied = CollectionProfile(
+        name="custom",
+        quantization=kind,
+        on_disk=bool(getattr(config.params.vectors, "on_disk", False)),
+        hnsw_m=hnsw.m,
+        hnsw_ef_construct=hnsw.ef_construct,
+        hnsw_on_disk=bool(hnsw.on_disk),
+        memmap_threshold_kb=config.optimizer_config.memmap_threshold,
+    )
+    oversampling = 1.0
+    for profile in PROFILES.values():
+        if profile.quantization == kind:
+            oversampling = profile.oversampling
+        if replace(profile, name="custom", oversampling=1.0) == applied:
+            return profile
+    return replace(applied, oversampling=oversampling)
+
+
+def create_collection(
+    client: QdrantClient,
+    collection: str,
+    dim: int,
+    profile: Optional[CollectionProfile] = None,
+    recreate: bool = False,
+) -> None:
+    """Create ``collection`` with its profile applied."""
+    profile = profile or profile_for(collection)
+    create = client.recreate_collection if recreate else client.create_collection
+    create(
+        collection_name=collection,
+        vectors_config=profile.vectors_config(dim),
+        hnsw_config=profile.hnsw_config(),
+        optimizers_config=profile.optimizers_config(),
+        quantization_config=profile.quantization_config(),
+    )
+    logger.info(f"[QDRANT] Created '{collection}' ({dim}-d, profile={profile.name})")
+    create_payload_indexes(client, collection)
+
+
+def create_payload_indexes(
+    client: QdrantClient, collection: str, fields=PAYLOAD_INDEX_FIELDS
+) -> None:
+    """Create keyword payload indexes so filtered searches stay selective.
+
+    Creating an index that already exists is a no-op in Qdrant, so this is
+    safe to call on every startup.
+    """
+    for field in fields:
+        client.create_payload_index(
+            collection_name=collection,
+            field_name=field,
+            field_schema=models.PayloadSchemaType.KEYWORD,
+        )
+
+
+def apply_profile(
+    client: QdrantClient, collection: str, profile: CollectionProfile
+) -> None:
+    """Move an existing collection to ``profile`` in place.
+
+    Qdrant rebuilds quantized data and re-optimizes segments in the
+    background, so the collection keeps serving while this takes effect.
+    """
+    quantization = profile.quantization_config() or models.Disabled.DISABLED
+    client.update_collection(
+        collection_name=collection,
+        vectors_config={"": models.VectorParamsDiff(on_disk=profile.on_disk)},
+        hnsw_config=profile.hnsw_config(),
+        optimizers_config=profile.optimizers_config(),
+        quantization_config=quantization,
+    )
+    logger.info(f"[QDRANT] Migrated '{collection}' to profile={profile.name}")
+
+
+def memory_report(dim: int, points: int = 1_000_000) -> List[Dict[str, Any]]:
+    """Estimated RAM/disk in MiB for ``points`` points under every profile."""
+    rows = []
+    for profile in PROFILES.values():
+        per_point = profile.bytes_per_point(dim)
+        rows.append(
+            {
+                "profile": profile.name,
+                "ram_mib": round(per_point["ram"] * points / 2**20, 1),
+                "disk_mib": round(per_point["disk"] * points / 2**20, 1),
+            }
+        )
+    return rows
+
+
+def measure_recall(
+    client: QdrantClient,
+    collection: str,
+    profile: CollectionProfile,
+    samples: int = 100,
+    k: int = 10,
+) -> float:
+    """Mean recall@k of ``profile`` search against exact float32 search.
+
+    Stored vectors are used as queries so no embedding model is needed.
+    """
+    points, _ = client.scroll(
+        collection_name=collection, limit=samples, with_vectors=True
+    )
+    if not points:
+        return float("nan")
+
+    exact = models.SearchParams(
+        exact=True, quantization=models.QuantizationSearchParams(ignore=True)
+    )
+    approx = profile.search_params()
+    total = 0.0
+    for point in points:
+        truth = client.query_points(
+            collection_name=collection,
+            query=point.vector,
+            limit=k,
+            search_params=exact,
+        ).points
+        found = client.query_points(
+            collection_name=collection,
+            query=point.vector,
+            limit=k,
+            search_params=approx,
+        ).points
+        expected = {p.id for p in truth}
+        if expected:
+            total += len(expected & {p.id for p in found}) / len(expected)
+    return total / len(points)
+
+
+def _wait_until_indexed(
+    client: QdrantClient, collection: str, timeout: float = 300.0
+) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = client.get_collection(collection).status
+        if status == models.CollectionStatus.GREEN:
+            return
+        time.sleep(0.5)
+    logger.warning(f"[QDRANT] '{collection}' still optimizing, measuring anyway")
+
+
+def compare_profiles(
+    client: QdrantClient,
+    collection: str,
+    samples: int = 100,
+    k: int = 10,
+    copy_points: int = 20_000,
+) -> Dict[str, float]:
+    """Recall@k of every profile in ``PROFILES`` on a copy of ``collection``.
+
+    Up to ``copy_points`` stored points are copied into a scratch collection
+    per profile, indexed right away, and searched with that profile's params.
+    Each copy is compared with exact float32 search over the same points, so
+    all profiles are measured against the same unquantized baseline. The
+    scratch collections are dropped afterwards.
+    """
+    points, _ = client.scroll(
+        collection_name=collection, limit=copy_points, with_vectors=True
+    )
+    if not points:
+        return {name: float("nan") for name in PROFILES}
+    dim = len(points[0].vector)
+    structs = [
+        models.PointStruct(id=p.id, vector=p.vector, payload=p.payload or {})
+        for p in points
+    ]
+
+    recalls = {}
+    for name, profile in PROFILES.items():
+        scratch = f"{collection}__recall_{name}"
+        create_collection(client, scratch, dim, profile, recreate=True)
+        try:
+            # Index and quantize however small the copy is.
+            client.update_collection(
+                collection_name=scratch,
+                optimizers_config=models.OptimizersConfigDiff(indexing_threshold=1),
+            )
+            for start in range(0, len(structs), 1000):
+                client.upsert(
+                    collection_name=scratch, points=structs[start : start + 1000]
+                )
+            _wait_until_indexed(client, scratch)
+            recalls[name] = measure_recall(client, scratch, profile, samples, k)
+        finally:
+            client.delete_collection(scratch)
+    return recalls
+
+
+def client_from_env() -> QdrantClient:
+    """Client for ``QDRANT_LOCATION`` (``:memory:``, a path or a URL), or
+    for ``QDRANT_HOST``/``QDRANT_PORT`` when it is unset."""
+    from shared.config import QDRANT_HOST, QDRANT_LOCATION, QDRANT_PORT
+
+    if QDRANT_LOCATION == ":memory:":
+        return QdrantClient(location=":memory:")
+    if QDRANT_LOCATION.startswith(("http://", "https://")):
+        return QdrantClient(url=QDRANT_LOCATION)
+    if QDRANT_LOCATION:
+        return QdrantClient(path=QDRANT_LOCATION)
+    return QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    migrate = sub.add_parser("migrate", help="apply a profile to a collection")
+    migrate.add_argument("collection")
+    migrate.add_argument("profile", choices=sorted(PROFILES))
+
+    report = sub.add_parser("report", help="memory estimate and recall")
+    report.add_argument("collection")
+    report.add_argument("--points", type=int, default=1_000_000)
+    report.add_argument("--samples", type=int, default=100)
+    report.add_argument("--k", type=int, default=10)
+    report.add_argument(
+        "--copy-points",
+        type=int,
+        default=20_000,
+        help="points copied into each scratch collection for the recall test",
+    )
+
+    args = parser.parse_args(argv)
+    client = client_from_env()
+
+    if args.command == "migrate":
+        apply_profile(client, args.collection, get_profile(args.profile))
+        return
+
+    info = client.get_collection(args.collection)
+    dim = info.config.params.vectors.size
+    current = profile_from_config(info.config)
+    recalls = compare_profiles(
+        client, args.collection, args.samples, args.k, args.copy_points
+    )
+    print(f"{args.collection}: {dim}-d, {info.points_count} points")
+    print(f"applied profile: {current.name}")
+    print(
+        f"{'profile':<8} {'RAM MiB/' + str(args.points):>18} {'disk MiB':>10}"
+        f" {'recall@' + str(args.k):>10}"
+    )
+    for row in memory_report(dim, args.points):
+        recall = recalls[row["profile"]]
+        print(
+            f"{row['profile']:<8} {row['ram_mib']:>18} {row['disk_mib']:>10}"
+            f" {recall:>10.3f}"
+        )
+    print("recall is against exact float32 search over the same points")
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,53 @@
-import redis
+"""Shared Redis clients and publish helpers.
+
+Nothing connects at import time. :func:`get_redis` (threads) and
+:func:`get_async_redis` (asyncio) build one pooled client per process on
+first use, from ``shared.config``; connections are opened as callers need
+them, up to ``REDIS_MAX_CONNECTIONS``, and callers beyond that wait for a
+free one instead of failing. Transient connection errors are retried with
+backoff. :func:`publish_many` / :func:`apublish_many` send a batch of
+messages in one pipeline round trip. Every publisher stamps the message's
+trace context (:mod:`shared.tracing`), if it carries one.
+
+Listeners read through :func:`listen` / :func:`alisten`, which resubscribe
+with backoff when the connection drops. Redis does not hold pub/sub
+messages for a slow or absent subscriber: it buffers up to the server's
+``client-output-buffer-limit pubsub`` and then disconnects the client, and
+whatever was published while it was gone is lost.
+"""
+
+import asyncio
 import json
+import threading
 import time
 from datetime import datetime
+from typing import Any, AsyncIterator, Iterable, Iterator, List, Optional, Tuple
 
-# Retry connection logic
-def get_redis_connection():
-    while True:
-        try:
-            r = redis.Redis(host='genio_redis', port=6379, decode_responses=True)
-            r.ping()  # Test connection
-            return r
-        except redis.exceptions.ConnectionError:
-            print("Redis not available yet, retrying...")
-            time.sleep(1)
+import redis
+import redis.asyncio as aioredis
+from redis.asyncio.retry import Retry as AsyncRetry
+from redis.backoff import ExponentialBackoff
+from redis.retry import Retry
+
+from shared.config import (
+    REDIS_DB,
+    REDIS_HOST,
+    REDIS_MAX_CONNECTIONS,
+    REDIS_PORT,
+    REDIS_POOL_TIMEOUT,
+)
+from shared.logger import logger
+from shared.tracing import stamp
+
+REDIS_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}"
+RETRIES = 3
+
+_lock = threading.Lock()
+_client: Optional[redis.Redis] = None
+_async_client: Optional[aioredis.Redis] = None
+
+Message = Tuple[str, Any]  # (channel, payload)
 
-r = get_redis_connection()
 
 # JSON serializer for datetime objects
 def default_serializer(obj):
@@ -22,11 +55,206 @@ def default_serializer(obj):
         return obj.isoformat()
     raise TypeError(f"Type {type(obj)} not serializable")
 
-# Single correct publish function
-def publish(channel: str, message: dict):
-    r.publish(channel, json.dumps(message, default=default_serializer))
 
-def subscribe(channel: str):
-    pubsub = r.pubsub()
-    pubsub.subscribe(channel)
-    return pubsub
+def dumps(message: Any) -> str:
+    if isinstance(message, str):
+        return message
+    return json.dumps(message, default=default_serializer)
+
+
+def _encode(message: Any) -> str:
+    stamp(message)
+    return dumps(message)
+
+
+def _client_options() -> dict:
+    return dict(
+        decode_responses=True,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT,
+        socket_keepalive=True,
+        health_check_interval=30,
+    )
+
+
+def get_redis() -> redis.Redis:
+    """The process-wide synchronous client, created on first use."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                pool = redis.BlockingConnectionPool.from_url(
+                    REDIS_URL, **_client_options()
+                )
+                _client = redis.Redis(
+                    connection_pool=pool,
+                    retry=Retry(ExponentialBackoff(cap=1.0), RETRIES),
+                    retry_on_error=[redis.ConnectionError, redis.TimeoutError],
+                )
+    return _client
+
+
+def get_async_redis() -> aioredis.Redis:
+    """The process-wide asyncio client, created on first use."""
+    global _async_client
+    if _async_client is None:
+        with _lock:
+            if _async_client is None:
+                pool = aioredis.BlockingConnectionPool.from_url(
+                    REDIS_URL, **_client_options()
+                )
+                _async_client = aioredis.Redis(
+                    connection_pool=pool,
+                    retry=AsyncRetry(ExponentialBackoff(cap=1.0), RETRIES),
+                    retry_on_error=[redis.ConnectionError, redis.TimeoutError],
+                )
+    return _async_client
+
+
+# -- publishing ----------------------------------------------------------------
+
+
+def publish(channel: str, message: Any) -> int:
+    return get_redis().publish(channel, _encode(message))
+
+
+def publish_many(messages: Iterable[Message]) -> List[int]:
+    """Publish ``(channel, payload)`` pairs in one pipeline round trip."""
+    pipe = get_redis().pipeline(transaction=False)
+    for channel, message in messages:
+        pipe.publish(channel, _encode(message))
+    return pipe.execute()
+
+
+async def apublish(channel: str, message: Any) -> int:
+    return await get_async_redis().publish(channel, _encode(message))
+
+
+async def apublish_many(messages: Iterable[Message]) -> List[int]:
+    pipe = get_async_redis().pipeline(transaction=False)
+    for channel, message in messages:
+        pipe.publish(channel, _encode(message))
+    return await pipe.execute()
+
+
+# -- subscribing ---------------------------------------------------------------
+
+
+def subscribe(channel: str, retry_interval: float = 1.0):
+    """Subscribe on a dedicated connection, waiting for Redis to come up."""
+    while True:
+        pubsub = get_redis().pubsub()
+        try:
+            pubsub.subscribe(channel)
+            return pubsub
+        except redis.ConnectionError:
+            pubsub.close()
+            logger.warning(f"Redis not available yet, retrying '{channel}'...")
+            time.sleep(retry_interval)
+
+
+async def asubscribe(channel: str, retry_interval: float = 1.0):
+    while True:
+        pubsub = get_async_redis().pubsub()
+        try:
+            await pubsub.subscribe(channel)
+            return pubsub
+        except redis.ConnectionError:
+            await pubsub.close()
+            logger.warning(f"Redis not available yet, retrying '{channel}'...")
+            await asyncio.sleep(retry_interval)
+
+
+def listen(
+    channel: str,
+    stop: threading.Event,
+    timeout: float = 1.0,
+    retry_interval: float = 1.0,
+    max_retry_interval: float = 30.0,
+) -> Iterator[Optional[dict]]:
+    """Yield messages from ``channel`` until ``stop`` is set, or ``None``
+    after ``timeout`` seconds without one. A lost connection is logged and
+    the channel resubscribed with exponential backoff."""
+    pubsub = subscribe(channel, retry_interval)
+    delay = retry_interval
+    try:
+        while not stop.is_set():
+            try:
+                message = pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=timeout
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Lost subscription to '{channel}' ({e}); "
+                    f"resubscribing in {delay:.0f}s"
+                )
+                pubsub.close()
+                time.sleep(delay)
+                delay = min(delay * 2, max_retry_interval)
+                pubsub = subscribe(channel, retry_interval)
+                continue
+            delay = retry_interval
+            yield message
+    finally:
+        pubsub.close()
+
+
+async def alisten(
+    channel: str,
+    stop: Optional[asyncio.Event] = None,
+    timeout: float = 1.0,
+    retry_interval: float = 1.0,
+    max_retry_interval: float = 30.0,
+) -> AsyncIterator[Optional[dict]]:
+    """The asyncio :func:`listen`; without ``stop`` it runs until cancelled."""
+    pubsub = await asubscribe(channel, retry_interval)
+    delay = retry_interval
+    try:
+        while stop is None or not stop.is_set():
+            try:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=timeout
+                )
+            except Exception as e:
+                logger.warning(
+                    f"Lost subscription to '{channel}' ({e}); "
+                    f"resubscribing in {delay:.0f}s"
+                )
+                await pubsub.close()
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, max_retry_interval)
+                pubsub = await asubscribe(channel, retry_interval)
+                continue
+            delay = retry_interval
+            yield message
+    finally:
+        await pubsub.close()
+
+
+# -- health --------------------------------------------------------------------
+
+
+def health() -> str:
+    """``"ok"`` or ``"error: ..."``, in the shape /health endpoints report."""
+    try:
+        get_redis().ping()
+        return "ok"
+    except Exception as e:
+        return f"error: {e}"
+
+
+async def ahealth() -> str:
+    try:
+        await get_async_redis().ping()
+        return "ok"
+    except Exception as e:
+        return f"error: {e}"
+
+
+async def close_async_redis() -> None:
+    """Close the asyncio client's connections; call from service shutdown."""
+    global _async_client
+    if _async_client is not None:
+        client, _async_client = _async_client, None
+        await client.close()
+        await client.connection_pool.disconnect()
@@ -6,6 +6,7 @@ class NowSignal(BaseModel):
     timestamp: datetime
     source: str
     content: str
+    uuid: Optional[str] = None
 
 class ExpressedSignal(NowSignal):
     enriched: Optional[dict] = None
@@ -0,0 +1,108 @@
+import os
+import sys
+from datetime import datetime, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+from shared.pg_partitions import PartitionedTable
+
+NOW = datetime(2024, 5, 10, 12, tzinfo=timezone.utc)
+
+TABLE = PartitionedTable(
+    name="events",
+    columns=("id BIGSERIAL", "timestamp TIMESTAMPTZ NOT NULL", "body TEXT"),
+    primary_key="id, timestamp",
+    retention_days=60,
+    indexes=(("timestamp_idx", "(timestamp)"),),
+)
+
+
+def plan(table, kind=None, oldest=None, default=(None, None), partitions=()):
+    """Drive ``table.steps`` against canned catalog answers, returning the SQL."""
+    steps = table.steps(NOW)
+    executed, rows = [], None
+    try:
+        while True:
+            sql, fetch = steps.send(rows)
+            executed.append(sql)
+            rows = None
+            if not fetch:
+                continue
+            if "relkind" in sql:
+                rows = [(kind,)] if kind else []
+            elif sql.startswith("SELECT min(timestamp), max(timestamp)"):
+                rows = [default]
+            elif sql.startswith("SELECT min("):
+                rows = [(oldest,)]
+            elif "pg_inherits" in sql:
+                rows = [(name,) for name in partitions]
+            else:
+                rows = [(1,)]
+    except StopIteration:
+        return executed
+
+
+def created(executed):
+    return [sql.split()[5] for sql in executed if " PARTITION OF " in sql]
+
+
+def test_fresh_table() -> None:
+    executed = plan(TABLE)
+    assert executed[1].startswith("CREATE TABLE IF NOT EXISTS events (")
+    assert created(executed) == [
+        "events_default",
+        "events_p2024_05",
+        "events_p2024_06",
+        "events_p2024_07",
+    ]
+    assert not any("DETACH" in sql or "legacy" in sql for sql in executed)
+    assert "CREATE INDEX IF NOT EXISTS events_timestamp_idx" in executed[-2]
+
+
+def test_legacy_table_is_migrated() -> None:
+    executed = plan(TABLE, kind=b"r", oldest=datetime(2024, 3, 3))
+    assert "ALTER TABLE events RENAME TO events_legacy" in executed
+    assert created(executed)[1:] == [
+        "events_p2024_03",
+        "events_p2024_04",
+        "events_p2024_05",
+        "events_p2024_06",
+        "events_p2024_07",
+    ]
+    copy = executed.index(
+        "INSERT INTO events (id, timestamp, body) "
+        "SELECT id, coalesce(timestamp, now()), body FROM events_legacy"
+    )
+    assert executed[copy + 2] == "DROP TABLE events_legacy"
+
+
+def test_expired_partitions_are_dropped() -> None:
+    executed = plan(
+        TABLE,
+        kind="p",
+        partitions=("events_p2024_02", "events_p2024_03", "events_default"),
+    )
+    assert executed[-1] == "DROP TABLE IF EXISTS events_p2024_02"
+    assert not any("events_p2024_03" in sql for sql in executed if "DROP" in sql)
+    assert not any("events_default" in sql for sql in executed if "DROP" in sql)
+
+
+def test_rows_in_the_default_partition_get_their_own_range() -> None:
+    stray = (datetime(2024, 8, 2), datetime(2024, 9, 30))
+    executed = plan(TABLE, kind="p", default=stray)
+    detach = executed.index("ALTER TABLE events DETACH PARTITION events_default")
+    move = executed.index(
+        "INSERT INTO events (id, timestamp, body) "
+        "SELECT id, timestamp, body FROM events_default"
+    )
+    ranges = [
+        i for i, sql in enumerate(executed) if "FOR VALUES FROM ('2024-0" in sql
+    ]
+    # Every range is created while the default partition is detached.
+    assert detach < min(ranges) and max(ranges) < move
+    assert created(executed)[-2:] == ["events_p2024_08", "events_p2024_09"]
+    assert executed[move + 1 : move + 3] == [
+        "TRUNCATE events_default",
+        "ALTER TABLE events ATTACH PARTITION events_default DEFAULT",
+    ]
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+import pytest
+
+pytest.importorskip("qdrant_client")
+
+from shared import qdrant_client as qc
+
+
+@pytest.fixture(autouse=True)
+def known_collections(monkeypatch):
+    monkeypatch.setattr(qc, "_ensure_collection", lambda collection, dim: None)
+
+
+class FlakyClient:
+    """Records upserts and fails while ``down`` is set."""
+
+    def __init__(self, down: bool = False, delay: float = 0.0) -> None:
+        self.down = down
+        self.delay = delay
+        self.upserted = []
+
+    def upsert(self, collection_name, points):
+        if self.delay:
+            time.sleep(self.delay)
+        if self.down:
+            raise ConnectionError("qdrant is down")
+        self.upserted.extend(points)
+
+
+def add(writer, n, collection="writer_test"):
+    return [writer.add(collection, [0.1, 0.2, 0.3], {"i": i}) for i in range(n)]
+
+
+def test_flush_batches_everything_queued() -> None:
+    client = FlakyClient()
+    writer = qc.BufferedWriter(client, batch_size=4)
+    ids = add(writer, 10)
+    assert writer.pending() == 10
+    assert asyncio.run(writer.flush()) == 10
+    assert [p.id for p in client.upserted] == ids
+    assert writer.pending() == 0
+
+
+def test_failed_upserts_are_requeued_up_to_the_limit() -> None:
+    client = FlakyClient(down=True)
+    writer = qc.BufferedWriter(client, batch_size=4, max_pending=6)
+    add(writer, 5)
+    assert asyncio.run(writer.flush()) == 0
+    assert writer.pending() == 5
+
+    newer = add(writer, 3)
+    assert writer.pending() == 6
+    assert writer.dropped == 2
+
+    client.down = False
+    assert asyncio.run(writer.flush()) == 6
+    assert [p.id for p in client.upserted][-3:] == newer
+
+
+def test_close_waits_for_a_running_flush() -> None:
+    client = FlakyClient(delay=0.05)
+
+    async def scenario():
+        writer = qc.BufferedWriter(client, batch_size=2, flush_interval=60)
+        await writer.start()
+        add(writer, 6)  # fills batches, so the background task flushes now
+        await asyncio.sleep(0.01)
+        add(writer, 1)
+        await writer.close()
+        return writer
+
+    writer = asyncio.run(scenario())
+    assert len(client.upserted) == 7
+    assert writer.pending() == 0
+    assert not writer.running
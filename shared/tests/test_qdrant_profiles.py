@@ -0,0 +1,72 @@
+import os
+import random
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+import pytest
+
+pytest.importorskip("qdrant_client")
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+from shared.qdrant_profiles import (
+    PROFILES,
+    compare_profiles,
+    create_collection,
+    profile_from_config,
+)
+
+
+def config_for(profile, **hnsw) -> models.CollectionConfig:
+    """The config Qdrant reports for a collection created with ``profile``."""
+    return models.CollectionConfig(
+        params=models.CollectionParams(vectors=profile.vectors_config(8)),
+        hnsw_config=models.HnswConfig(
+            m=hnsw.get("m", profile.hnsw_m),
+            ef_construct=profile.hnsw_ef_construct,
+            full_scan_threshold=10000,
+            on_disk=profile.hnsw_on_disk,
+        ),
+        optimizer_config=models.OptimizersConfig(
+            deleted_threshold=0.2,
+            vacuum_min_vector_number=1000,
+            default_segment_number=0,
+            memmap_threshold=profile.memmap_threshold_kb,
+            indexing_threshold=20000,
+            flush_interval_sec=5,
+        ),
+        wal_config=models.WalConfig(wal_capacity_mb=32, wal_segments_ahead=0),
+        quantization_config=profile.quantization_config(),
+    )
+
+
+@pytest.mark.parametrize("name", sorted(PROFILES))
+def test_named_profiles_are_recognised(name) -> None:
+    assert profile_from_config(config_for(PROFILES[name])) == PROFILES[name]
+
+
+def test_changed_settings_report_a_custom_profile() -> None:
+    profile = profile_from_config(config_for(PROFILES["binary"], m=32))
+    assert profile.name == "custom"
+    assert profile.quantization == "binary" and profile.hnsw_m == 32
+    assert profile.oversampling == PROFILES["binary"].oversampling
+
+
+def test_compare_profiles_measures_every_profile_on_scratch_copies() -> None:
+    client = QdrantClient(location=":memory:")
+    create_collection(client, "notes", 8, PROFILES["memory"])
+    rng = random.Random(7)
+    client.upsert(
+        collection_name="notes",
+        points=[
+            models.PointStruct(id=i, vector=[rng.random() for _ in range(8)])
+            for i in range(40)
+        ],
+    )
+    recalls = compare_profiles(client, "notes", samples=10, k=5)
+    assert set(recalls) == set(PROFILES)
+    assert all(0.0 <= recall <= 1.0 for recall in recalls.values())
+    assert [c.name for c in client.get_collections().collections] == ["notes"]
@@ -0,0 +1,54 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+redis = pytest.importorskip("redis")
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+sys.path.insert(0, ROOT)
+
+from shared import redis_utils
+
+
+class FakePubSub:
+    """Replays ``script``: a message dict, ``None`` or an exception to raise."""
+
+    def __init__(self, script):
+        self.script = script
+        self.closed = False
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=None):
+        item = self.script.pop(0) if self.script else None
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    async def close(self):
+        self.closed = True
+
+
+def test_alisten_resubscribes_after_a_disconnect(monkeypatch) -> None:
+    first = FakePubSub(
+        [{"data": "a"}, redis.ConnectionError("Connection closed by server.")]
+    )
+    second = FakePubSub([{"data": "b"}])
+    subscriptions = [first, second]
+
+    async def asubscribe(channel, retry_interval=1.0):
+        return subscriptions.pop(0)
+
+    monkeypatch.setattr(redis_utils, "asubscribe", asubscribe)
+
+    async def scenario():
+        received = []
+        async for message in redis_utils.alisten("ch", retry_interval=0):
+            if message:
+                received.append(message["data"])
+            if len(received) == 2:
+                break
+        return received
+
+    assert asyncio.run(scenario()) == ["a", "b"]
+    assert first.closed and not subscriptions
@@ -0,0 +1,188 @@
+"""Trace context carried through the pipeline in the message envelope.
+
+NOW starts a trace on each memory it publishes (:func:`start`). The context
+travels inside the message under ``_trace``:
+
+    {"id": <trace id>, "span": <parent span id>, "start": <epoch>,
+     "sent": <epoch of the last publish>, "hops": [[stage, dequeued, done]]}
+
+Each stage calls :func:`received` when it picks a message up. That records
+how long the message waited since it was published, and opens a hop. The
+stage copies the context onto what it publishes next (:func:`forward`).
+The publishers in :mod:`shared.redis_utils` then stamp it (:func:`stamp`):
+the open hop is closed and its processing time recorded, and ``sent`` is
+reset for the next stage. EMBED calls :func:`finish` once the memory is
+stored, which records the end-to-end latency.
+
+All three are Prometheus histograms labelled by stage. When
+``OTEL_EXPORTER_OTLP_ENDPOINT`` is set and the OpenTelemetry SDK is
+installed, each hop is also exported as a queue span and a processing span
+under the trace id. Timestamps are wall-clock, so hops across hosts are only
+as accurate as their clock sync. ``TRACING_ENABLED=0`` stops new traces;
+messages without a context pass through untouched.
+"""
+
+from __future__ import annotations
+
+import os
+import secrets
+import time
+from typing import Any, Dict, Optional
+
+from prometheus_client import Histogram
+
+from shared.logger import logger
+from shared.metrics import subscriber_lag
+
+KEY = "_trace"
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "1").lower() not in ("0", "false")
+OTEL_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "")
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "genio")
+
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+queue_wait = Histogram(
+    "pipeline_queue_wait_seconds",
+    "Time a message waited between publish and pickup, by receiving stage",
+    ["stage"],
+    buckets=BUCKETS,
+)
+processing = Histogram(
+    "pipeline_processing_seconds",
+    "Time from pickup to publishing the next message, by stage",
+    ["stage"],
+    buckets=BUCKETS,
+)
+end_to_end = Histogram(
+    "pipeline_end_to_end_seconds",
+    "Time from NOW ingest to the memory being stored by EMBED",
+    buckets=BUCKETS,
+)
+
+Trace = Dict[str, Any]
+
+_tracer: Any = None
+
+
+def start(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Attach a new trace to ``message`` (in place) and return it."""
+    if TRACING_ENABLED and KEY not in message:
+        now = time.time()
+        message[KEY] = {
+            "id": secrets.token_hex(16),
+            "span": secrets.token_hex(8),
+            "start": now,
+            "sent": now,
+            "hops": [],
+        }
+    return message
+
+
+def received(message: Dict[str, Any], stage: str) -> Optional[Trace]:
+    """Record queue wait for ``stage`` and open its hop; returns the context."""
+    trace = message.get(KEY)
+    if not isinstance(trace, dict):
+        return None
+    now = time.time()
+    sent = trace.get("sent", now)
+    wait = max(now - sent, 0.0)
+    queue_wait.labels(stage).observe(wait)
+    subscriber_lag.labels(stage).set(wait)
+    _span(trace, f"{stage} queue", stage, sent, now)
+    trace.setdefault("hops", []).append([stage, now, None])
+    return trace
+
+
+def forward(trace: Optional[Trace], payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Carry ``trace`` on ``payload`` (in place) and return it."""
+    if trace is not None:
+        payload[KEY] = trace
+    return payload
+
+
+def stamp(message: Any) -> None:
+    """Close the open hop and mark the publish time; called by publishers."""
+    if not isinstance(message, dict):
+        return
+    trace = message.get(KEY)
+    if not isinstance(trace, dict):
+        return
+    now = time.time()
+    _close_hop(trace, now)
+    trace["sent"] = now
+
+
+def finish(trace: Optional[Trace]) -> None:
+    """Close the last hop and record end-to-end latency."""
+    if trace is None:
+        return
+    now = time.time()
+    _close_hop(trace, now)
+    end_to_end.observe(max(now - trace.get("start", now), 0.0))
+
+
+def _close_hop(trace: Trace, now: float) -> None:
+    hops = trace.get("hops")
+    if not hops or hops[-1][2] is not None:
+        return
+    stage, dequeued, _ = hops[-1]
+    hops[-1][2] = now
+    processing.labels(stage).observe(max(now - dequeued, 0.0))
+    _span(trace, f"{stage} process", stage, dequeued, now)
+
+
+# -- OpenTelemetry -------------------------------------------------------------
+
+
+def _get_tracer():
+    global _tracer
+    if _tracer is None:
+        _tracer = False
+        if OTEL_ENDPOINT:
+            try:
+                from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+                    OTLPSpanExporter,
+                )
+                from opentelemetry.sdk.resources import Resource
+                from opentelemetry.sdk.trace import TracerProvider
+                from opentelemetry.sdk.trace.export import BatchSpanProcessor
+            except ImportError:
+                logger.warning(
+                    "OTEL_EXPORTER_OTLP_ENDPOINT is set but opentelemetry-sdk "
+                    "is not installed; spans are not exported"
+                )
+            else:
+                provider = TracerProvider(
+                    resource=Resource.create({"service.name": OTEL_SERVICE_NAME})
+                )
+                # The exporter reads the endpoint and headers from OTEL_* itself.
+                provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+                _tracer = provider.get_tracer("genio.pipeline")
+    return _tracer or None
+
+
+def _span(trace: Trace, name: str, stage: str, begin: float, end: float) -> None:
+    tracer = _get_tracer()
+    if tracer is None:
+        return
+    from opentelemetry import trace as otel
+
+    try:
+        parent = otel.NonRecordingSpan(
+            otel.SpanContext(
+                trace_id=int(trace["id"], 16),
+                span_id=int(trace["span"], 16),
+                is_remote=True,
+                trace_flags=otel.TraceFlags(otel.TraceFlags.SAMPLED),
+            )
+        )
+        span = tracer.start_span(
+            name,
+            context=otel.set_span_in_context(parent),
+            start_time=int(begin * 1e9),
+            attributes={"genio.stage": stage},
+        )
+        span.end(end_time=int(end * 1e9))
+    except (KeyError, ValueError) as e:
+        logger.warning(f"Dropping span for malformed trace context: {e}")
@@ -0,0 +1,119 @@
+"""A fixed set of asyncio workers fed from a bounded queue.
+
+Listeners hand each message to :meth:`WorkerPool.submit`. ``submit`` waits
+while the intake queue is full, so a burst holds the listener back instead of
+growing this process's memory. That is not backpressure on the publisher:
+Redis buffers pub/sub messages for a slow subscriber only up to its
+``client-output-buffer-limit pubsub``, then disconnects it (the listener
+resubscribes, see :func:`shared.redis_utils.alisten`) and the messages in
+between are lost. At most ``workers`` handlers run at once, and at most
+``queue_size`` messages wait for one.
+
+On shutdown, :meth:`drain` stops intake, lets the workers finish what is
+queued (up to a timeout) and then cancels them.
+
+Saturation shows in the stage's ``pipeline_queue_depth`` and
+``pipeline_in_flight`` (:mod:`shared.metrics`), next to
+``pipeline_workers`` (capacity) and ``pipeline_intake_wait_seconds`` (how
+long the listener was held back).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, List, Optional
+
+from prometheus_client import Gauge, Histogram
+
+from shared.logger import logger
+from shared.metrics import StageMetrics
+
+WORKER_POOL_SIZE = int(os.getenv("WORKER_POOL_SIZE", "8"))
+WORKER_QUEUE_SIZE = int(os.getenv("WORKER_QUEUE_SIZE", "100"))
+WORKER_DRAIN_TIMEOUT = float(os.getenv("WORKER_DRAIN_TIMEOUT", "30"))
+
+workers_gauge = Gauge("pipeline_workers", "Workers in a stage's pool", ["stage"])
+intake_wait = Histogram(
+    "pipeline_intake_wait_seconds",
+    "Time a listener waited for room in its stage's worker queue",
+    ["stage"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+
+class WorkerPool:
+    def __init__(
+        self,
+        handler: Callable[[Any], Awaitable[None]],
+        metrics: StageMetrics,
+        workers: int = WORKER_POOL_SIZE,
+        queue_size: int = WORKER_QUEUE_SIZE,
+    ) -> None:
+        self.handler = handler
+        self.metrics = metrics
+        self.workers = workers
+        self.queue: Optional[asyncio.Queue] = None
+        self.queue_size = queue_size
+        self._tasks: List[asyncio.Task] = []
+        self._closed = False
+        self._intake_wait = intake_wait.labels(metrics.stage)
+
+    def start(self) -> None:
+        """Start the workers; call from the service's startup event."""
+        # The queue is created here so it binds to the running loop.
+        self.queue = asyncio.Queue(self.queue_size)
+        stage = self.metrics.stage
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"{stage}-worker-{i}")
+            for i in range(self.workers)
+        ]
+        workers_gauge.labels(stage).set(self.workers)
+
+    async def submit(self, item: Any) -> None:
+        """Queue ``item``, waiting while the queue is full."""
+        if self._closed:
+            self.metrics.dropped("shutdown")
+            return
+        if self.queue.full():
+            started = time.perf_counter()
+            await self.queue.put(item)
+            self._intake_wait.observe(time.perf_counter() - started)
+        else:
+            self.queue.put_nowait(item)
+        self.metrics.queue_depth.set(self.queue.qsize())
+
+    async def _worker(self) -> None:
+        while True:
+            item = await self.queue.get()
+            self.metrics.queue_depth.set(self.queue.qsize())
+            try:
+                with self.metrics.task():
+                    await self.handler(item)
+            except Exception as e:
+                self.metrics.dropped("error")
+                logger.error(f"[{self.metrics.stage.upper()}] Worker error: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def drain(self, timeout: float = WORKER_DRAIN_TIMEOUT) -> None:
+        """Stop intake, finish queued items for up to ``timeout`` seconds,
+        then cancel the workers."""
+        self._closed = True
+        if self.queue is None:
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            left = self.queue.qsize()
+            self.metrics.dropped("shutdown", left)
+            logger.warning(
+                f"[{self.metrics.stage.upper()}] Drain timed out; "
+                f"{left} queued messages abandoned"
+            )
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        workers_gauge.labels(self.metrics.stage).set(0)
@@ -4,7 +4,11 @@ from datetime import datetime
 from loguru import logger
 from schemas import VisualizeRequest, VisualizeResponse
 from visualization import generate_visualization
-import redis.asyncio as redis
+from shared import profiling
+from shared import tracing
+from shared.metrics import StageMetrics
+from shared.worker_pool import WorkerPool
+from shared.redis_utils import alisten, apublish, close_async_redis, get_async_redis
 from prometheus_fastapi_instrumentator import Instrumentator
 from prometheus_client import Histogram, Counter
 import asyncio
@@ -17,17 +21,13 @@ app.mount("/static", StaticFiles(directory="."), name="static")
 
 # Immediately after app creation (correct middleware placement)
 Instrumentator().instrument(app).expose(app)
+profiling.mount(app)
 
 # Redis setup
-REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
-REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 REFLECT_CHANNEL = os.getenv("REFLECT_CHANNEL", "reflect_channel")
 VISUALIZE_CHANNEL = os.getenv("VISUALIZE_CHANNEL", "visualize_channel")
 
-redis_pool = redis.ConnectionPool.from_url(
-    f"redis://{REDIS_HOST}:{REDIS_PORT}/0", decode_responses=True
-)
-redis_client = redis.Redis(connection_pool=redis_pool)
+redis_client = get_async_redis()
 
 # Prometheus metrics
 visualization_latency = Histogram(
@@ -36,11 +36,13 @@ visualization_latency = Histogram(
 visualize_errors = Counter(
     "visualize_errors_total", "Total errors in Visualize service"
 )
+stage_metrics = StageMetrics("visualize")
 
 shutdown_event = asyncio.Event()
 
 
 async def process_message(data):
+    trace = tracing.received(data, "visualize")
     req = VisualizeRequest(
         uuid=data["uuid"],
         anchored_embedding=data["anchored_embedding"],
@@ -60,38 +62,44 @@ async def process_message(data):
             "timestamp": datetime.utcnow().isoformat(),
             "anchored_embedding": req.anchored_embedding,
         }
-        await redis_client.publish(VISUALIZE_CHANNEL, json.dumps(response))
+        await apublish(VISUALIZE_CHANNEL, tracing.forward(trace, response))
+        stage_metrics.messages_out.inc()
         logger.info("[VISUALIZE] Published visualization", uuid=req.uuid)
     except Exception as e:
         visualize_errors.inc()
+        stage_metrics.dropped("error")
         logger.error("[VISUALIZE] Error generating visualization", error=str(e))
 
 
-async def listener():
-    pubsub = redis_client.pubsub()
-    await pubsub.subscribe(REFLECT_CHANNEL)
-    logger.info(f"[VISUALIZE] Subscribed to '{REFLECT_CHANNEL}'")
+workers = WorkerPool(process_message, stage_metrics)
 
-    while not shutdown_event.is_set():
-        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1)
+
+async def listener():
+    logger.info(f"[VISUALIZE] Subscribing to '{REFLECT_CHANNEL}'")
+    async for message in alisten(REFLECT_CHANNEL, shutdown_event):
         if message:
+            stage_metrics.messages_in.inc()
             try:
                 data = json.loads(message["data"])
-                asyncio.create_task(process_message(data))
+                await workers.submit(data)
             except Exception as e:
                 visualize_errors.inc()
+                stage_metrics.dropped("invalid")
                 logger.error("[VISUALIZE] Failed to process message", error=str(e))
 
 
 @app.on_event("startup")
 async def startup_event():
+    workers.start()
     asyncio.create_task(listener())
+    stage_metrics.start_loop_monitor()
 
 
 @app.on_event("shutdown")
 async def shutdown_event_trigger():
     shutdown_event.set()
-    await redis_client.close()
+    await workers.drain()
+    await close_async_redis()
 
 
 @app.post("/visualize", response_model=VisualizeResponse)
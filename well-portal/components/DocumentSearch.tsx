@@ -1,10 +1,25 @@
-import { useState } from 'react';
+import { ReactNode, useState } from 'react';
 import { searchDocs } from '../lib/api';
 
 interface Props {
   wellId: string;
 }
 
+// Matched terms arrive as [start, end) offsets into the plain-text snippet.
+function Snippet({ text, highlights = [] }: { text?: string; highlights?: [number, number][] }) {
+  if (!text) return null;
+  const parts: ReactNode[] = [];
+  let pos = 0;
+  highlights.forEach(([start, end], idx) => {
+    if (start < pos) return;
+    parts.push(text.slice(pos, start));
+    parts.push(<mark key={idx}>{text.slice(start, end)}</mark>);
+    pos = end;
+  });
+  parts.push(text.slice(pos));
+  return <p>{parts}</p>;
+}
+
 export default function DocumentSearch({ wellId }: Props) {
   const [mode, setMode] = useState<'literal' | 'semantic'>('literal');
   const [query, setQuery] = useState('');
@@ -40,7 +55,7 @@ export default function DocumentSearch({ wellId }: Props) {
       <ul className="space-y-1 text-sm max-h-40 overflow-auto">
         {results.map((r, idx) => (
           <li key={idx} className="border-b pb-1">
-            <p>{r.snippet}</p>
+            <Snippet text={r.snippet} highlights={r.highlights} />
             <p className="text-xs text-gray-500">{r.date}</p>
           </li>
         ))}